@@ -0,0 +1,196 @@
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+EWMA_ALPHA = 0.05  # Weight of each new point in the rolling mean and variance
+SEASONAL_ALPHA = 0.3  # Weight of each new point in its time-of-day slot
+SEASON_SECONDS = 24 * 60 * 60  # Reports follow a daily cycle
+SLOT_SECONDS = 15 * 60  # One slot per chart point
+SEASONAL_MIN_SAMPLES = 3  # Points a slot needs before it is the expected value
+WARMUP_POINTS = 8  # Points before the rolling mean replaces Downdetector's baseline
+
+START_SCORE = 4.0  # Score that opens an outage
+END_SCORE = 2.0  # An outage closes after END_POINTS points below this score
+END_POINTS = 2
+MIN_REPORTS = 10  # Fewer reports never open an outage
+
+# Severity level by peak score, highest first
+SEVERITY_LEVELS = ((16.0, "critical"), (8.0, "major"), (0.0, "minor"))
+
+EVENTS_MAX = 1000  # Recent start/end events kept in memory
+
+SLOTS = SEASON_SECONDS // SLOT_SECONDS
+
+
+def severity_level(score: float) -> str:
+    return next(level for threshold, level in SEVERITY_LEVELS if score >= threshold)
+
+
+class SeriesState:
+    """Rolling state of one company/domain: EWMA, variance and seasonal slots."""
+
+    __slots__ = ("last_ts", "count", "mean", "var", "slot_mean", "slot_count", "outage", "calm")
+
+    def __init__(self):
+        self.last_ts = -1
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.slot_mean = [0.0] * SLOTS
+        self.slot_count = [0] * SLOTS
+        self.outage: Optional[Dict[str, Any]] = None
+        self.calm = 0
+
+    def expected(self, ts: int, baseline: float) -> float:
+        """Seasonal slot mean once warm, else the rolling mean, else Downdetector's baseline."""
+        slot = ts % SEASON_SECONDS // SLOT_SECONDS
+        if self.slot_count[slot] >= SEASONAL_MIN_SAMPLES:
+            return self.slot_mean[slot]
+        if self.count >= WARMUP_POINTS:
+            return self.mean
+        return baseline
+
+    def score(self, reports: float, expected: float) -> float:
+        # Report counts are roughly Poisson, so the spread is at least sqrt(expected)
+        return (reports - expected) / math.sqrt(max(self.var, expected, 1.0))
+
+    def learn(self, ts: int, reports: float) -> None:
+        if self.count == 0:
+            self.mean = reports
+        diff = reports - self.mean
+        increment = EWMA_ALPHA * diff
+        self.mean += increment
+        self.var = (1 - EWMA_ALPHA) * (self.var + diff * increment)
+        self.count += 1
+
+        slot = ts % SEASON_SECONDS // SLOT_SECONDS
+        if self.slot_count[slot] == 0:
+            self.slot_mean[slot] = reports
+        else:
+            self.slot_mean[slot] += SEASONAL_ALPHA * (reports - self.slot_mean[slot])
+        self.slot_count[slot] += 1
+
+
+class AnomalyDetector:
+    """Incremental outage detection over every company's report series.
+
+    Each new point is scored against the expected report count for its
+    time of day and folded into the rolling state in O(1); points seen in
+    an earlier scrape are skipped. An outage opens when the score reaches
+    START_SCORE and closes after END_POINTS calm points; points inside an
+    outage do not move the baselines.
+    """
+
+    def __init__(self, events_max: int = EVENTS_MAX):
+        self._series: Dict[Tuple[str, str], SeriesState] = {}
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=events_max)
+        self.points = 0
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def update(self, company: str, domain: str, timestamps: Sequence[int],
+               reports: Sequence[float], baseline: Sequence[float],
+               record: bool = True) -> List[Dict[str, Any]]:
+        """Feed the points newer than the last one seen, return the events they raised.
+
+        With ``record=False`` (seeding from history) the state is updated
+        but events are neither kept nor returned.
+        """
+        state = self._series.setdefault((company, domain), SeriesState())
+        events = []
+        for ts, value, base in zip(timestamps, reports, baseline):
+            if ts <= state.last_ts:
+                continue
+            state.last_ts = ts
+            self.points += 1
+
+            expected = state.expected(ts, base)
+            score = state.score(value, expected)
+            outage = state.outage
+
+            if outage is None:
+                if score >= START_SCORE and value >= MIN_REPORTS:
+                    state.outage = outage = {
+                        "company": company,
+                        "domain": domain,
+                        "start_ts": ts,
+                        "peak_ts": ts,
+                        "peak_reports": value,
+                        "expected_reports": round(expected, 2),
+                        "severity": round(score, 2),
+                        "level": severity_level(score),
+                        "points": 1,
+                    }
+                    events.append({"event": "start", "ts": ts, **outage})
+                else:
+                    state.learn(ts, value)
+                continue
+
+            outage["points"] += 1
+            if score > outage["severity"]:
+                outage.update(
+                    peak_ts=ts,
+                    peak_reports=value,
+                    expected_reports=round(expected, 2),
+                    severity=round(score, 2),
+                    level=severity_level(score),
+                )
+
+            if score >= END_SCORE:
+                state.calm = 0
+                continue
+
+            state.learn(ts, value)
+            state.calm += 1
+            if state.calm >= END_POINTS:
+                events.append({
+                    "event": "end",
+                    "ts": ts,
+                    **outage,
+                    "end_ts": ts,
+                    "duration_seconds": ts - outage["start_ts"],
+                })
+                state.outage = None
+                state.calm = 0
+
+        if not record:
+            return []
+        self.events.extend(events)
+        return events
+
+    def active(self, company: Optional[str] = None,
+               domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Open outages, most severe first."""
+        outages = [
+            dict(state.outage)
+            for (series_company, series_domain), state in self._series.items()
+            if state.outage is not None
+            and company in (None, series_company)
+            and domain in (None, series_domain)
+        ]
+        return sorted(outages, key=lambda outage: -outage["severity"])
+
+    def recent(self, since: int = 0, company: Optional[str] = None,
+               domain: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Start/end events at or after ``since``, newest first."""
+        matches = []
+        for event in reversed(self.events):
+            if len(matches) >= limit:
+                break
+            if (event["ts"] >= since and company in (None, event["company"])
+                    and domain in (None, event["domain"])):
+                matches.append(event)
+        return matches
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "series": len(self._series),
+            "points": self.points,
+            "active_outages": sum(1 for state in self._series.values() if state.outage is not None),
+            "events_kept": len(self.events),
+            "max_events": self.events.maxlen,
+        }
@@ -0,0 +1,175 @@
+import asyncio
+import glob
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+
+# Raw capture: every fetched status page is appended, compressed, to an
+# archive under CAPTURE_DIR for offline reprocessing (python -m app.replay);
+# unset disables capture
+CAPTURE_DIR = os.getenv("CAPTURE_DIR") or None
+CAPTURE_LEVEL = 6  # zlib level; pages are mostly repeated markup
+SEGMENT_SECONDS = 60 * 60  # A new segment file per process every hour
+
+ARCHIVE_SUFFIX = ".capture"
+
+# One record is a JSON header line followed by ``length`` bytes of
+# zlib-compressed HTML:
+#   {"company": "pix", "domain": "com.br", "fetched_at": 1760700000.123,
+#    "size": 181234, "length": 23456}\n<compressed page>
+Header = Dict[str, Any]
+
+
+def encode_record(company: str, domain: str, raw: bytes, fetched_at: float,
+                  level: int = CAPTURE_LEVEL) -> bytes:
+    body = zlib.compress(raw, level)
+    header = {
+        "company": company,
+        "domain": domain,
+        "fetched_at": round(fetched_at, 3),
+        "size": len(raw),
+        "length": len(body),
+    }
+    return orjson.dumps(header) + b"\n" + body
+
+
+def decode_page(body: bytes) -> str:
+    return zlib.decompress(body).decode("utf-8")
+
+
+HEADER_FIELDS = ("company", "domain", "fetched_at")
+
+
+def read_segment(f: BinaryIO, skipped: Optional[List[str]] = None) -> Iterator[Tuple[Header, bytes]]:
+    """Yield (header, compressed page) records.
+
+    A record whose header is missing a field is skipped; one whose header
+    does not parse or has no valid length ends the segment, since the next
+    record cannot be found, and so does a truncated last record. Each is
+    appended to ``skipped`` with the reason. Pages are not decompressed
+    here, so a corrupt page fails later, on its own record.
+    """
+    name = getattr(f, "name", "segment")
+    while True:
+        offset = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        try:
+            if not line.endswith(b"\n"):
+                raise ValueError("truncated header")
+            header = orjson.loads(line)
+            length = header["length"]
+            if not isinstance(length, int) or length < 0:
+                raise ValueError(f"invalid length {length!r}")
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            if skipped is not None:
+                skipped.append(f"{name}@{offset}: {type(e).__name__}: {e}, rest of segment skipped")
+            return
+        body = f.read(length)
+        if len(body) < length:
+            if skipped is not None:
+                skipped.append(f"{name}@{offset}: truncated page")
+            return
+        missing = [field for field in HEADER_FIELDS if field not in header]
+        if missing:
+            if skipped is not None:
+                skipped.append(f"{name}@{offset}: header without {', '.join(missing)}")
+            continue
+        yield header, body
+
+
+def archive_files(paths: Iterable[str]) -> List[str]:
+    """Segment files under each path (a directory or a segment), oldest first."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", f"*{ARCHIVE_SUFFIX}"), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_archive(paths: Iterable[str], skipped: Optional[List[str]] = None) -> Iterator[Tuple[Header, bytes]]:
+    """Stream the records of every segment under ``paths`` without decompressing them.
+
+    Corrupt records are skipped as read_segment describes and listed in ``skipped``.
+    """
+    for path in archive_files(paths):
+        with open(path, "rb") as f:
+            yield from read_segment(f, skipped)
+
+
+class PageArchive:
+    """Append fetched pages to compressed, timestamped segment files.
+
+    Each process writes its own segment per SEGMENT_SECONDS window
+    (``<directory>/<YYYYmmdd-HHMM>-<pid>.capture``, UTC), so scrape workers
+    never interleave records. Compression and writes run in a thread;
+    a failed capture is counted and never fails the scrape.
+    """
+
+    def __init__(self, directory: Optional[str], level: int = CAPTURE_LEVEL,
+                 segment_seconds: int = SEGMENT_SECONDS):
+        self.directory = directory
+        self.level = level
+        self.segment_seconds = segment_seconds
+        self._lock = threading.Lock()
+
+        self.captured = 0
+        self.failed = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.segment: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def segment_path(self, now: float) -> str:
+        start = now - now % self.segment_seconds
+        stamp = datetime.fromtimestamp(start, timezone.utc).strftime("%Y%m%d-%H%M")
+        return os.path.join(self.directory, f"{stamp}-{os.getpid()}{ARCHIVE_SUFFIX}")
+
+    def append(self, company: str, domain: str, html: str, fetched_at: float) -> None:
+        raw = html.encode("utf-8")
+        record = encode_record(company, domain, raw, fetched_at, self.level)
+        path = self.segment_path(fetched_at)
+        with self._lock:
+            if path != self.segment:
+                os.makedirs(self.directory, exist_ok=True)
+                self.segment = path
+            with open(path, "ab") as f:
+                f.write(record)
+            self.captured += 1
+            self.raw_bytes += len(raw)
+            self.stored_bytes += len(record)
+
+    async def capture(self, company: str, domain: str, html: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self.append, company, domain, html, time.time())
+        except OSError as e:
+            self.failed += 1
+            print(f"Error capturing page for {company}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "captured": self.captured,
+            "failed": self.failed,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+            "segment": self.segment,
+        }
+
+
+page_archive = PageArchive(CAPTURE_DIR)
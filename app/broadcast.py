@@ -0,0 +1,174 @@
+import asyncio
+import json
+import secrets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+SUBSCRIBER_QUEUE_SIZE = 100  # Frames buffered per client before it is dropped
+
+# Events relayed between API workers through the shared cache backend
+RELAY_CHANNEL = "stream"
+RELAY_QUEUE_SIZE = 1000  # Events waiting to be sent before new ones are dropped
+RELAY_RETRY = 1  # seconds before resubscribing after a backend error
+
+
+class Subscriber:
+    """One stream client: a bounded queue of SSE frames and a domain filter."""
+
+    def __init__(self, domain: Optional[str], maxsize: int):
+        self.domain = domain
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    def wants(self, domain: Optional[str]) -> bool:
+        return self.domain is None or domain is None or self.domain == domain
+
+
+class Broadcaster:
+    """Fan out server-sent events to every subscriber from one publisher.
+
+    Each event is serialized once into an SSE frame and queued for the
+    subscribers interested in its domain. A subscriber whose queue is full
+    is disconnected instead of slowing down the others; EventSource
+    clients reconnect and reload the full state.
+
+    Only the worker that scraped a key publishes its changes. With a relay
+    (a cache backend with pub/sub) every event is also sent to the other
+    workers, which deliver it to their own subscribers; without one, each
+    worker's subscribers only see that worker's scrapes.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._next_id = 0
+
+        # Tells this worker's relayed events apart from the others'
+        self.origin = secrets.token_hex(8)
+        self.relay = None
+        self._outbox: "asyncio.Queue[bytes]" = asyncio.Queue(RELAY_QUEUE_SIZE)
+        self._relay_tasks: List[asyncio.Task] = []
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.relayed_out = 0
+        self.relayed_in = 0
+        self.relay_dropped = 0
+
+    @asynccontextmanager
+    async def subscribe(self, domain: Optional[str] = None) -> AsyncIterator[Subscriber]:
+        subscriber = Subscriber(domain, self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: Dict[str, Any], domain: Optional[str] = None) -> int:
+        """Queue an event for local subscribers and the relay, return how many got it here."""
+        if self.relay is not None:
+            message = json.dumps(
+                {"origin": self.origin, "event": event, "data": data, "domain": domain},
+                ensure_ascii=False,
+            ).encode()
+            try:
+                self._outbox.put_nowait(message)
+            except asyncio.QueueFull:
+                self.relay_dropped += 1
+        return self.deliver(event, data, domain)
+
+    def deliver(self, event: str, data: Dict[str, Any], domain: Optional[str] = None) -> int:
+        """Queue an event for matching local subscribers, return how many got it."""
+        targets = [subscriber for subscriber in self._subscribers if subscriber.wants(domain)]
+        if not targets:
+            return 0
+
+        self._next_id += 1
+        self.published += 1
+        frame = f"id: {self._next_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        delivered = 0
+        for subscriber in targets:
+            try:
+                subscriber.queue.put_nowait(frame)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+        self.delivered += delivered
+        return delivered
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped += 1
+        # Make room for the end-of-stream marker
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def start_relay(self, backend) -> None:
+        """Send and receive events through ``backend``'s pub/sub channel."""
+        self.relay = backend
+        self._relay_tasks = [
+            asyncio.create_task(self._send_relayed()),
+            asyncio.create_task(self._receive_relayed()),
+        ]
+
+    async def stop_relay(self) -> None:
+        for task in self._relay_tasks:
+            task.cancel()
+        await asyncio.gather(*self._relay_tasks, return_exceptions=True)
+        self._relay_tasks = []
+        self.relay = None
+
+    async def _send_relayed(self) -> None:
+        # One sender keeps this worker's events in order
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self.relay.publish(RELAY_CHANNEL, message)
+                self.relayed_out += 1
+            except Exception as e:
+                self.relay_dropped += 1
+                print(f"Stream relay publish failed: {e}")
+
+    async def _receive_relayed(self) -> None:
+        while True:
+            try:
+                async for message in self.relay.listen(RELAY_CHANNEL):
+                    relayed = json.loads(message)
+                    if relayed["origin"] == self.origin:
+                        continue
+                    self.relayed_in += 1
+                    self.deliver(relayed["event"], relayed["data"], relayed["domain"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Stream relay subscription failed, retrying: {e}")
+            await asyncio.sleep(RELAY_RETRY)
+
+    def domains(self) -> Set[Optional[str]]:
+        """Domains with at least one subscriber (None means every domain)."""
+        return {subscriber.domain for subscriber in self._subscribers}
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Whether published events can reach anyone; with a relay, any worker may listen."""
+        return bool(self._subscribers) or self.relay is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped,
+            "relay": {
+                "backend": self.relay.name,
+                "sent": self.relayed_out,
+                "received": self.relayed_in,
+                "dropped": self.relay_dropped,
+            }
+            if self.relay is not None
+            else None,
+        }
@@ -0,0 +1,222 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+from .metrics import BROWSER_CONTEXTS_OPEN, stage_timer
+
+# Pool configuration
+POOL_BROWSERS = 2  # Chromium processes kept alive
+POOL_MAX_CONTEXTS = 4  # Concurrent pages handed out across all browsers
+POOL_RECYCLE_AFTER = 50  # Pages served before a browser is replaced
+POOL_ACQUIRE_TIMEOUT = 60  # Seconds to wait for a free page slot
+# A browser that cannot open a context this fast is hung, even when still
+# connected; it is replaced and the page is opened on another browser
+POOL_CONTEXT_TIMEOUT = 10  # Seconds
+POOL_CLOSE_TIMEOUT = 10  # Seconds to wait for a retired browser to close
+
+
+class _BrowserSlot:
+    """A pooled Chromium instance with its usage counters."""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0
+        self.served = 0
+        self.retired = False
+        self.responsive = True
+
+    @property
+    def healthy(self) -> bool:
+        return not self.retired and self.responsive and self.browser.is_connected()
+
+
+class BrowserPool:
+    """Process-wide pool of long-lived Chromium browsers.
+
+    Each caller gets a fresh, isolated browser context backed by one of the
+    pooled browsers, so a scrape only pays for navigation. Browsers are
+    replaced once they have served ``recycle_after`` pages, disconnect
+    or fail to open a context within ``context_timeout``.
+    """
+
+    def __init__(self, browsers: int = POOL_BROWSERS, max_contexts: int = POOL_MAX_CONTEXTS,
+                 recycle_after: int = POOL_RECYCLE_AFTER, acquire_timeout: float = POOL_ACQUIRE_TIMEOUT,
+                 context_timeout: float = POOL_CONTEXT_TIMEOUT):
+        self.browsers = browsers
+        self.max_contexts = max_contexts
+        self.recycle_after = recycle_after
+        self.acquire_timeout = acquire_timeout
+        self.context_timeout = context_timeout
+
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_BrowserSlot] = []
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._next = 0
+
+        self.launches = 0
+        self.recycled = 0
+        self.unhealthy = 0
+        self.pages_served = 0
+        self.open_contexts = 0
+        # Called with open_contexts whenever it changes; scrape workers send
+        # it to the API process, the one whose metrics are scraped
+        self.on_contexts_change: Optional[Callable[[int], None]] = None
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self) -> None:
+        """Start Playwright and launch the pooled browsers."""
+        async with self._lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            self._slots = [await self._launch() for _ in range(self.browsers)]
+
+    async def stop(self) -> None:
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            slots, self._slots = self._slots, []
+            for slot in slots:
+                await self._close(slot)
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self) -> _BrowserSlot:
+        with stage_timer("browser_launch"):
+            browser = await self._playwright.chromium.launch(headless=True)
+        self.launches += 1
+        return _BrowserSlot(browser)
+
+    async def _close(self, slot: _BrowserSlot) -> None:
+        try:
+            async with asyncio.timeout(POOL_CLOSE_TIMEOUT):
+                await slot.browser.close()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+    async def _checkout(self) -> _BrowserSlot:
+        """Pick a healthy browser, replacing worn-out or dead ones."""
+        async with self._lock:
+            if not self.started:
+                raise RuntimeError("Browser pool is not started")
+
+            for index, slot in enumerate(self._slots):
+                if slot.healthy and slot.served < self.recycle_after:
+                    continue
+                if not slot.responsive or not slot.browser.is_connected():
+                    self.unhealthy += 1
+                else:
+                    self.recycled += 1
+                slot.retired = True
+                if slot.active == 0:
+                    await self._close(slot)
+                self._slots[index] = await self._launch()
+
+            slot = self._slots[self._next % len(self._slots)]
+            self._next += 1
+            slot.active += 1
+            slot.served += 1
+            self.pages_served += 1
+            return slot
+
+    async def _checkin(self, slot: _BrowserSlot) -> None:
+        async with self._lock:
+            slot.active -= 1
+            if slot.retired and slot.active == 0:
+                await self._close(slot)
+
+    def _count_contexts(self, delta: int) -> None:
+        self.open_contexts += delta
+        BROWSER_CONTEXTS_OPEN.inc(delta)
+        if self.on_contexts_change is not None:
+            self.on_contexts_change(self.open_contexts)
+
+    async def _acquire_permit(self) -> None:
+        """Take a page slot within acquire_timeout.
+
+        The acquire is awaited directly under the timeout (unlike
+        ``wait_for``, which runs it in a separate task), so a timeout racing
+        a wake-up hands the permit back instead of leaking it.
+        """
+        acquired = False
+        try:
+            async with asyncio.timeout(self.acquire_timeout):
+                await self._semaphore.acquire()
+                acquired = True
+        except BaseException:
+            if acquired:
+                self._semaphore.release()
+            raise
+
+    async def _new_context(self, context_options: Dict[str, Any]) -> Tuple[_BrowserSlot, BrowserContext]:
+        """Open a context, retrying once on another browser when one is hung."""
+        for attempt in range(2):
+            slot = await self._checkout()
+            try:
+                async with asyncio.timeout(self.context_timeout):
+                    return slot, await slot.browser.new_context(**context_options)
+            except TimeoutError:
+                slot.responsive = False
+                await self._checkin(slot)
+                print(f"Pooled browser did not open a context within {self.context_timeout}s, replacing it")
+                if attempt:
+                    raise
+            except BaseException:
+                await self._checkin(slot)
+                raise
+
+    @asynccontextmanager
+    async def page(self, **context_options: Any) -> AsyncIterator[Page]:
+        """Yield a page in a fresh browser context from the pool.
+
+        The pool is started on first use when it was not started explicitly
+        (e.g. when the scrapers are run as scripts).
+        """
+        if not self.started:
+            await self.start()
+
+        await self._acquire_permit()
+        try:
+            slot, context = await self._new_context(context_options)
+            try:
+                self._count_contexts(1)
+                try:
+                    yield await context.new_page()
+                finally:
+                    self._count_contexts(-1)
+                    await context.close()
+            finally:
+                await self._checkin(slot)
+        finally:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool usage counters and per-browser health."""
+        return {
+            "started": self.started,
+            "browsers": [
+                {
+                    "connected": slot.browser.is_connected(),
+                    "responsive": slot.responsive,
+                    "active_contexts": slot.active,
+                    "pages_served": slot.served,
+                }
+                for slot in self._slots
+            ],
+            "max_contexts": self.max_contexts,
+            "open_contexts": self.open_contexts,
+            "recycle_after": self.recycle_after,
+            "launches": self.launches,
+            "recycled": self.recycled,
+            "unhealthy": self.unhealthy,
+            "pages_served": self.pages_served,
+        }
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,409 @@
+import asyncio
+import fcntl
+import os
+import secrets
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is only needed for the "redis" backend
+    redis = None
+
+MEMORY_CACHE_SIZE = 512  # Max entries kept in the in-memory tier
+LOCK_GUARD = ".locks"  # File the file backend flocks while checking or changing a lock
+
+# Deletes a lock only while it still holds the caller's token, so a worker
+# whose lock expired cannot release the lock another worker took over
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LRUCache:
+    """In-memory LRU cache with per-entry expiry times.
+
+    Entries are stored with an absolute expiry (epoch seconds). Reads of an
+    expired entry drop it; inserting past ``maxsize`` evicts the least
+    recently used entry.
+    """
+
+    def __init__(self, maxsize: int = MEMORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CacheMeta:
+    """What the cache endpoints need to know about an entry, without its payload."""
+
+    __slots__ = ("expires_at", "size", "company", "domain", "cache_timestamp", "cache_expires_at")
+
+    def __init__(self, data: Dict[str, Any], size: int, expires_at: float):
+        self.expires_at = expires_at
+        self.size = size
+        self.company = data.get("company")
+        self.domain = data.get("domain")
+        self.cache_timestamp = data.get("cache_timestamp")
+        self.cache_expires_at = data.get("cache_expires_at")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size_bytes": self.size,
+            "size_mb": round(self.size / (1024 * 1024), 3),
+            "cache_timestamp": self.cache_timestamp,
+            "cache_expires_at": self.cache_expires_at,
+            "domain": self.domain,
+            "company": self.company,
+        }
+
+
+class CacheIndex:
+    """Metadata of the backend entries, keyed like the cache.
+
+    Updated whenever this worker writes, reads or deletes an entry (and by
+    the janitor for entries other workers wrote), so listing the cache and
+    finding expired keys never reads or parses payloads.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CacheMeta] = {}
+        self.total_size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def set(self, key: str, data: Dict[str, Any], size: int, expires_at: float) -> None:
+        self.delete(key)
+        self._entries[key] = CacheMeta(data, size, expires_at)
+        self.total_size += size
+
+    def delete(self, key: str) -> None:
+        meta = self._entries.pop(key, None)
+        if meta is not None:
+            self.total_size -= meta.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_size = 0
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def items(self) -> List[Tuple[str, CacheMeta]]:
+        return list(self._entries.items())
+
+    def expired(self, before: float) -> List[str]:
+        """Keys whose entries expired at or before ``before``."""
+        return [key for key, meta in self._entries.items() if meta.expires_at <= before]
+
+
+def write_bytes_atomic(path: str, body: bytes) -> None:
+    """Write serialized data to a temp file and rename it over ``path``.
+
+    Readers never observe a partially written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CacheBackend:
+    """Shared tier behind the per-process memory cache.
+
+    Entries are serialized payloads stored under a key with a TTL; locks
+    make sure only one worker scrapes a key at a time. Lock tokens identify
+    the holder, so only the worker that took a lock releases it. Backends
+    with ``supports_pubsub`` also carry messages between workers.
+    """
+
+    name = "base"
+    supports_pubsub = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, body: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def keys(self) -> List[str]:
+        raise NotImplementedError
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Take the lock for ``key`` for ``ttl`` seconds, returning its token or None if held."""
+        raise NotImplementedError
+
+    async def release_lock(self, key: str, token: str) -> None:
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        raise NotImplementedError
+
+    def listen(self, channel: str) -> AsyncIterator[bytes]:
+        """Yield the messages published to ``channel`` by any worker, this one included."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class FileBackend(CacheBackend):
+    """Entries as ``<key>.json`` files in a directory, locks as ``<key>.lock`` files.
+
+    Shared by the workers of one host (or every host mounting the
+    directory). TTLs are not enforced on disk; readers check the entry's
+    own expiry and the janitor removes old files. Lock files are only
+    checked, taken over or removed while holding an flock on LOCK_GUARD, so
+    two workers never both take over an expired lock and a holder whose
+    lock expired never removes its successor's. File I/O runs in worker
+    threads so it never blocks the event loop.
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, key: str, suffix: str = ".json") -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key: str, body: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_bytes_atomic(self.path(key), body)
+
+    def _remove(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _list(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [filename[:-len(".json")] for filename in os.listdir(self.directory) if filename.endswith(".json")]
+
+    @contextmanager
+    def _guard(self) -> Iterator[None]:
+        """Hold the directory's lock guard, so lock checks and changes are atomic.
+
+        flock is released by the kernel if the process dies, so a crash
+        inside the guard never blocks other workers.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_GUARD), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _acquire(self, key: str, ttl: float) -> Optional[str]:
+        path = self.path(key, ".lock")
+        token = secrets.token_hex(16)
+        with self._guard():
+            try:
+                # A lock older than its TTL was left by a crashed worker and is taken over
+                if os.stat(path).st_mtime + ttl > time.time():
+                    return None
+            except FileNotFoundError:
+                pass
+            write_bytes_atomic(path, token.encode())
+        return token
+
+    def _release(self, key: str, token: str) -> None:
+        path = self.path(key, ".lock")
+        with self._guard():
+            try:
+                with open(path, "r") as f:
+                    if f.read() != token:
+                        return
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, body: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._write, key, body)
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._remove, key)
+
+    async def keys(self) -> List[str]:
+        return await asyncio.to_thread(self._list)
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        return await asyncio.to_thread(self._acquire, key, ttl)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await asyncio.to_thread(self._release, key, token)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "directory": self.directory}
+
+
+class RedisBackend(CacheBackend):
+    """Entries and locks in a Redis-protocol server (Redis, Valkey, KeyDB).
+
+    Every worker and node pointed at the same server shares entries, their
+    TTLs (the server expires them) and the scrape locks (``SET NX PX``,
+    released with a compare-and-delete script). Messages go through the
+    server's pub/sub channels.
+    """
+
+    name = "redis"
+    supports_pubsub = True
+
+    def __init__(self, url: str, prefix: str = "downdetector:"):
+        if redis is None:
+            raise RuntimeError("The redis cache backend requires the 'redis' package")
+        self.url = url
+        self.prefix = prefix
+        # Reported by stats() without credentials
+        parts = urlsplit(url)
+        self.address = f"{parts.scheme}://{parts.hostname}:{parts.port or 6379}{parts.path}"
+        # RESP2 works with every Redis-protocol server, RESP3 needs Redis 6+
+        self.client = redis.from_url(url, protocol=2)
+
+    def entry_key(self, key: str) -> str:
+        return f"{self.prefix}cache:{key}"
+
+    def lock_key(self, key: str) -> str:
+        return f"{self.prefix}lock:{key}"
+
+    def channel_key(self, channel: str) -> str:
+        return f"{self.prefix}channel:{channel}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.entry_key(key))
+
+    async def set(self, key: str, body: bytes, ttl: float) -> None:
+        await self.client.set(self.entry_key(key), body, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> bool:
+        return bool(await self.client.delete(self.entry_key(key)))
+
+    async def keys(self) -> List[str]:
+        start = len(self.entry_key(""))
+        return [
+            name.decode()[start:]
+            async for name in self.client.scan_iter(match=self.entry_key("*"), count=500)
+        ]
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = secrets.token_hex(16)
+        acquired = await self.client.set(self.lock_key(key), token, nx=True, px=max(1, int(ttl * 1000)))
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.client.eval(RELEASE_LOCK_SCRIPT, 1, self.lock_key(key), token)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.client.publish(self.channel_key(channel), message)
+
+    async def listen(self, channel: str) -> AsyncIterator[bytes]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel_key(channel))
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "address": self.address, "prefix": self.prefix}
+
+
+def create_backend(name: str, directory: str, redis_url: str) -> CacheBackend:
+    """Build the cache backend selected by ``name`` ("file" or "redis")."""
+    if name == "file":
+        return FileBackend(directory)
+    if name == "redis":
+        return RedisBackend(redis_url)
+    raise ValueError(f"Unknown cache backend: {name}")
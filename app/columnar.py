@@ -0,0 +1,65 @@
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence
+
+from .downdetector_index import SVG_STAT_KEYS, company_slug, parse_sparkline_values, to_number
+
+# Per-company columns sent as plain arrays, after the "slug" column
+COLUMNS = ("company_name", "full_company_link", "logo_url")
+
+# Columns with few distinct values: a shared dictionary plus one index per company
+DICTIONARY_COLUMNS = ("last_status", "sparkline_color_hex")
+
+
+def delta_encode(values: Sequence[int]) -> List[int]:
+    """First value, then the difference to the previous one."""
+    previous = 0
+    deltas = []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def delta_decode(deltas: Sequence[int]) -> List[int]:
+    return list(accumulate(deltas))
+
+
+def dictionary_encode(values: Sequence[Optional[str]]) -> Dict[str, List[Any]]:
+    dictionary: Dict[Optional[str], int] = {}
+    codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    return {"values": list(dictionary), "codes": codes}
+
+
+def columnar_companylist(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-shape a company list entry into columns and one sparkline matrix.
+
+    Metadata fields are kept as they are. ``sparklines.values`` has one row
+    per company, delta-encoded when every value is an integer (small deltas
+    pack into one byte each in MessagePack); ``sparklines.points`` is the
+    shared row length, or null when rows differ. ``sparkline_color`` is
+    left out, ``sparkline_color_hex`` carries the same color.
+    """
+    companies = data.get("companies") or []
+    svgs = [company.get("svg_data") or {} for company in companies]
+    rows = [parse_sparkline_values(svg.get("data_values")) for svg in svgs]
+
+    columns: Dict[str, Any] = {
+        "slug": [company_slug(company.get("full_company_link")) for company in companies],
+        **{name: [company.get(name) for company in companies] for name in COLUMNS},
+        **{key: [to_number(svg.get(key)) for svg in svgs] for key in SVG_STAT_KEYS},
+        **{name: dictionary_encode([svg.get(name) for svg in svgs]) for name in DICTIONARY_COLUMNS},
+    }
+
+    integral = all(isinstance(value, int) for row in rows for value in row)
+    lengths = {len(row) for row in rows}
+    return {
+        **{key: value for key, value in data.items() if key != "companies"},
+        "format": "columnar",
+        "count": len(companies),
+        "columns": columns,
+        "sparklines": {
+            "encoding": "delta" if integral else "none",
+            "points": lengths.pop() if len(lengths) == 1 else None,
+            "values": [delta_encode(row) for row in rows] if integral else rows,
+        },
+    }
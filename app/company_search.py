@@ -0,0 +1,117 @@
+import bisect
+import difflib
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .downdetector_index import company_slug
+
+FUZZY_CUTOFF = 0.75  # Minimum difflib ratio for a fuzzy match
+
+# Match ranks, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase and strip accents so "Itaú" and "itau" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+class CompanyIndex:
+    """Searchable in-memory index over one domain's company list.
+
+    Companies are indexed by slug, by normalized name (sorted, for prefix
+    lookups with bisect), by the words of their names and by
+    ``last_status``. Built once per company list scrape.
+    """
+
+    def __init__(self, companies: Iterable[Dict[str, Any]]):
+        self.companies: List[Dict[str, Any]] = list(companies)
+        self.names = [normalize_name(company.get("company_name")) for company in self.companies]
+
+        self.by_slug: Dict[str, int] = {}
+        self.by_status: Dict[Optional[str], List[int]] = {}
+        for position, company in enumerate(self.companies):
+            slug = company_slug(company.get("full_company_link"))
+            if slug:
+                self.by_slug[slug] = position
+            status = (company.get("svg_data") or {}).get("last_status")
+            self.by_status.setdefault(status, []).append(position)
+
+        self._sorted_names: List[Tuple[str, int]] = sorted(
+            (name, position) for position, name in enumerate(self.names)
+        )
+        self._sorted_words: List[Tuple[str, int]] = sorted(
+            (word, position)
+            for position, name in enumerate(self.names)
+            for word in name.split()[1:]
+        )
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def get(self, slug: str) -> Optional[Dict[str, Any]]:
+        position = self.by_slug.get(slug)
+        return None if position is None else self.companies[position]
+
+    @staticmethod
+    def _prefixed(entries: Sequence[Tuple[str, int]], prefix: str) -> List[int]:
+        start = bisect.bisect_left(entries, (prefix,))
+        matches = []
+        for name, position in entries[start:]:
+            if not name.startswith(prefix):
+                break
+            matches.append(position)
+        return matches
+
+    def _ranked(self, query: str, candidates: Optional[set]) -> List[Tuple[int, str, int]]:
+        ranks: Dict[int, int] = {}
+
+        def add(positions: Iterable[int], rank: int) -> None:
+            for position in positions:
+                if (candidates is None or position in candidates) and position not in ranks:
+                    ranks[position] = rank
+
+        add((position for name, position in self._sorted_names if name == query), EXACT)
+        add(self._prefixed(self._sorted_names, query), PREFIX)
+        add(self._prefixed(self._sorted_words, query), WORD_PREFIX)
+        add((position for position, name in enumerate(self.names) if query in name), SUBSTRING)
+
+        # Fuzzy matching catches typos, compared against whole names and words
+        matcher = difflib.SequenceMatcher(b=query)
+        for position, name in enumerate(self.names):
+            if position in ranks or (candidates is not None and position not in candidates):
+                continue
+            for text in (name, *name.split()):
+                matcher.set_seq1(text)
+                if matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.ratio() >= FUZZY_CUTOFF:
+                    ranks[position] = FUZZY
+                    break
+
+        return sorted((rank, self.names[position], position) for position, rank in ranks.items())
+
+    def search(self, query: Optional[str] = None, statuses: Optional[Sequence[str]] = None,
+               limit: int = 50, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return ``(total, page)`` of companies matching ``query`` and ``statuses``.
+
+        Matches are ranked exact name, name prefix, word prefix, substring,
+        then fuzzy; ties sort by name. Without a query every company with a
+        matching status is returned, sorted by name.
+        """
+        candidates = None
+        if statuses:
+            candidates = {position for status in statuses for position in self.by_status.get(status, [])}
+
+        query = normalize_name(query)
+        if query:
+            positions = [position for _, _, position in self._ranked(query, candidates)]
+        else:
+            positions = [
+                position for _, position in self._sorted_names
+                if candidates is None or position in candidates
+            ]
+
+        return len(positions), [self.companies[position] for position in positions[offset:offset + limit]]
+
+    def status_counts(self) -> Dict[Optional[str], int]:
+        return {status: len(positions) for status, positions in self.by_status.items()}
@@ -1,205 +1,356 @@
-from playwright.async_api import async_playwright
 import asyncio
 import re
 
+from .browser_pool import browser_pool
+from .metrics import stage_timer
+from .navigation import navigate
+
+# "bulk" reads every card in a single page.evaluate call, "per_card" walks
+# the cards with one Playwright round trip per attribute
+INDEX_EXTRACTION_MODE = "bulk"
+
+# Site root for a domain; benchmarks point it at a local replay server
+DOWNDETECTOR_URL = "https://downdetector.{domain}"
+
+# Collects the raw attributes of every company card in one round trip.
+# Color resolution happens in Python (resolve_sparkline_color), so the
+# script only reports what each path carries.
+EXTRACT_CARDS_JS = """
+() => {
+    const describePath = (path) => ({
+        stroke: path.getAttribute('stroke'),
+        style: path.getAttribute('style'),
+        computed: getComputedStyle(path).stroke,
+    });
+    return Array.from(document.querySelectorAll('div.company-index a[href]')).map((card) => {
+        const img = card.querySelector('img');
+        const svg = card.querySelector('svg');
+        let svgData = null;
+        if (svg) {
+            const sparkline = svg.querySelector('path.sparkline');
+            svgData = {
+                data_values: svg.getAttribute('data-values'),
+                data_min: svg.getAttribute('data-min'),
+                data_max: svg.getAttribute('data-max'),
+                data_mean: svg.getAttribute('data-mean'),
+                data_stddev: svg.getAttribute('data-stddev'),
+                class: svg.getAttribute('class'),
+                sparkline: sparkline ? describePath(sparkline) : null,
+                paths: Array.from(svg.querySelectorAll('path')).map(describePath),
+            };
+        }
+        return {
+            href: card.getAttribute('href'),
+            title: card.getAttribute('title'),
+            logo: img ? (img.getAttribute('data-original') || img.getAttribute('src')) : null,
+            svg: svgData,
+        };
+    });
+}
+"""
+
 def rgb_to_hex(r, g, b):
     return '#{:02x}{:02x}{:02x}'.format(r, g, b)
 
-async def scrape_downdetector_links(domain: str = "com.br"):
-    url = f"https://downdetector.{domain}"
+def company_slug(link):
+    """Return the company slug used by /status from a company page link."""
+    if not link:
+        return None
+    return link.rstrip('/').split('/')[-1] or None
+
+def color_to_hex(color):
+    """Convert a CSS hex, rgb() or rgba() color to hex, None if unknown."""
+    if not color:
+        return None
+    # Check if it's already a hex color
+    if color.startswith('#'):
+        return color
+    # Check if it's an RGB color
+    if color.startswith('rgb('):
+        rgb_match = re.search(r'rgb\((\d+),\s*(\d+),\s*(\d+)\)', color)
+    # Check if it's an RGBA color
+    elif color.startswith('rgba('):
+        rgb_match = re.search(r'rgba\((\d+),\s*(\d+),\s*(\d+),\s*[\d.]+\)', color)
+    else:
+        return None
+    if rgb_match:
+        r, g, b = map(int, rgb_match.groups())
+        return rgb_to_hex(r, g, b)
+    return None
+
+SVG_STAT_KEYS = ('data_min', 'data_max', 'data_mean', 'data_stddev')
+
+def parse_sparkline_values(data_values):
+    """Parse a data-values attribute like "[7, 14, 2]" into numbers (ints where whole).
+
+    Lists are returned unchanged, so entries cached before the values were
+    parsed at scrape time read the same way.
+    """
+    if isinstance(data_values, list):
+        return data_values
+    if not data_values:
+        return []
+    # Remove brackets and quotes, keep the comma separated numbers
+    cleaned_data = data_values.replace('[', '').replace(']', '').replace('"', '').replace("'", '')
+    values = []
+    for x in cleaned_data.split(','):
+        x = x.strip()
+        if x and x.replace('.', '').replace('-', '').isdigit():
+            number = float(x)
+            values.append(int(number) if number.is_integer() else number)
+    return values
+
+def to_number(value):
+    """Parse a numeric attribute, None if missing or invalid."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def parse_svg_stats(svg_data):
+    """Parse data_values and the stats into numbers, calculating missing stats.
+
+    Done once at scrape time, so the cached company list stores numeric
+    arrays and responses never re-parse attribute strings.
+    """
+    try:
+        values = parse_sparkline_values(svg_data['data_values'])
+    except (ValueError, AttributeError) as e:
+        print(f"Error parsing sparkline values: {e}")
+        values = []
+    svg_data['data_values'] = values
+    for key in SVG_STAT_KEYS:
+        svg_data[key] = to_number(svg_data[key])
+    if not values:
+        return
+
+    mean_val = sum(values) / len(values)
+    if svg_data['data_min'] is None:
+        svg_data['data_min'] = float(min(values))
+    if svg_data['data_max'] is None:
+        svg_data['data_max'] = float(max(values))
+    if svg_data['data_mean'] is None:
+        svg_data['data_mean'] = mean_val
+    if svg_data['data_stddev'] is None:
+        variance = sum((x - mean_val) ** 2 for x in values) / len(values)
+        svg_data['data_stddev'] = variance ** 0.5
+
+def resolve_sparkline_color(sparkline, paths):
+    """Pick the sparkline color from path descriptions built by EXTRACT_CARDS_JS."""
+    if sparkline:
+        # Try stroke attribute first, then computed style, then style attribute
+        stroke = sparkline['stroke']
+        if stroke and stroke != 'none':
+            return stroke
+        computed_color = sparkline['computed']
+        if computed_color and computed_color != 'none':
+            return computed_color
+        style = sparkline['style']
+        if style and 'stroke:' in style:
+            stroke_match = re.search(r'stroke:\s*([^;]+)', style)
+            if stroke_match:
+                return stroke_match.group(1).strip()
+
+    # Fallback: try other path elements
+    for path in paths:
+        stroke = path['stroke']
+        if stroke and stroke != 'none':
+            return stroke
+        computed_color = path['computed']
+        if computed_color and computed_color != 'none' and computed_color != 'rgb(0, 0, 0)':
+            return computed_color
+    return None
+
+def normalize_links(link, title, logo_url, domain):
+    """Build the absolute company link, display name and logo URL for a card."""
+    full_link = f"https://downdetector.{domain}{link}" if link and link.startswith('/') else link
+
+    # Extract company name from href or title
+    company_name = link.split('/')[2] if link and len(link.split('/')) > 2 else 'unknown'
+    if title:
+        company_name = title
+
+    # Clean up logo URL if needed
+    if logo_url and logo_url.startswith('//'):
+        logo_url = f'https:{logo_url}'
+    elif logo_url and not logo_url.startswith('http'):
+        logo_url = f'https://downdetector.{domain}{logo_url}'
+
+    return full_link, company_name, logo_url
+
+def build_company_entry(raw, domain):
+    """Turn one card object from EXTRACT_CARDS_JS into a company entry."""
+    full_link, company_name, logo_url = normalize_links(raw['href'], raw['title'], raw['logo'], domain)
+
+    svg_data = {}
+    raw_svg = raw['svg']
+    if raw_svg:
+        svg_data = {key: raw_svg[key] for key in ('data_values', *SVG_STAT_KEYS)}
+        parse_svg_stats(svg_data)
+
+        # Extract last status from SVG class (first string split by space)
+        svg_class = raw_svg['class']
+        svg_data['last_status'] = svg_class.split()[0] if svg_class and svg_class.split() else None
+
+        sparkline_color = resolve_sparkline_color(raw_svg['sparkline'], raw_svg['paths'])
+        svg_data['sparkline_color'] = sparkline_color
+        svg_data['sparkline_color_hex'] = color_to_hex(sparkline_color)
+
+    return {
+        "full_company_link": full_link,
+        "company_name": company_name,
+        "logo_url": logo_url,
+        "svg_data": svg_data
+    }
+
+async def extract_cards_bulk(page, domain):
+    """Extract every company card with a single page.evaluate round trip."""
+    links = []
+    for raw in await page.evaluate(EXTRACT_CARDS_JS):
+        try:
+            links.append(build_company_entry(raw, domain))
+        except Exception as e:
+            print(f"Error processing card: {e}")
+    return links
+
+async def extract_cards_per_card(page, domain):
+    """Extract company cards with one Playwright round trip per attribute."""
     links = []
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            slow_mo=100,
-        )
-        
-        context = await browser.new_context(
-            viewport={'width': 1280, 'height': 1024},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        )
-        
-        page = await context.new_page()
-        
+
+    # Updated selector based on the HTML sample
+    cards = await page.query_selector_all('div.company-index a[href]')
+
+    for card in cards:
         try:
-            await page.goto(url, timeout=60000)
-            await page.wait_for_selector('div.company-index', timeout=10000)
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await asyncio.sleep(2)
-            
-            # Updated selector based on the HTML sample
-            cards = await page.query_selector_all('div.company-index a[href]')
-            
-            for card in cards:
-                try:
-                    link = await card.get_attribute('href')
-                    full_link = f"https://downdetector.{domain}{link}" if link and link.startswith('/') else link
-
-                    # Extract company name from href or title
-                    company_name = link.split('/')[2] if link and len(link.split('/')) > 2 else 'unknown'
-                    title = await card.get_attribute('title')
-                    if title:
-                        company_name = title
-
-                    # Get the logo - looking at data-original first, then src
-                    img = await card.query_selector('img')
-                    logo_url = None
-                    if img:
-                        logo_url = await img.get_attribute('data-original')
-                        if not logo_url:
-                            logo_url = await img.get_attribute('src')
-                        # Clean up logo URL if needed
-                        if logo_url and logo_url.startswith('//'):
-                            logo_url = f'https:{logo_url}'
-                        elif logo_url and not logo_url.startswith('http'):
-                            logo_url = f'https://downdetector.{domain}{logo_url}'
-
-
-
-                    # Get SVG data attributes
-                    svg_data = {}
-                    svg_element = await card.query_selector('svg')
-                    if svg_element:
-                        # Extract all SVG data attributes
-                        svg_data['data_values'] = await svg_element.get_attribute('data-values')
-                        svg_data['data_min'] = await svg_element.get_attribute('data-min')
-                        svg_data['data_max'] = await svg_element.get_attribute('data-max')
-                        svg_data['data_mean'] = await svg_element.get_attribute('data-mean')
-                        svg_data['data_stddev'] = await svg_element.get_attribute('data-stddev')
-
-                        # If min/max/mean/stddev are null, try to calculate from data-values
-                        if svg_data['data_values'] and (not svg_data['data_min'] or not svg_data['data_max'] or not svg_data['data_mean']):
-                            try:
-                                # Clean and parse the data-values string into numbers
-                                # Remove brackets, quotes, and other non-numeric characters except commas and numbers
-                                cleaned_data = svg_data['data_values'].replace('[', '').replace(']', '').replace('"', '').replace("'", '')
-                                values = []
-                                for x in cleaned_data.split(','):
-                                    x = x.strip()
-                                    if x and x.replace('.', '').replace('-', '').isdigit():
-                                        values.append(float(x))
-                                if values:
-                                    if not svg_data['data_min']:
-                                        svg_data['data_min'] = str(min(values))
-                                    if not svg_data['data_max']:
-                                        svg_data['data_max'] = str(max(values))
-                                    if not svg_data['data_mean']:
-                                        svg_data['data_mean'] = str(sum(values) / len(values))
-                                    if not svg_data['data_stddev']:
-                                        # Calculate standard deviation
-                                        mean_val = sum(values) / len(values)
-                                        variance = sum((x - mean_val) ** 2 for x in values) / len(values)
-                                        svg_data['data_stddev'] = str(variance ** 0.5)
-                            except (ValueError, AttributeError) as e:
-                                print(f"Error calculating SVG stats: {e}")
-
-                        # Extract last status from SVG class (first string split by space)
-                        svg_class = await svg_element.get_attribute('class')
-                        if svg_class:
-                            svg_data['last_status'] = svg_class.split()[0] if svg_class.split() else None
-                        else:
-                            svg_data['last_status'] = None
-
-                        # Extract color from sparkline - try multiple approaches
-                        sparkline_color = None
-
-                        # Try to find path element with sparkline class
-                        sparkline_path = await svg_element.query_selector('path.sparkline')
-                        if sparkline_path:
-                            # Try stroke attribute first
-                            stroke = await sparkline_path.get_attribute('stroke')
-                            if stroke and stroke != 'none':
-                                sparkline_color = stroke
-                            else:
-                                # Try to get computed style
-                                try:
-                                    computed_color = await sparkline_path.evaluate('(element) => getComputedStyle(element).stroke')
-                                    if computed_color and computed_color != 'none':
-                                        sparkline_color = computed_color
-                                except:
-                                    pass
-
-                                # Try style attribute
-                                if not sparkline_color:
-                                    style = await sparkline_path.get_attribute('style')
-                                    if style and 'stroke:' in style:
-                                        stroke_match = re.search(r'stroke:\s*([^;]+)', style)
-                                        if stroke_match:
-                                            sparkline_color = stroke_match.group(1).strip()
-
-                        # Fallback: try other path elements
+            link = await card.get_attribute('href')
+            title = await card.get_attribute('title')
+
+            # Get the logo - looking at data-original first, then src
+            img = await card.query_selector('img')
+            logo_url = None
+            if img:
+                logo_url = await img.get_attribute('data-original')
+                if not logo_url:
+                    logo_url = await img.get_attribute('src')
+
+            full_link, company_name, logo_url = normalize_links(link, title, logo_url, domain)
+
+            # Get SVG data attributes
+            svg_data = {}
+            svg_element = await card.query_selector('svg')
+            if svg_element:
+                # Extract all SVG data attributes
+                svg_data['data_values'] = await svg_element.get_attribute('data-values')
+                svg_data['data_min'] = await svg_element.get_attribute('data-min')
+                svg_data['data_max'] = await svg_element.get_attribute('data-max')
+                svg_data['data_mean'] = await svg_element.get_attribute('data-mean')
+                svg_data['data_stddev'] = await svg_element.get_attribute('data-stddev')
+
+                # Parse data-values and the stats, calculating any that are null
+                parse_svg_stats(svg_data)
+
+                # Extract last status from SVG class (first string split by space)
+                svg_class = await svg_element.get_attribute('class')
+                if svg_class:
+                    svg_data['last_status'] = svg_class.split()[0] if svg_class.split() else None
+                else:
+                    svg_data['last_status'] = None
+
+                # Extract color from sparkline - try multiple approaches
+                sparkline_color = None
+
+                # Try to find path element with sparkline class
+                sparkline_path = await svg_element.query_selector('path.sparkline')
+                if sparkline_path:
+                    # Try stroke attribute first
+                    stroke = await sparkline_path.get_attribute('stroke')
+                    if stroke and stroke != 'none':
+                        sparkline_color = stroke
+                    else:
+                        # Try to get computed style
+                        try:
+                            computed_color = await sparkline_path.evaluate('(element) => getComputedStyle(element).stroke')
+                            if computed_color and computed_color != 'none':
+                                sparkline_color = computed_color
+                        except:
+                            pass
+
+                        # Try style attribute
                         if not sparkline_color:
-                            path_elements = await svg_element.query_selector_all('path')
-                            for path in path_elements:
-                                stroke = await path.get_attribute('stroke')
-                                if stroke and stroke != 'none':
-                                    sparkline_color = stroke
-                                    break
-
-                                # Try computed style for each path
-                                try:
-                                    computed_color = await path.evaluate('(element) => getComputedStyle(element).stroke')
-                                    if computed_color and computed_color != 'none' and computed_color != 'rgb(0, 0, 0)':
-                                        sparkline_color = computed_color
-                                        break
-                                except:
-                                    continue
-
-                        svg_data['sparkline_color'] = sparkline_color
-
-                        # Convert RGB color to HEX if needed
-                        sparkline_color_hex = None
-                        if sparkline_color:
-                            # Check if it's already a hex color
-                            if sparkline_color.startswith('#'):
-                                sparkline_color_hex = sparkline_color
-                            # Check if it's an RGB color
-                            elif sparkline_color.startswith('rgb('):
-                                try:
-                                    # Extract RGB values from rgb(r, g, b) format
-                                    rgb_match = re.search(r'rgb\((\d+),\s*(\d+),\s*(\d+)\)', sparkline_color)
-                                    if rgb_match:
-                                        r, g, b = map(int, rgb_match.groups())
-                                        sparkline_color_hex = rgb_to_hex(r, g, b)
-                                except:
-                                    pass
-                            # Check if it's an RGBA color
-                            elif sparkline_color.startswith('rgba('):
-                                try:
-                                    # Extract RGB values from rgba(r, g, b, a) format
-                                    rgba_match = re.search(r'rgba\((\d+),\s*(\d+),\s*(\d+),\s*[\d.]+\)', sparkline_color)
-                                    if rgba_match:
-                                        r, g, b = map(int, rgba_match.groups())
-                                        sparkline_color_hex = rgb_to_hex(r, g, b)
-                                except:
-                                    pass
-
-                        svg_data['sparkline_color_hex'] = sparkline_color_hex
-
-                    links.append({
-                        "full_company_link": full_link,
-                        "company_name": company_name,
-                        "logo_url": logo_url,
-                        "svg_data": svg_data
-                    })
-                except Exception as e:
-                    print(f"Error processing card: {e}")
-                    continue
-            
+                            style = await sparkline_path.get_attribute('style')
+                            if style and 'stroke:' in style:
+                                stroke_match = re.search(r'stroke:\s*([^;]+)', style)
+                                if stroke_match:
+                                    sparkline_color = stroke_match.group(1).strip()
+
+                # Fallback: try other path elements
+                if not sparkline_color:
+                    path_elements = await svg_element.query_selector_all('path')
+                    for path in path_elements:
+                        stroke = await path.get_attribute('stroke')
+                        if stroke and stroke != 'none':
+                            sparkline_color = stroke
+                            break
+
+                        # Try computed style for each path
+                        try:
+                            computed_color = await path.evaluate('(element) => getComputedStyle(element).stroke')
+                            if computed_color and computed_color != 'none' and computed_color != 'rgb(0, 0, 0)':
+                                sparkline_color = computed_color
+                                break
+                        except:
+                            continue
+
+                svg_data['sparkline_color'] = sparkline_color
+
+                # Convert RGB color to HEX if needed
+                svg_data['sparkline_color_hex'] = color_to_hex(sparkline_color)
+
+            links.append({
+                "full_company_link": full_link,
+                "company_name": company_name,
+                "logo_url": logo_url,
+                "svg_data": svg_data
+            })
+        except Exception as e:
+            print(f"Error processing card: {e}")
+            continue
+
+    return links
+
+async def scrape_downdetector_links(domain: str = "com.br"):
+    url = DOWNDETECTOR_URL.format(domain=domain)
+    links = []
+
+    async with browser_pool.page(
+        viewport={'width': 1280, 'height': 1024},
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    ) as page:
+        try:
+            with stage_timer("navigation"):
+                await navigate(page, url, timeout=60000, ready_selector='div.company-index a[href]')
+
+            with stage_timer("extract"):
+                if INDEX_EXTRACTION_MODE == "bulk":
+                    links = await extract_cards_bulk(page, domain)
+                else:
+                    links = await extract_cards_per_card(page, domain)
+
         except Exception as e:
             print(f"Error during scraping: {e}")
-        finally:
-            await context.close()
-            await browser.close()
-    
+
     return links
 
 async def main():
-    service_links = await scrape_downdetector_links()
+    try:
+        service_links = await scrape_downdetector_links()
+    finally:
+        await browser_pool.stop()
     print(f"Found {len(service_links)} links:")
     for link in service_links:
         print(link)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
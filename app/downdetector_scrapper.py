@@ -1,26 +1,210 @@
 import re
+import html as html_lib
+import time
 import asyncio
-from typing import Dict, List, Optional
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-from datetime import datetime
-from dateutil import parser
-import pytz
+from playwright.async_api import Error as PlaywrightError
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .archive import page_archive
+from .browser_pool import browser_pool
+from .metrics import stage_timer
+from .navigation import navigate
+from .stats import TimeSeries, compute_statistics
+
+# "http" fetches the raw HTML only, "browser" renders it in Chromium and
+# "auto" tries HTTP first and falls back to the browser when the page has
+# no chart data (e.g. a bot challenge)
+FETCH_MODE = "auto"
+HTTP_TIMEOUT = 15  # seconds
+
+# Site root for a domain; benchmarks point it at a local replay server
+DOWNDETECTOR_URL = "https://downdetector.{domain}"
+
+# Domains with a Downdetector site at DOWNDETECTOR_URL; the API answers 422
+# for any other, so user input cannot create metric series or limiters
+DOWNDETECTOR_DOMAINS = frozenset({
+    "com", "ca", "co.uk", "ie", "com.au", "co.nz", "in", "jp", "sg", "hk", "co.za",
+    "com.br", "mx", "com.ar", "cl", "com.co", "pe",
+    "fr", "es", "it", "pt", "se", "no", "dk", "fi", "pl", "ru", "web.tr", "ae",
+})
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
+)
+
+CHALLENGE_MARKERS = ("challenge-platform", "cf-chl", "Just a moment...", "captcha")
+
+# Responses that mean we are being rate limited; the browser would get the same
+THROTTLED_STATUS_CODES = (429,)
+# Responses for a company without a status page; the browser would get the same
+NOT_FOUND_STATUS_CODES = (404, 410)
+
+# Single-pass tokenizer for status pages: chart points, the "]" closing a
+# chart series and the problem indicator labels
+STATUS_TOKEN_RE = re.compile(
+    r"\{\s*x:\s*'(?P<x>[^']*)',\s*y:\s*(?P<y>[-+0-9.eE]+)\s*\}"
+    r"|(?P<end>\])"
+    r'|class="[^"]*\bindicatorChart_(?P<kind>percentage|name)\b[^"]*"[^>]*>(?P<text>.*?)</(?=div)',
+    re.S,
+)
+TAG_RE = re.compile(r"<[^>]*>")
+
+ChartSeries = Tuple[List[str], array]
+
+
+class UpstreamThrottledError(Exception):
+    """Downdetector rate limited the request or answered with a bot challenge."""
+
+
+class UpstreamUnavailableError(Exception):
+    """Downdetector could not be reached, timed out or answered with a server error."""
+
+
+class CompanyNotFoundError(Exception):
+    """Downdetector has no status page for the company (e.g. a misspelled slug)."""
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_fetch_stats: Dict[str, Dict[str, float]] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive HTTP/2 client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=HTTP_TIMEOUT,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+            },
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def record_fetch(mode: str, success: bool, seconds: float) -> None:
+    stats = _fetch_stats.setdefault(mode, {"attempts": 0, "successes": 0, "total_seconds": 0.0})
+    stats["attempts"] += 1
+    stats["successes"] += int(success)
+    stats["total_seconds"] += seconds
+
+
+def fetch_stats() -> Dict[str, Dict[str, Any]]:
+    """Return per-mode attempt counts, success rate and mean latency."""
+    return {
+        mode: {
+            "attempts": stats["attempts"],
+            "successes": stats["successes"],
+            "success_rate": round(stats["successes"] / stats["attempts"], 3),
+            "average_seconds": round(stats["total_seconds"] / stats["attempts"], 3),
+        }
+        for mode, stats in _fetch_stats.items()
+    }
+
+
+def is_challenge_page(html: str) -> bool:
+    return any(marker in html for marker in CHALLENGE_MARKERS)
+
+
+def is_usable_status_page(html: str) -> bool:
+    """Check that a status page carries chart data and is not a challenge."""
+    return "{ x:" in html and not is_challenge_page(html)
+
+
+def raise_if_challenge(html: str, company: str, domain: str) -> None:
+    """Raise UpstreamThrottledError for a challenge page without chart data."""
+    if "{ x:" not in html and is_challenge_page(html):
+        raise UpstreamThrottledError(f"{domain} answered a bot challenge for {company}")
 
 
 async def call_downdetector(company: str, domain: str = "com.br") -> str:
-    url = f"https://downdetector.{domain}/status/{company}/"
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
-        ))
-        page = await context.new_page()
-        await page.goto(url, timeout=30000)
-        content = await page.content()
-        await browser.close()
-        return content
+    url = f"{DOWNDETECTOR_URL.format(domain=domain)}/status/{company}/"
+    async with browser_pool.page(user_agent=USER_AGENT) as page:
+        with stage_timer("navigation"):
+            # Chart data is in an inline script, complete at DOMContentLoaded
+            try:
+                response = await navigate(page, url, timeout=30000)
+            except PlaywrightError as e:
+                raise UpstreamUnavailableError(f"Loading the status page of {company} failed: {e}") from e
+        if response is not None:
+            if response.status in THROTTLED_STATUS_CODES:
+                raise UpstreamThrottledError(f"{domain} answered {response.status} for {company}")
+            if response.status in NOT_FOUND_STATUS_CODES:
+                raise CompanyNotFoundError(f"{domain} has no status page for {company}")
+            if response.status >= 500:
+                raise UpstreamUnavailableError(f"{domain} answered {response.status} for {company}")
+        with stage_timer("page_content"):
+            return await page.content()
+
+
+async def call_downdetector_http(company: str, domain: str = "com.br") -> str:
+    url = f"{DOWNDETECTOR_URL.format(domain=domain)}/status/{company}/"
+    with stage_timer("http_fetch"):
+        response = await get_http_client().get(url)
+    response.raise_for_status()
+    return response.text
+
+
+async def fetch_status_page(company: str, domain: str = "com.br") -> str:
+    """Fetch a status page using FETCH_MODE, recording per-mode outcomes.
+
+    Raises UpstreamThrottledError on a rate limit response and
+    CompanyNotFoundError on a 404/410, both without the browser fallback,
+    and UpstreamThrottledError when the final page is a challenge without
+    chart data. A page that cannot be fetched at all (transport errors,
+    timeouts, server errors) raises UpstreamUnavailableError.
+    """
+    if FETCH_MODE in ("http", "auto"):
+        start_time = time.perf_counter()
+        try:
+            html = await call_downdetector_http(company, domain)
+        except httpx.HTTPError as e:
+            record_fetch("http", False, time.perf_counter() - start_time)
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in THROTTLED_STATUS_CODES:
+                raise UpstreamThrottledError(f"{domain} answered {e.response.status_code} for {company}")
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in NOT_FOUND_STATUS_CODES:
+                raise CompanyNotFoundError(f"{domain} has no status page for {company}")
+            if FETCH_MODE == "http":
+                raise UpstreamUnavailableError(f"Fetching the status page of {company} failed: {e}") from e
+            print(f"HTTP fetch failed for {company}, falling back to browser: {e}")
+        else:
+            usable = is_usable_status_page(html)
+            record_fetch("http", usable, time.perf_counter() - start_time)
+            if usable:
+                return html
+            if FETCH_MODE == "http":
+                raise_if_challenge(html, company, domain)
+                return html
+            print(f"HTTP fetch for {company} has no chart data, falling back to browser")
+
+    start_time = time.perf_counter()
+    try:
+        html = await call_downdetector(company, domain)
+    except Exception:
+        record_fetch("browser", False, time.perf_counter() - start_time)
+        raise
+    record_fetch("browser", is_usable_status_page(html), time.perf_counter() - start_time)
+    raise_if_challenge(html, company, domain)
+    return html
 
 
 def get_script_content(html: str) -> str:
@@ -48,25 +232,139 @@ def str2obj(chart_lines: List[str]) -> List[Dict[str, object]]:
     return result
 
 
+@lru_cache(maxsize=64)
+def resolve_timezone(tz: str) -> Optional[ZoneInfo]:
+    """Return the zoneinfo zone for a TZ database name, None if unknown."""
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        print(f"Timezone conversion error: {e}")
+        return None
+
+
+def _offset_at(zone: ZoneInfo, timestamp: int) -> int:
+    instant = datetime.fromtimestamp(timestamp, dt_timezone.utc)
+    return int(instant.astimezone(zone).utcoffset().total_seconds())
+
+
+@lru_cache(maxsize=4096)
+def _hour_offset(zone: ZoneInfo, hour: int) -> Optional[int]:
+    """UTC offset of ``zone`` throughout a UTC hour, None if it changes within it.
+
+    Most transitions fall on whole UTC hours, but some zones change on the
+    half hour (America/St_Johns, Australia/Lord_Howe).
+    """
+    start = _offset_at(zone, hour * 3600)
+    return start if _offset_at(zone, hour * 3600 + 3599) == start else None
+
+
+def utc_offset(zone: ZoneInfo, timestamp: int) -> int:
+    offset = _hour_offset(zone, timestamp // 3600)
+    return offset if offset is not None else _offset_at(zone, timestamp)
+
+
+def to_epoch(dates: List[str]) -> List[int]:
+    """Convert ISO 8601 chart dates to epoch seconds (naive dates are UTC)."""
+    # fromisoformat runs in C; splitting the fixed format in Python measured ~5x slower
+    epochs = []
+    for date in dates:
+        parsed = datetime.fromisoformat(date)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=dt_timezone.utc)
+        epochs.append(int(parsed.timestamp()))
+    return epochs
+
+
+def format_epochs(timestamps: List[int], zone: ZoneInfo) -> List[str]:
+    """Format epoch seconds as local "YYYY-MM-DD HH:MM:SS" strings in ``zone``."""
+    return [
+        time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts + utc_offset(zone, ts)))
+        for ts in timestamps
+    ]
+
+
+def format_epoch(timestamp: int, tz: Optional[str] = None) -> str:
+    """Format epoch seconds like merge_chart_points does for chart dates."""
+    zone = resolve_timezone(tz) if tz else None
+    if zone is None:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp))
+    return format_epochs([timestamp], zone)[0]
+
+
+def localize_dates(dates: List[str], tz: Optional[str] = None) -> List[str]:
+    """Convert chart dates to ``tz`` in one batch; unchanged without a valid tz."""
+    zone = resolve_timezone(tz) if tz else None
+    if zone is None:
+        return list(dates)
+    try:
+        return format_epochs(to_epoch(dates), zone)
+    except ValueError as e:
+        print(f"Timezone conversion error: {e}")
+        return list(dates)
+
+
 def merge_chart_points(reports: List[Dict[str, object]], baseline: List[Dict[str, object]],
                        tz: Optional[str] = None) -> List[Dict[str, object]]:
-    merged = []
-    for rep, base in zip(reports, baseline):
-        date_str = rep["date"]
-        if tz:
-            try:
-                # Parse ISO 8601 and convert to target timezone
-                iso_dt = parser.isoparse(date_str)
-                target_tz = pytz.timezone(tz)
-                date_str = iso_dt.astimezone(target_tz).strftime("%Y-%m-%d %H:%M:%S")
-            except Exception as e:
-                print(f"Timezone conversion error: {e}")
-        merged.append({
-            "date": date_str,
-            "reports_value": rep["value"],
-            "baseline_value": base["value"]
-        })
-    return merged
+    size = min(len(reports), len(baseline))
+    dates = localize_dates([rep["date"] for rep in reports[:size]], tz)
+    return [
+        {"date": date, "reports_value": rep["value"], "baseline_value": base["value"]}
+        for date, rep, base in zip(dates, reports, baseline)
+    ]
+
+
+def _indicator_text(fragment: str) -> str:
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return html_lib.unescape("".join(part.strip() for part in TAG_RE.split(fragment)))
+
+
+def parse_status_page(html: str) -> Tuple[List[ChartSeries], List[Dict[str, str]]]:
+    """Extract every chart series and the reported problems in one pass.
+
+    A series ends at the "]" closing its data array, or when the timestamps
+    jump backwards, so the parser does not depend on a fixed number of
+    points per series. Returns ``(series, problems)`` where each series is a
+    ``(dates, values)`` pair.
+    """
+    series: List[ChartSeries] = []
+    dates: List[str] = []
+    values = array("d")
+    problems: List[Dict[str, str]] = []
+    percentage = name = None
+
+    indicators_start = html.find('id="indicators-card"')
+
+    for match in STATUS_TOKEN_RE.finditer(html):
+        x = match.group("x")
+        if x is not None:
+            if dates and x < dates[-1]:
+                series.append((dates, values))
+                dates, values = [], array("d")
+            dates.append(x)
+            values.append(float(match.group("y")))
+        elif match.group("end") is not None:
+            if dates:
+                series.append((dates, values))
+                dates, values = [], array("d")
+        elif 0 <= indicators_start < match.start():
+            text = _indicator_text(match.group("text"))
+            if match.group("kind") == "percentage":
+                percentage = text.replace("%", "")
+            else:
+                name = text
+            if percentage is not None and name is not None:
+                problems.append({"name": name, "percentage": f"{percentage}%"})
+                percentage = name = None
+
+    if dates:
+        series.append((dates, values))
+
+    return series, problems
+
+
+def series_points(chart_series: ChartSeries) -> List[Dict[str, object]]:
+    dates, values = chart_series
+    return [{"date": date, "value": value} for date, value in zip(dates, values)]
 
 
 def get_reported_problems(html: str) -> List[Dict[str, str]]:
@@ -94,56 +392,69 @@ def get_reported_problems(html: str) -> List[Dict[str, str]]:
     return problems
 
 def compute_summary_statistics(time_series: List[Dict[str, object]]) -> Dict[str, object]:
-    if not time_series:
-        return {}
+    return compute_statistics(TimeSeries.from_points(time_series))
 
-    total_reports = sum(item["reports_value"] for item in time_series)
-    average_reports = total_reports / len(time_series)
 
-    max_reports_item = max(time_series, key=lambda x: x["reports_value"])
-    max_deviation_item = max(time_series, key=lambda x: abs(x["reports_value"] - x["baseline_value"]))
+async def scrape_status(company: str, domain: str = "com.br") -> Tuple[List[ChartSeries], List[Dict[str, str]]]:
+    """Fetch and parse a status page into raw chart series and problems.
 
-    spikes = [item["date"] for item in time_series
-              if item["reports_value"] > 2 * item["baseline_value"] and item["baseline_value"] > 0]
+    Raises CompanyNotFoundError for a page without chart data that is not
+    a challenge (those raise UpstreamThrottledError while fetching), as
+    Downdetector serves for companies it does not track.
+    """
+    html = await fetch_status_page(company, domain)
+    await page_archive.capture(company, domain, html)
+    with stage_timer("parse"):
+        chart_series, problems = parse_status_page(html)
+    if not chart_series:
+        raise CompanyNotFoundError(f"{domain} has no chart data for {company}")
+    return chart_series, problems
 
-    alerts_count = sum(1 for item in time_series if item["reports_value"] > 1.5 * item["baseline_value"])
 
-    return {
-        "max_reports": {
-            "value": max_reports_item["reports_value"],
-            "timestamp": max_reports_item["date"]
-        },
-        "average_reports": round(average_reports, 2),
-        "total_reports": round(total_reports),
-        "max_deviation": {
-            "value": abs(max_deviation_item["reports_value"] - max_deviation_item["baseline_value"]),
-            "timestamp": max_deviation_item["date"]
-        },
-        "spikes": spikes,
-        "alerts_count": alerts_count
-    }
+def status_series(chart_series: List[ChartSeries], timezone: Optional[str] = None) -> TimeSeries:
+    """Pair the reports and baseline series of a parsed page, with localized dates."""
+    dates, reports = chart_series[0] if len(chart_series) > 0 else ([], [])
+    baseline = chart_series[1][1] if len(chart_series) > 1 else []
+    size = min(len(dates), len(reports), len(baseline))
+    return TimeSeries(localize_dates(dates[:size], timezone), reports[:size], baseline[:size])
 
 
-async def downdetector(company: str, domain: str = "com.br", timezone: Optional[str] = None) -> Dict[str, object]:
-    html = await call_downdetector(company, domain)
-    script_content = get_script_content(html)
-    chart_lines = extract_chart_lines(script_content)
+def build_status(chart_series: List[ChartSeries], problems: List[Dict[str, str]],
+                 timezone: Optional[str] = None, series: Optional[TimeSeries] = None,
+                 stats: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Build the status payload (time series, problems, stats) from parsed data.
 
-    reports = str2obj(chart_lines[:96])
-    baseline = str2obj(chart_lines[96:192])
-    time_series = merge_chart_points(reports, baseline, timezone)
-
-    problems = get_reported_problems(html)
+    ``series`` and ``stats`` may be passed in when already computed, e.g.
+    for a whole batch of pages with ``compute_batch_statistics``.
+    """
+    if series is None:
+        series = status_series(chart_series, timezone)
+    if stats is None:
+        with stage_timer("stats"):
+            stats = compute_statistics(series)
 
     return {
-        "time_series": time_series,
+        "time_series": series.points(),
         "most_reported_problems": problems,
-        "stats": compute_summary_statistics(time_series)
+        "stats": stats,
     }
 
 
+async def downdetector(company: str, domain: str = "com.br", timezone: Optional[str] = None) -> Dict[str, object]:
+    chart_series, problems = await scrape_status(company, domain)
+    return build_status(chart_series, problems, timezone)
+
+
 # Example usage
 if __name__ == "__main__":
     import json
-    result = asyncio.run(downdetector("pix", timezone="America/Maceio"))
+
+    async def main():
+        try:
+            return await downdetector("pix", timezone="America/Maceio")
+        finally:
+            await close_http_client()
+            await browser_pool.stop()
+
+    result = asyncio.run(main())
     print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    company TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    reports REAL NOT NULL,
+    baseline REAL NOT NULL,
+    PRIMARY KEY (company, domain, ts)
+) WITHOUT ROWID
+"""
+
+
+class HistoryStore:
+    """Append-only SQLite store of chart points per company/domain.
+
+    Points are keyed by ``(company, domain, ts)`` with ``ts`` in epoch
+    seconds, so the primary key doubles as the index for range queries.
+    Each scrape only inserts timestamps newer than the last one stored for
+    its key; the overlapping part of the rolling window is skipped. The
+    database runs in WAL mode so reads do not block ingestion.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._latest: Dict[Tuple[str, str], int] = {}
+
+        self.ingests = 0
+        self.inserted = 0
+        self.skipped = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(HISTORY_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _latest_ts(self, conn: sqlite3.Connection, key: Tuple[str, str]) -> int:
+        latest = self._latest.get(key)
+        if latest is None:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM points WHERE company = ? AND domain = ?", key
+            ).fetchone()
+            latest = row[0] if row[0] is not None else -1
+            self._latest[key] = latest
+        return latest
+
+    def ingest(self, company: str, domain: str, timestamps: Sequence[int],
+               reports: Sequence[float], baseline: Sequence[float]) -> int:
+        """Store the points newer than the latest stored one, return how many."""
+        key = (company, domain)
+        with self._lock:
+            conn = self._connection()
+            latest = self._latest_ts(conn, key)
+            rows = [
+                (company, domain, ts, report, base)
+                for ts, report, base in zip(timestamps, reports, baseline)
+                if ts > latest
+            ]
+            if rows:
+                with conn:
+                    conn.executemany("INSERT OR IGNORE INTO points VALUES (?, ?, ?, ?, ?)", rows)
+                self._latest[key] = max(row[2] for row in rows)
+
+            self.ingests += 1
+            self.inserted += len(rows)
+            self.skipped += min(len(timestamps), len(reports), len(baseline)) - len(rows)
+            return len(rows)
+
+    def query(self, company: str, domain: str, start: int, end: int,
+              step: int = 0) -> List[Dict[str, Any]]:
+        """Return points with ``start <= ts <= end``, oldest first.
+
+        With a ``step`` (seconds) points are downsampled into buckets
+        aligned to multiples of ``step``: reports and baseline are averaged
+        and the bucket's highest report count is kept as ``reports_max``.
+        """
+        with self._lock:
+            conn = self._connection()
+            if step > 1:
+                rows = conn.execute(
+                    "SELECT (ts / ?) * ?, AVG(reports), AVG(baseline), MAX(reports) FROM points"
+                    " WHERE company = ? AND domain = ? AND ts BETWEEN ? AND ?"
+                    " GROUP BY ts / ? ORDER BY 1",
+                    (step, step, company, domain, start, end, step),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT ts, reports, baseline, reports FROM points"
+                    " WHERE company = ? AND domain = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                    (company, domain, start, end),
+                ).fetchall()
+
+        return [
+            {"ts": ts, "reports_value": reports, "baseline_value": baseline, "reports_max": reports_max}
+            for ts, reports, baseline, reports_max in rows
+        ]
+
+    def count(self, company: str, domain: str, start: int, end: int) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COUNT(*) FROM points WHERE company = ? AND domain = ? AND ts BETWEEN ? AND ?",
+                (company, domain, start, end),
+            ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "series_seen": len(self._latest),
+            "ingests": self.ingests,
+            "inserted_points": self.inserted,
+            "skipped_points": self.skipped,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+
+from .cache import CacheBackend, CacheIndex
+
+JANITOR_INTERVAL = 60  # Seconds between sweeps
+
+
+class CacheJanitor:
+    """Periodically delete backend entries past their usable life.
+
+    Each sweep lists the backend keys (without reading payloads), indexes
+    entries other workers stored, forgets entries removed elsewhere and
+    deletes every entry that expired more than ``grace`` seconds ago.
+    ``on_evict`` drops a key from the caller's memory tiers.
+    """
+
+    def __init__(self, backend: CacheBackend, index: CacheIndex,
+                 expiry: Callable[[Dict[str, Any]], float], grace: float,
+                 on_evict: Callable[[str], None], interval: float = JANITOR_INTERVAL):
+        self.backend = backend
+        self.index = index
+        self.expiry = expiry
+        self.grace = grace
+        self.on_evict = on_evict
+        self.interval = interval
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.sweeps = 0
+        self.evicted = 0
+        self.discovered = 0
+        self.failed = 0
+        self.last_sweep_seconds: Optional[float] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.failed += 1
+                print(f"Cache janitor sweep failed: {e}")
+
+    async def sweep(self) -> int:
+        """Run one sweep, return how many entries were deleted."""
+        start_time = time.perf_counter()
+
+        # Snapshot the index first, so entries written during the listing
+        # are not mistaken for entries removed by another worker
+        known = set(self.index.keys())
+        stored = set(await self.backend.keys())
+        for key in known - stored:
+            self.index.delete(key)
+            self.on_evict(key)
+        for key in stored - known:
+            await self._discover(key)
+
+        evicted = 0
+        for key in self.index.expired(time.time() - self.grace):
+            await self.backend.delete(key)
+            self.index.delete(key)
+            self.on_evict(key)
+            evicted += 1
+
+        self.sweeps += 1
+        self.evicted += evicted
+        self.last_sweep_seconds = round(time.perf_counter() - start_time, 4)
+        return evicted
+
+    async def _discover(self, key: str) -> None:
+        body = await self.backend.get(key)
+        if body is None:
+            return
+        try:
+            data = orjson.loads(body)
+            expires_at = self.expiry(data)
+        except (ValueError, KeyError, TypeError):
+            # Unreadable entries are deleted by this sweep
+            data, expires_at = {}, 0.0
+        self.index.set(key, data, len(body), expires_at)
+        self.discovered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "sweeps": self.sweeps,
+            "evicted": self.evicted,
+            "discovered": self.discovered,
+            "failed": self.failed,
+            "last_sweep_seconds": self.last_sweep_seconds,
+        }
@@ -1,23 +1,240 @@
-import json
+import asyncio
+import math
 import os
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel
 
-from .downdetector_index import scrape_downdetector_links
-from .downdetector_scrapper import downdetector
-
-app = FastAPI(title="Downdetector API")
+from .anomaly import EVENTS_MAX as ANOMALY_EVENTS_MAX, AnomalyDetector
+from .archive import page_archive
+from .broadcast import Broadcaster
+from .columnar import columnar_companylist
+from .company_search import CompanyIndex
+from .browser_pool import browser_pool
+from .cache import MEMORY_CACHE_SIZE, CacheIndex, LRUCache, create_backend
+from .downdetector_index import company_slug
+from .downdetector_scrapper import (
+    DOWNDETECTOR_DOMAINS,
+    ChartSeries,
+    CompanyNotFoundError,
+    UpstreamThrottledError,
+    UpstreamUnavailableError,
+    close_http_client,
+    fetch_stats,
+    format_epoch,
+    to_epoch,
+)
+from .history import HistoryStore
+from .janitor import CacheJanitor
+from .metrics import (
+    CACHE_LOOKUPS,
+    REQUEST_SECONDS,
+    SCRAPE_LOCKS,
+    SCRAPES,
+    SCRAPES_IN_FLIGHT,
+    stage_timer,
+)
+from .navigation import navigation_stats
+from .prefetch import PopularityCounter, PrefetchScheduler
+from .ratelimit import CircuitOpenError, DomainUnavailableError, ScrapeLimiter
+from .responses import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_AVAILABLE,
+    MSGPACK_MEDIA_TYPE,
+    RESPONSE_FLAGS,
+    RenderedEntry,
+    cached_response,
+)
+from .singleflight import SingleFlight
+from .workers import (
+    JOBS as SCRAPE_JOBS,
+    JobTimeoutError,
+    QueueFullError,
+    WorkerCrashedError,
+    scrape_workers,
+)
 
 # Cache configuration
 CACHE_DIR = "./cache"
-COMPANY_CACHE_FILE = os.path.join(CACHE_DIR, "companylist_cache.json")
 CACHE_DURATION = 10 * 60  # 10 minutes in seconds
 
+# Cache shared by every worker: "file" stores entries in CACHE_DIR (workers
+# on one host), "redis" in a Redis-protocol server (workers on any host)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# Only one worker in the cluster scrapes a key, the others wait for its result
+SCRAPE_LOCK_TTL = 120  # seconds, longer than the slowest scrape
+SCRAPE_LOCK_POLL = 0.25  # seconds between checks while another worker scrapes
+
+# Stale-while-revalidate: expired entries are served immediately while a
+# background task refreshes them, until they are MAX_STALENESS past expiry
+STALE_WHILE_REVALIDATE = True
+MAX_STALENESS = 60 * 60  # 1 hour in seconds
+
+# Prefetch: keep the most requested companies (topped up from the company
+# index) warm so user requests are served from cache
+PREFETCH_ENABLED = True
+PREFETCH_TOP_N = 30
+PREFETCH_COMPANIES: List[str] = []  # Always kept warm, e.g. ["pix", "claro"]
+PREFETCH_DOMAIN = "com.br"
+PREFETCH_TIMEZONE = "America/Maceio"
+PREFETCH_INTERVAL = CACHE_DURATION * 0.8
+
+# /companylist/search page size
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+# Run scrapes in the worker processes of app/workers.py, off the API event
+# loop; False runs them in the API process with its own browser pool
+SCRAPE_IN_WORKERS = True
+SCRAPE_RETRY_AFTER = 30  # Retry-After seconds sent with 429/503 responses
+
+# Batch status: cache misses share this many concurrent scrapes
+BATCH_MAX_COMPANIES = 100
+BATCH_CONCURRENCY = (
+    scrape_workers.capacity if SCRAPE_IN_WORKERS else browser_pool.max_contexts
+)
+
+# Append-only chart history, fed by every status scrape
+HISTORY_ENABLED = True
+HISTORY_DB = os.path.join(CACHE_DIR, "history.sqlite3")
+HISTORY_DEFAULT_DAYS = 7  # Range served by /history when no start is given
+HISTORY_MAX_POINTS = 2000  # Larger ranges are downsampled to this many points
+
+# Outage detection over the new points of every status scrape; baselines
+# are seeded from history the first time a company is seen
+ANOMALY_ENABLED = True
+ANOMALY_SEED_DAYS = 7
+
+# Server-sent events of company list, status and outage changes on /stream
+STREAM_ENABLED = True
+# /stream sends a comment this often so proxies keep idle connections open
+STREAM_HEARTBEAT = 15  # seconds
+STREAM_RETRY_MS = 5000  # Reconnect delay suggested to EventSource clients
+
+# /companylist encodings besides plain JSON, rendered once per cache entry:
+# columns plus a delta-encoded sparkline matrix, as JSON or MessagePack
+COMPANYLIST_FORMATS = {"columnar": JSON_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+
+# Company fields whose changes are pushed to /stream subscribers
+STREAM_COMPANY_FIELDS = (
+    "last_status",
+    "sparkline_color",
+    "sparkline_color_hex",
+    "data_values",
+    "data_mean",
+)
+
+# In-memory tier of this worker in front of the shared backend
+memory_cache = LRUCache(MEMORY_CACHE_SIZE)
+cache_backend = create_backend(CACHE_BACKEND, CACHE_DIR, CACHE_REDIS_URL)
+
+# Expiry, size, company and domain of each backend entry, for the cache
+# endpoints and the janitor
+cache_index = CacheIndex()
+
+# Serialized bodies and validators of the entries in memory_cache
+rendered_cache = LRUCache(MEMORY_CACHE_SIZE)
+
+# Concurrent cache misses for the same key share a single scrape
+status_flight = SingleFlight()
+companylist_flight = SingleFlight()
+
+
+def classify_scrape_error(error: BaseException) -> Optional[str]:
+    """How a failed scrape counts for its domain in scrape_limiter.
+
+    Only upstream health drives the limiter: rate limits and challenges
+    are "throttled", an unreachable, failing or timed-out upstream is
+    "error". Anything else (a full queue, a crashed worker, an unknown
+    company, a parsing bug) says nothing about the domain and is not
+    counted.
+    """
+    if isinstance(error, UpstreamThrottledError):
+        return "throttled"
+    if isinstance(error, (UpstreamUnavailableError, JobTimeoutError)):
+        return "error"
+    return None
+
+
+# Paces outbound scrapes per domain: token bucket, adaptive concurrency,
+# backoff and a circuit breaker that pauses scraping an unhealthy domain
+scrape_limiter = ScrapeLimiter(classify_scrape_error, DOWNDETECTOR_DOMAINS)
+
+# Strong references to background refresh tasks until they finish
+background_tasks = set()
+
+history_store = HistoryStore(HISTORY_DB)
+
+anomaly_detector = AnomalyDetector()
+
+# Pushes company list and status changes to every /stream subscriber
+stream_broadcaster: Optional[Broadcaster] = Broadcaster() if STREAM_ENABLED else None
+
+# Search index per domain, with the cache_timestamp of the list it was built from
+company_indexes: Dict[str, Tuple[str, CompanyIndex]] = {}
+
+# Served requests per (company, domain, timezone), used to rank prefetching;
+# only keys with data count, and counts decay every prefetch cycle
+status_popularity = PopularityCounter()
+
+# Cache misses of every /status/batch request share BATCH_CONCURRENCY scrapes
+batch_semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources with the app and release them on shutdown."""
+    loaded = await warm_memory_cache()
+    print(f"Loaded {loaded} cache entries into memory")
+    if SCRAPE_IN_WORKERS:
+        await scrape_workers.start()
+    else:
+        await browser_pool.start()
+    janitor.start()
+    # Relay /stream events to the other API workers when the backend can
+    if stream_broadcaster is not None and cache_backend.supports_pubsub:
+        stream_broadcaster.start_relay(cache_backend)
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    try:
+        yield
+    finally:
+        await prefetcher.stop()
+        if stream_broadcaster is not None:
+            await stream_broadcaster.stop_relay()
+        await janitor.stop()
+        for task in list(background_tasks):
+            task.cancel()
+        await scrape_workers.stop()
+        await close_http_client()
+        await browser_pool.stop()
+        await cache_backend.close()
+        history_store.close()
+
+
+app = FastAPI(title="Downdetector API", lifespan=lifespan)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allows all origins
@@ -33,84 +250,334 @@ def ensure_cache_dir():
         os.makedirs(CACHE_DIR)
 
 
-def load_cached_data(cache_file: str) -> Optional[Dict[str, Any]]:
-    """Load cached data if it exists and is still valid."""
-    if not os.path.exists(cache_file):
+def cache_timestamps() -> Dict[str, str]:
+    """cache_timestamp and cache_expires_at for a payload stored now.
+
+    Timestamps are UTC with an explicit offset, so entries written by
+    nodes in different timezones compare correctly.
+    """
+    now = datetime.now(dt_timezone.utc)
+    return {
+        "cache_timestamp": now.isoformat(),
+        "cache_expires_at": (now + timedelta(seconds=CACHE_DURATION)).isoformat(),
+    }
+
+
+def stored_at(data: Dict[str, Any]) -> float:
+    """Return the epoch time a cached payload was stored.
+
+    Entries written before timestamps carried an offset are naive local
+    time, which is how ``timestamp()`` reads them.
+    """
+    return datetime.fromisoformat(data["cache_timestamp"]).timestamp()
+
+
+def cache_expiry(data: Dict[str, Any]) -> float:
+    """Return the epoch time at which a cached payload expires."""
+    return stored_at(data) + CACHE_DURATION
+
+
+def is_expired(data: Dict[str, Any]) -> bool:
+    """Check whether a cached payload is past its expiry."""
+    return cache_expiry(data) <= time.time()
+
+
+async def load_cached_data(
+    cache_key: str, allow_stale: bool = False, fresh_for: float = 0
+) -> Optional[Dict[str, Any]]:
+    """Load cached data if it exists and is still valid.
+
+    Hot keys are served from the in-memory tier; the shared backend is only
+    read when the entry is not in memory (e.g. after an LRU eviction, or
+    when another worker stored it) or when the memory entry expires within
+    ``fresh_for`` seconds, since another worker may have refreshed it.
+    With ``allow_stale`` expired entries are returned until MAX_STALENESS.
+    """
+    with stage_timer("cache_read"):
+        data = memory_cache.get(cache_key)
+        if data is None or cache_expiry(data) - fresh_for <= time.time():
+            stored = await load_from_backend(cache_key)
+            if stored is not None and (data is None or stored_at(stored) > stored_at(data)):
+                data = stored
+    if data is None or (not allow_stale and is_expired(data)):
+        return None
+    return dict(data)
+
+
+async def load_from_backend(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Read a valid entry from the shared backend and promote it to memory."""
+    body = await cache_backend.get(cache_key)
+    if body is None:
         return None
 
     try:
-        with open(cache_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(body)
+        expires_at = cache_expiry(data)
+    except (ValueError, KeyError, TypeError):
+        # Unreadable entry, the next save overwrites it
+        return None
+    cache_index.set(cache_key, data, len(body), expires_at)
+
+    if expires_at + MAX_STALENESS <= time.time():
+        return None
+
+    memory_cache.set(cache_key, data, expires_at + MAX_STALENESS)
+    return data
+
+
+async def save_to_cache(cache_key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Save data to the memory tier and the shared backend.
+
+    The backend keeps the entry until MAX_STALENESS past its expiry. Returns
+    a copy of the stored payload, so a fresh response carries the same
+    cache timestamps (and ETag) as later cache hits.
+    """
+    cached_data = {**data, **cache_timestamps()}
+
+    with stage_timer("cache_write"):
+        expires_at = cache_expiry(cached_data)
+        entry = RenderedEntry(cached_data, expires_at)
+        memory_cache.set(cache_key, cached_data, expires_at + MAX_STALENESS)
+        rendered_cache.set(cache_key, entry, expires_at + MAX_STALENESS)
+        await cache_backend.set(
+            cache_key, entry.body, expires_at + MAX_STALENESS - time.time()
+        )
+        cache_index.set(cache_key, cached_data, len(entry.body), expires_at)
+    return dict(cached_data)
 
-        # Check if cache is still valid
-        cache_timestamp = datetime.fromisoformat(data.get("cache_timestamp", ""))
-        current_time = datetime.now()
 
-        if current_time - cache_timestamp < timedelta(seconds=CACHE_DURATION):
-            return data
+def rendered_entry(
+    cache_key: str, data: Dict[str, Any], response_format: str = "json"
+) -> RenderedEntry:
+    """Return the serialized form of a cache entry, building it once if missing.
+
+    The company list formats in COMPANYLIST_FORMATS are kept next to the
+    plain JSON entry, under "<cache_key>|<format>".
+    """
+    rendered_key = cache_key if response_format == "json" else f"{cache_key}|{response_format}"
+    entry = rendered_cache.get(rendered_key)
+    if entry is None or entry.cache_timestamp != data["cache_timestamp"]:
+        expires_at = cache_expiry(data)
+        if response_format == "json":
+            entry = RenderedEntry(data, expires_at)
         else:
-            # Cache expired
-            os.remove(cache_file)  # Remove expired cache
-            return None
-    except (json.JSONDecodeError, ValueError, KeyError, FileNotFoundError):
-        # If there's any error reading the cache, remove it
-        if os.path.exists(cache_file):
-            os.remove(cache_file)
+            entry = RenderedEntry(
+                columnar_companylist(data), expires_at, COMPANYLIST_FORMATS[response_format]
+            )
+        rendered_cache.set(rendered_key, entry, expires_at + MAX_STALENESS)
+    return entry
+
+
+async def warm_memory_cache() -> int:
+    """Index every backend entry and load the still-valid ones into memory."""
+    loaded = 0
+    for cache_key in await cache_backend.keys():
+        if await load_from_backend(cache_key) is not None:
+            loaded += 1
+    return loaded
+
+
+def forget(cache_key: str) -> None:
+    """Drop a key from this worker's memory tiers."""
+    memory_cache.delete(cache_key)
+    rendered_cache.delete(cache_key)
+    for response_format in COMPANYLIST_FORMATS:
+        rendered_cache.delete(f"{cache_key}|{response_format}")
+
+
+# Deletes entries once they are too old to be served even as stale
+janitor = CacheJanitor(cache_backend, cache_index, cache_expiry, MAX_STALENESS, forget)
+
+
+def refresh_in_background(
+    flight: SingleFlight, key: Any, fetch: Callable[[], Awaitable[Dict[str, Any]]]
+) -> None:
+    """Refresh a cache entry without blocking the caller."""
+
+    async def run():
+        try:
+            await flight.do(key, fetch)
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+
+    task = asyncio.create_task(run())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def stored_after(
+    cache_key: str, seen: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Return the backend entry for a key if it is valid and newer than ``seen``."""
+    data = await load_from_backend(cache_key)
+    if data is None or is_expired(data):
         return None
+    if seen is not None and stored_at(data) <= stored_at(seen):
+        return None
+    return {**data, "from_cache": True, "cache_hit": True, "stale": False}
 
 
-def save_to_cache(cache_file: str, data: Dict[str, Any]) -> None:
-    """Save data to cache with timestamp."""
-    ensure_cache_dir()
+def cluster_locked(
+    cache_key: str,
+    fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    seen: Optional[Dict[str, Any]] = None,
+) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """Wrap a scrape so only one worker in the cluster runs it for a key.
 
-    cached_data = {
-        **data,
-        "cache_timestamp": datetime.now().isoformat(),
-        "cache_expires_at": (
-            datetime.now() + timedelta(seconds=CACHE_DURATION)
-        ).isoformat(),
-    }
+    ``seen`` is the entry that made the caller refresh (None on a miss);
+    any valid entry stored after it, by whichever worker, is used instead
+    of scraping. Workers that find the key locked poll the backend for the
+    holder's result. If the holder dies its lock expires after
+    SCRAPE_LOCK_TTL and a waiting worker takes over.
+    """
+
+    async def run() -> Dict[str, Any]:
+        while True:
+            token = await cache_backend.acquire_lock(cache_key, SCRAPE_LOCK_TTL)
+            if token is not None:
+                try:
+                    # The previous holder may have stored the key just now
+                    data = await stored_after(cache_key, seen)
+                    if data is not None:
+                        SCRAPE_LOCKS.labels("shared").inc()
+                        return data
+                    SCRAPE_LOCKS.labels("acquired").inc()
+                    return await fetch()
+                finally:
+                    await cache_backend.release_lock(cache_key, token)
 
-    with open(cache_file, "w", encoding="utf-8") as f:
-        json.dump(cached_data, f, ensure_ascii=False, indent=2)
+            SCRAPE_LOCKS.labels("busy").inc()
+            await asyncio.sleep(SCRAPE_LOCK_POLL)
+            data = await stored_after(cache_key, seen)
+            if data is not None:
+                SCRAPE_LOCKS.labels("shared").inc()
+                return data
+
+    return run
+
+
+def companylist_cache_key(domain: str) -> str:
+    """Return the company list cache key for a domain."""
+    return "companylist_" + domain.replace("/", "_").replace(":", "_")
 
 
 async def get_companylist_with_cache(domain: str) -> Dict[str, Any]:
     """Get company list with caching."""
-    cache_key = f"{domain}_companylist"
-    cache_file = COMPANY_CACHE_FILE
+    cache_key = companylist_cache_key(domain)
 
     # Try to load from cache first
-    cached_data = load_cached_data(cache_file)
-    if cached_data and cached_data.get("domain") == domain:
-        print(f"Using cached data for domain: {domain}")
+    cached_data = await load_cached_data(cache_key, allow_stale=STALE_WHILE_REVALIDATE)
+    if cached_data:
         cached_data["from_cache"] = True
         cached_data["cache_hit"] = True
+        cached_data["stale"] = is_expired(cached_data)
+        CACHE_LOOKUPS.labels("companylist", "stale" if cached_data["stale"] else "hit").inc()
+        if cached_data["stale"]:
+            print(f"Using stale cached data for domain: {domain}, refreshing...")
+            refresh_in_background(
+                companylist_flight,
+                domain,
+                cluster_locked(
+                    cache_key, lambda: fetch_companylist(domain, cache_key), cached_data
+                ),
+            )
+        else:
+            print(f"Using cached data for domain: {domain}")
         return cached_data
 
-    # If not in cache or expired, fetch new data
+    # If not in cache or expired, fetch new data (once for concurrent callers)
     print(f"Cache miss for domain: {domain}, fetching new data...")
+    CACHE_LOOKUPS.labels(
+        "companylist", "coalesced" if domain in companylist_flight else "miss"
+    ).inc()
+    try:
+        return await companylist_flight.do(
+            domain,
+            cluster_locked(cache_key, lambda: fetch_companylist(domain, cache_key)),
+        )
+    except DomainUnavailableError as e:
+        return await serve_while_unavailable(cache_key, e)
+
+
+async def serve_while_unavailable(
+    cache_key: str, error: DomainUnavailableError
+) -> Dict[str, Any]:
+    """Serve whatever is stored for a key when its domain cannot be scraped now.
+
+    Stale entries are returned even with STALE_WHILE_REVALIDATE off; with
+    nothing stored the caller gets 503 (circuit open) or 429 (no free
+    scrape slot) with Retry-After.
+    """
+    cached_data = await load_cached_data(cache_key, allow_stale=True)
+    if cached_data is None:
+        raise HTTPException(
+            status_code=503 if isinstance(error, CircuitOpenError) else 429,
+            detail=str(error),
+            headers={"Retry-After": str(math.ceil(error.retry_after))},
+        )
+    print(f"Serving stored {cache_key}: {error}")
+    return {**cached_data, "from_cache": True, "cache_hit": True, "stale": is_expired(cached_data)}
+
+
+async def run_scrape(kind: str, *args: Any, domain: str) -> Any:
+    """Run a scrape job in the worker processes, or here when they are not running.
+
+    Every scrape takes a slot from scrape_limiter for its domain first and
+    raises DomainUnavailableError when it gets none. A full job queue is
+    answered with 429, a timed-out job with 504 and a crashed worker or a
+    throttled scrape with 503, so callers can retry later; an unreachable
+    upstream gets 502 and a company without a status page 404.
+    """
+    retry_after = {"Retry-After": str(SCRAPE_RETRY_AFTER)}
+    try:
+        async with scrape_limiter.slot(domain) as slot:
+            if scrape_workers.started:
+                result = await scrape_workers.submit(kind, *args)
+            else:
+                result = await SCRAPE_JOBS[kind](*args)
+            if not result:
+                slot.outcome = "error"  # No company cards: the index did not load
+            return result
+    except QueueFullError:
+        raise HTTPException(
+            status_code=429, detail="Too many scrapes queued, retry later", headers=retry_after
+        )
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after)
+    except UpstreamThrottledError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after)
+    except UpstreamUnavailableError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except CompanyNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def fetch_companylist(domain: str, cache_key: str) -> Dict[str, Any]:
+    """Scrape the company list for a domain and store it in the cache."""
     start_time = time.perf_counter()
-    result = await scrape_downdetector_links(domain)
+    with SCRAPES_IN_FLIGHT.labels("companylist").track_inprogress():
+        result = await run_scrape("companylist", domain, domain=domain)
     end_time = time.perf_counter()
 
     duration = round(end_time - start_time, 3)
 
     if not result:
+        SCRAPES.labels("companylist", scrape_limiter.label(domain), "error").inc()
         raise HTTPException(
             status_code=500, detail="Failed to retrieve data from Downdetector"
         )
+    SCRAPES.labels("companylist", scrape_limiter.label(domain), "success").inc()
 
     # Prepare response
     response_data = {
         "duration_seconds": duration,
         "domain": domain,
-        "cache_timestamp": datetime.now().isoformat(),
-        "cache_expires_at": (
-            datetime.now() + timedelta(seconds=CACHE_DURATION)
-        ).isoformat(),
+        **cache_timestamps(),
         "from_cache": False,
         "cache_hit": False,
+        "stale": False,
     }
 
     # Add result based on type
@@ -119,37 +586,112 @@ async def get_companylist_with_cache(domain: str) -> Dict[str, Any]:
     else:
         response_data["companies"] = result
 
+    # Only diff against the stored entry when someone listens to /stream
+    publish = stream_broadcaster is not None and stream_broadcaster.has_subscribers
+    previous = None
+    if publish:
+        previous = await load_cached_data(cache_key, allow_stale=True)
+
     # Save to cache
-    save_to_cache(cache_file, response_data)
+    response_data = await save_to_cache(cache_key, response_data)
+
+    if publish:
+        publish_companylist_changes(domain, previous, response_data)
 
     return response_data
 
 
 # Status endpoint cache (for individual company status)
+def status_cache_key(company: str, domain: str, timezone: str) -> str:
+    """Return the cache key for a company/domain/timezone combination."""
+    return "status_" + f"{company}_{domain}_{timezone}".replace("/", "_").replace(":", "_")
+
+
 async def get_status_with_cache(
     company: str, domain: str, timezone: str
 ) -> Dict[str, Any]:
     """Get status with caching for individual companies."""
-    ensure_cache_dir()
+    cache_key = status_cache_key(company, domain, timezone)
+    cached_data = await cached_status(company, domain, timezone, cache_key)
+    if cached_data is not None:
+        return cached_data
+    return await status_miss(company, domain, timezone, cache_key)
 
-    # Create a unique cache key for this company/domain/timezone combination
-    cache_key = f"{company}_{domain}_{timezone}".replace("/", "_").replace(":", "_")
-    cache_file = os.path.join(CACHE_DIR, f"status_{cache_key}.json")
 
-    # Try to load from cache first
-    cached_data = load_cached_data(cache_file)
+async def cached_status(
+    company: str, domain: str, timezone: str, cache_key: str
+) -> Optional[Dict[str, Any]]:
+    """Serve a status key from the cache, refreshing a stale entry in the background.
+
+    Returns None on a miss.
+    """
+    cached_data = await load_cached_data(cache_key, allow_stale=STALE_WHILE_REVALIDATE)
     if cached_data:
-        print(f"Using cached status for {company} on {domain}")
         cached_data["from_cache"] = True
         cached_data["cache_hit"] = True
+        cached_data["stale"] = is_expired(cached_data)
+        CACHE_LOOKUPS.labels("status", "stale" if cached_data["stale"] else "hit").inc()
+        if cached_data["stale"]:
+            print(f"Using stale status for {company} on {domain}, refreshing...")
+            refresh_in_background(
+                status_flight,
+                (company, domain, timezone),
+                cluster_locked(
+                    cache_key,
+                    lambda: fetch_status(company, domain, timezone, cache_key),
+                    cached_data,
+                ),
+            )
+        else:
+            print(f"Using cached status for {company} on {domain}")
+        status_popularity.add((company, domain, timezone))
         return cached_data
+    return None
+
 
-    # If not in cache or expired, fetch new data
+async def status_miss(
+    company: str, domain: str, timezone: str, cache_key: str
+) -> Dict[str, Any]:
+    """Scrape a status key missing from the cache, once for concurrent callers."""
     print(f"Cache miss for {company} on {domain}, fetching new data...")
+    CACHE_LOOKUPS.labels(
+        "status", "coalesced" if (company, domain, timezone) in status_flight else "miss"
+    ).inc()
+    try:
+        data = await status_flight.do(
+            (company, domain, timezone),
+            cluster_locked(
+                cache_key, lambda: fetch_status(company, domain, timezone, cache_key)
+            ),
+        )
+    except DomainUnavailableError as e:
+        return await serve_while_unavailable(cache_key, e)
+    status_popularity.add((company, domain, timezone))
+    return data
+
+
+async def fetch_status(
+    company: str, domain: str, timezone: str, cache_key: str
+) -> Dict[str, Any]:
+    """Scrape a company status page and store it in the cache."""
     start_time = time.perf_counter()
-    result = await downdetector(company, domain, timezone)
+    try:
+        with SCRAPES_IN_FLIGHT.labels("status").track_inprogress():
+            chart_series, result = await run_scrape(
+                "status", company, domain, timezone, domain=domain
+            )
+    except Exception as e:
+        outcome = "not_found" if isinstance(e, HTTPException) and e.status_code == 404 else "error"
+        SCRAPES.labels("status", scrape_limiter.label(domain), outcome).inc()
+        raise
+    SCRAPES.labels("status", scrape_limiter.label(domain), "success").inc()
     end_time = time.perf_counter()
 
+    if HISTORY_ENABLED:
+        await record_history(company, domain, chart_series)
+    if ANOMALY_ENABLED:
+        await detect_anomalies(company, domain, chart_series)
+
     duration = round(end_time - start_time, 3)
 
     if not result:
@@ -163,12 +705,10 @@ async def get_status_with_cache(
         "company": company,
         "domain": domain,
         "timezone": timezone,
-        "cache_timestamp": datetime.now().isoformat(),
-        "cache_expires_at": (
-            datetime.now() + timedelta(seconds=CACHE_DURATION)
-        ).isoformat(),
+        **cache_timestamps(),
         "from_cache": False,
         "cache_hit": False,
+        "stale": False,
     }
 
     # Add result based on type
@@ -177,14 +717,249 @@ async def get_status_with_cache(
     else:
         response_data["data"] = result
 
+    # Only diff against the stored entry when someone listens to /stream
+    publish = stream_broadcaster is not None and stream_broadcaster.has_subscribers
+    previous = None
+    if publish:
+        previous = await load_cached_data(cache_key, allow_stale=True)
+
     # Save to cache
-    save_to_cache(cache_file, response_data)
+    response_data = await save_to_cache(cache_key, response_data)
+
+    if publish:
+        publish_status_changes(previous, response_data)
 
     return response_data
 
 
+def company_key(company: Dict[str, Any]) -> Optional[str]:
+    """Identify a company across company list scrapes."""
+    return company_slug(company.get("full_company_link")) or company.get("company_name")
+
+
+def companylist_changes(
+    previous: List[Dict[str, Any]], current: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Per-company differences between two company lists.
+
+    Changed companies carry only their changed STREAM_COMPANY_FIELDS; new
+    companies carry the whole entry and missing ones are flagged removed.
+    """
+    before = {company_key(company): company for company in previous}
+    changes = []
+    for company in current:
+        key = company_key(company)
+        old = before.pop(key, None)
+        if old is None:
+            changes.append({"slug": key, "added": True, "company": company})
+            continue
+        old_svg = old.get("svg_data") or {}
+        svg = company.get("svg_data") or {}
+        changed = {
+            field: svg.get(field)
+            for field in STREAM_COMPANY_FIELDS
+            if svg.get(field) != old_svg.get(field)
+        }
+        if changed:
+            changes.append({"slug": key, "svg_data": changed})
+    changes += [{"slug": key, "removed": True} for key in before]
+    return changes
+
+
+def publish_companylist_changes(
+    domain: str, previous: Optional[Dict[str, Any]], current: Dict[str, Any]
+) -> None:
+    """Push the company list delta of a fresh scrape to /stream."""
+    old_companies = []
+    if previous and previous.get("domain") == domain:
+        old_companies = previous.get("companies", [])
+    changes = companylist_changes(old_companies, current.get("companies", []))
+    if changes:
+        stream_broadcaster.publish(
+            "companies",
+            {
+                "domain": domain,
+                "cache_timestamp": current["cache_timestamp"],
+                "changes": changes,
+            },
+            domain,
+        )
+
+
+def publish_status_changes(
+    previous: Optional[Dict[str, Any]], current: Dict[str, Any]
+) -> None:
+    """Push new chart points and changed problems of a status scrape to /stream."""
+    known_dates = set()
+    old_problems = None
+    if previous:
+        known_dates = {point["date"] for point in previous.get("time_series", [])}
+        old_problems = previous.get("most_reported_problems")
+
+    new_points = [
+        point for point in current.get("time_series", []) if point["date"] not in known_dates
+    ]
+    problems = current.get("most_reported_problems")
+    if not new_points and problems == old_problems:
+        return
+
+    event = {
+        "company": current["company"],
+        "domain": current["domain"],
+        "timezone": current["timezone"],
+        "cache_timestamp": current["cache_timestamp"],
+        "new_points": new_points,
+        "stats": current.get("stats"),
+    }
+    if problems != old_problems:
+        event["most_reported_problems"] = problems
+    stream_broadcaster.publish("status", event, current["domain"])
+
+
+async def record_history(company: str, domain: str, chart_series: List[ChartSeries]) -> None:
+    """Append the new points of a scrape to the history store."""
+    if len(chart_series) < 2:
+        return
+    (dates, reports), (_, baseline) = chart_series[0], chart_series[1]
+    try:
+        inserted = await asyncio.to_thread(
+            history_store.ingest, company, domain, to_epoch(dates), reports, baseline
+        )
+        print(f"Stored {inserted} new history points for {company} on {domain}")
+    except Exception as e:
+        print(f"History ingestion failed for {company} on {domain}: {e}")
+
+
+async def detect_anomalies(
+    company: str, domain: str, chart_series: List[ChartSeries]
+) -> None:
+    """Feed the new points of a scrape to the outage detector and push its events."""
+    if len(chart_series) < 2:
+        return
+    (dates, reports), (_, baseline) = chart_series[0], chart_series[1]
+    timestamps = to_epoch(dates)
+    if not timestamps:
+        return
+
+    if HISTORY_ENABLED and (company, domain) not in anomaly_detector:
+        # Replay the history before this scrape's window to seed the baselines
+        end_ts = min(timestamps) - 1
+        rows = await asyncio.to_thread(
+            history_store.query,
+            company,
+            domain,
+            end_ts - ANOMALY_SEED_DAYS * 24 * 60 * 60,
+            end_ts,
+        )
+        anomaly_detector.update(
+            company,
+            domain,
+            [row["ts"] for row in rows],
+            [row["reports_value"] for row in rows],
+            [row["baseline_value"] for row in rows],
+            record=False,
+        )
+
+    for event in anomaly_detector.update(company, domain, timestamps, reports, baseline):
+        print(
+            f"Outage {event['event']} for {company} on {domain}: "
+            f"severity {event['severity']} ({event['level']})"
+        )
+        if stream_broadcaster is not None:
+            stream_broadcaster.publish("anomaly", event, domain)
+
+
+async def prefetch_targets() -> List[Tuple[str, str, str]]:
+    """Pick the status keys to keep warm, most requested first."""
+    targets = [
+        (company, PREFETCH_DOMAIN, PREFETCH_TIMEZONE) for company in PREFETCH_COMPANIES
+    ]
+    targets += [key for key, _ in status_popularity.most_common(PREFETCH_TOP_N)]
+    status_popularity.decay()
+
+    # Keep the company list of every streamed domain fresh so deltas flow
+    if stream_broadcaster is not None:
+        for domain in stream_broadcaster.domains():
+            await prefetch_companylist(domain or PREFETCH_DOMAIN)
+
+    if len(set(targets)) < PREFETCH_TOP_N:
+        companylist = await get_companylist_with_cache(PREFETCH_DOMAIN)
+        for company in companylist.get("companies", []):
+            slug = company_slug(company.get("full_company_link"))
+            if slug:
+                targets.append((slug, PREFETCH_DOMAIN, PREFETCH_TIMEZONE))
+
+    return list(dict.fromkeys(targets))[: max(PREFETCH_TOP_N, len(PREFETCH_COMPANIES))]
+
+
+async def prefetch_status(target: Tuple[str, str, str]) -> bool:
+    """Refresh a status key unless it stays valid until the next cycle."""
+    company, domain, timezone = target
+    cache_key = status_cache_key(company, domain, timezone)
+
+    cached_data = await load_cached_data(cache_key, allow_stale=True, fresh_for=PREFETCH_INTERVAL)
+    if cached_data and cache_expiry(cached_data) - time.time() > PREFETCH_INTERVAL:
+        return False
+
+    await status_flight.do(
+        target,
+        cluster_locked(
+            cache_key, lambda: fetch_status(company, domain, timezone, cache_key), cached_data
+        ),
+    )
+    return True
+
+
+async def prefetch_companylist(domain: str) -> None:
+    """Refresh a company list in the background unless it outlives the next cycle."""
+    cache_key = companylist_cache_key(domain)
+    cached_data = await load_cached_data(cache_key, allow_stale=True, fresh_for=PREFETCH_INTERVAL)
+    if cached_data and cache_expiry(cached_data) - time.time() > PREFETCH_INTERVAL:
+        return
+    refresh_in_background(
+        companylist_flight,
+        domain,
+        cluster_locked(cache_key, lambda: fetch_companylist(domain, cache_key), cached_data),
+    )
+
+
+prefetcher = PrefetchScheduler(prefetch_targets, prefetch_status, PREFETCH_INTERVAL)
+
+
+async def observe_request(
+    endpoint: str, call: Awaitable[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Await a cached lookup and record its latency by cache result."""
+    start_time = time.perf_counter()
+    try:
+        data = await call
+    except Exception:
+        REQUEST_SECONDS.labels(endpoint, "error").observe(time.perf_counter() - start_time)
+        raise
+
+    if data.get("stale"):
+        result = "stale"
+    elif data.get("cache_hit"):
+        result = "hit"
+    else:
+        result = "miss"
+    REQUEST_SECONDS.labels(endpoint, result).observe(time.perf_counter() - start_time)
+    return data
+
+
+def check_domain(domain: Optional[str]) -> None:
+    """Reject a domain without a Downdetector site with 422.
+
+    Domains label metrics and get their own rate limiter, so only the
+    known ones may reach the scrapers.
+    """
+    if domain is not None and domain not in DOWNDETECTOR_DOMAINS:
+        raise HTTPException(status_code=422, detail=f"Unknown Downdetector domain: {domain}")
+
+
 @app.get("/status")
 async def get_status(
+    request: Request,
     company: str = Query(..., description="Company name on Downdetector"),
     domain: str = Query("com.br", description="Downdetector domain (default: com.br)"),
     timezone: str = Query(
@@ -193,60 +968,336 @@ async def get_status(
     ),
 ):
     """Get service status for a specific company with caching."""
-    return await get_status_with_cache(company, domain, timezone)
+    check_domain(domain)
+    data = await observe_request(
+        "/status", get_status_with_cache(company, domain, timezone)
+    )
+    entry = rendered_entry(status_cache_key(company, domain, timezone), data)
+    return cached_response(request, entry, data)
+
+
+class BatchStatusRequest(BaseModel):
+    companies: List[str]
+    domain: str = "com.br"
+    timezone: str = "America/Maceio"
+
+
+async def stream_batch_status(
+    companies: List[str], domain: str, timezone: str
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per company as soon as its status is ready.
+
+    Cache hits resolve immediately and reuse the entry's rendered JSON;
+    misses share batch_semaphore with every other batch request.
+    """
+
+    async def fetch_one(company: str) -> bytes:
+        cache_key = status_cache_key(company, domain, timezone)
+        try:
+            data = await cached_status(company, domain, timezone, cache_key)
+            if data is None:
+                async with batch_semaphore:
+                    data = await status_miss(company, domain, timezone, cache_key)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            return orjson.dumps({
+                "company": company,
+                "domain": domain,
+                "timezone": timezone,
+                "error": detail,
+            }) + b"\n"
+        flags = tuple(bool(data.get(name)) for name in RESPONSE_FLAGS)
+        return rendered_entry(cache_key, data).variant(flags, None) + b"\n"
+
+    tasks = [asyncio.create_task(fetch_one(company)) for company in companies]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def batch_status_response(
+    companies: List[str], domain: str, timezone: str
+) -> StreamingResponse:
+    """Validate a batch request and stream its results as NDJSON."""
+    check_domain(domain)
+    companies = list(dict.fromkeys(company for company in companies if company))
+    if not companies:
+        raise HTTPException(status_code=422, detail="No companies given")
+    if len(companies) > BATCH_MAX_COMPANIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {BATCH_MAX_COMPANIES} companies per batch",
+        )
+
+    return StreamingResponse(
+        stream_batch_status(companies, domain, timezone),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/status/batch")
+async def get_status_batch(
+    company: List[str] = Query(..., description="Company names, repeat the parameter"),
+    domain: str = Query("com.br", description="Downdetector domain (default: com.br)"),
+    timezone: str = Query(
+        "America/Maceio",
+        description="Timezone for timestamps (default: America/Maceio)",
+    ),
+):
+    """Stream the status of several companies as NDJSON."""
+    return batch_status_response(company, domain, timezone)
+
+
+@app.post("/status/batch")
+async def post_status_batch(request: BatchStatusRequest):
+    """Stream the status of several companies as NDJSON."""
+    return batch_status_response(request.companies, request.domain, request.timezone)
+
+
+def history_epoch(value: Optional[datetime], default: float) -> int:
+    """Epoch seconds for a /history bound; naive datetimes are UTC."""
+    if value is None:
+        return int(default)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return int(value.timestamp())
+
+
+@app.get("/history")
+async def get_history(
+    company: str = Query(..., description="Company name on Downdetector"),
+    domain: str = Query("com.br", description="Downdetector domain (default: com.br)"),
+    timezone: str = Query(
+        "America/Maceio",
+        description="Timezone for timestamps (default: America/Maceio)",
+    ),
+    start: Optional[datetime] = Query(
+        None, description=f"Range start, ISO 8601 (default: {HISTORY_DEFAULT_DAYS} days ago)"
+    ),
+    end: Optional[datetime] = Query(None, description="Range end, ISO 8601 (default: now)"),
+    step: Optional[int] = Query(
+        None, ge=0, description="Bucket size in seconds for downsampling (0: raw points)"
+    ),
+):
+    """Get stored chart history for a company, downsampled to a bucket size."""
+    check_domain(domain)
+    end_ts = history_epoch(end, time.time())
+    start_ts = history_epoch(start, end_ts - HISTORY_DEFAULT_DAYS * 24 * 60 * 60)
+    if start_ts > end_ts:
+        raise HTTPException(status_code=422, detail="start must be before end")
+
+    if step is None:
+        # Pick the smallest bucket that keeps the answer under HISTORY_MAX_POINTS
+        count = await asyncio.to_thread(history_store.count, company, domain, start_ts, end_ts)
+        step = 0
+        if count > HISTORY_MAX_POINTS:
+            step = -(-(end_ts - start_ts + 1) // HISTORY_MAX_POINTS)
+
+    rows = await asyncio.to_thread(
+        history_store.query, company, domain, start_ts, end_ts, step
+    )
+    points = [{"date": format_epoch(row.pop("ts"), timezone), **row} for row in rows]
+
+    return {
+        "company": company,
+        "domain": domain,
+        "timezone": timezone,
+        "start": format_epoch(start_ts, timezone),
+        "end": format_epoch(end_ts, timezone),
+        "step_seconds": step,
+        "total_points": len(points),
+        "time_series": points,
+    }
+
+
+def with_dates(item: Dict[str, Any], timezone: str) -> Dict[str, Any]:
+    """Add local date strings next to the epoch fields of an outage or event."""
+    dated = dict(item)
+    for key in ("ts", "start_ts", "peak_ts", "end_ts"):
+        if key in item:
+            dated[key.replace("ts", "date")] = format_epoch(item[key], timezone)
+    return dated
+
+
+@app.get("/anomalies")
+async def get_anomalies(
+    company: Optional[str] = Query(None, description="Only this company (default: all)"),
+    domain: Optional[str] = Query(None, description="Only this domain (default: all)"),
+    timezone: str = Query(
+        "America/Maceio",
+        description="Timezone for timestamps (default: America/Maceio)",
+    ),
+    since: Optional[datetime] = Query(
+        None, description="Only events at or after this time, ISO 8601 (default: all kept)"
+    ),
+    limit: int = Query(100, ge=1, le=ANOMALY_EVENTS_MAX, description="Maximum events"),
+):
+    """Get ongoing outages and recent outage start/end events with severity scores."""
+    check_domain(domain)
+    active = anomaly_detector.active(company, domain)
+    events = anomaly_detector.recent(history_epoch(since, 0), company, domain, limit)
+    return {
+        "active": [with_dates(outage, timezone) for outage in active],
+        "events": [with_dates(event, timezone) for event in events],
+        "detector": anomaly_detector.stats(),
+    }
+
+
+async def get_company_index(domain: str) -> Tuple[Dict[str, Any], CompanyIndex]:
+    """Return a domain's company list and its search index, rebuilt per scrape."""
+    companylist = await get_companylist_with_cache(domain)
+    built = company_indexes.get(domain)
+    if built is None or built[0] != companylist["cache_timestamp"]:
+        built = (companylist["cache_timestamp"], CompanyIndex(companylist.get("companies", [])))
+        company_indexes[domain] = built
+    return companylist, built[1]
+
+
+@app.get("/companylist/search")
+async def search_companies(
+    domain: str = Query("com.br", description="Downdetector domain (default: com.br)"),
+    q: Optional[str] = Query(
+        None, description="Name to search, prefix and typo tolerant (default: all)"
+    ),
+    slug: Optional[str] = Query(None, description="Exact company slug, e.g. pix"),
+    status: Optional[List[str]] = Query(
+        None, description="Only companies with this last_status, repeat the parameter"
+    ),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """Search a domain's company list server-side, with pagination."""
+    check_domain(domain)
+    companylist, index = await get_company_index(domain)
+
+    if slug is not None:
+        company = index.get(slug)
+        total, companies = (1, [company]) if company else (0, [])
+    else:
+        total, companies = index.search(q, status, limit, offset)
+
+    return {
+        "domain": domain,
+        "query": q,
+        "slug": slug,
+        "status": status,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "status_counts": index.status_counts(),
+        "companies": companies,
+        "cache_timestamp": companylist["cache_timestamp"],
+        "from_cache": companylist["from_cache"],
+        "stale": companylist["stale"],
+    }
 
 
 @app.get("/companylist")
 async def get_companies(
+    request: Request,
     domain: str = Query("com.br", description="Downdetector domain (default: com.br)"),
+    response_format: Literal["json", "columnar", "msgpack"] = Query(
+        "json",
+        alias="format",
+        description="json, columnar (one sparkline matrix) or msgpack (columnar as MessagePack)",
+    ),
 ):
     """Get list of companies with caching."""
-    return await get_companylist_with_cache(domain)
+    check_domain(domain)
+    if response_format == "msgpack" and not MSGPACK_AVAILABLE:
+        raise HTTPException(status_code=501, detail="format=msgpack needs the msgpack package")
+    data = await observe_request("/companylist", get_companylist_with_cache(domain))
+    entry = rendered_entry(companylist_cache_key(domain), data, response_format)
+    return cached_response(request, entry, data)
 
 
-@app.get("/cache/info")
-async def get_cache_info():
-    """Get information about the cache."""
-    ensure_cache_dir()
+async def stream_events(domain: Optional[str]) -> AsyncIterator[str]:
+    """Yield SSE frames for one subscriber until it disconnects or lags."""
+    async with stream_broadcaster.subscribe(domain) as subscriber:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    subscriber.queue.get(), timeout=STREAM_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if frame is None:
+                return
+            yield frame
 
-    cache_files = []
-    total_size = 0
 
-    for filename in os.listdir(CACHE_DIR):
-        if filename.endswith(".json"):
-            filepath = os.path.join(CACHE_DIR, filename)
-            file_stat = os.stat(filepath)
+@app.get("/stream")
+async def get_stream(
+    domain: Optional[str] = Query(
+        None, description="Only push changes for this domain (default: all)"
+    ),
+):
+    """Push company list and status changes as server-sent events.
 
-            cache_info = {
-                "filename": filename,
-                "size_bytes": file_stat.st_size,
-                "size_mb": round(file_stat.st_size / (1024 * 1024), 3),
-                "modified": datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
-            }
+    Changes are published by the worker that scraped them. With
+    CACHE_BACKEND=redis they are relayed to every API worker; with the file
+    backend the stream is only complete when the API runs a single worker.
+    """
+    check_domain(domain)
+    if stream_broadcaster is None:
+        raise HTTPException(status_code=404, detail="Streaming is disabled")
+    return StreamingResponse(
+        stream_events(domain),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-            # Try to load cache metadata
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    cache_info.update(
-                        {
-                            "cache_timestamp": data.get("cache_timestamp"),
-                            "cache_expires_at": data.get("cache_expires_at"),
-                            "from_cache": data.get("from_cache", False),
-                            "domain": data.get("domain"),
-                            "company": data.get("company"),
-                        }
-                    )
-            except:
-                pass
-
-            cache_files.append(cache_info)
-            total_size += file_stat.st_size
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose pipeline metrics in the Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/scraper/info")
+async def get_scraper_info():
+    """Get information about the scrape workers and the shared browser pool."""
+    info = {
+        "workers": scrape_workers.stats(),
+        "browser_pool": browser_pool.stats(),
+        "fetch": fetch_stats(),
+        "navigation": navigation_stats(),
+        "prefetch": {**prefetcher.stats(), "popularity": status_popularity.stats()},
+        "stream": stream_broadcaster.stats() if stream_broadcaster is not None else None,
+        "limiter": scrape_limiter.stats(),
+        "capture": page_archive.stats(),
+    }
+    if scrape_workers.started:
+        # Browsers and fetches of the worker processes
+        for worker, stats in zip(info["workers"]["processes"], await scrape_workers.worker_stats()):
+            worker.update(stats)
+    return info
+
+
+@app.get("/cache/info")
+async def get_cache_info():
+    """Get information about the cache, answered from the metadata index."""
+    cache_files = [{"key": key, **meta.to_dict()} for key, meta in cache_index.items()]
+    total_size = cache_index.total_size
 
     return {
-        "cache_directory": CACHE_DIR,
+        "backend": cache_backend.stats(),
+        "memory": memory_cache.stats(),
+        "janitor": janitor.stats(),
+        "history": history_store.stats(),
+        "coalescing": {
+            "status": status_flight.stats(),
+            "companylist": companylist_flight.stats(),
+        },
         "cache_duration_seconds": CACHE_DURATION,
         "cache_duration_minutes": CACHE_DURATION / 60,
+        "stale_while_revalidate": STALE_WHILE_REVALIDATE,
+        "max_staleness_seconds": MAX_STALENESS,
         "total_files": len(cache_files),
         "total_size_bytes": total_size,
         "total_size_mb": round(total_size / (1024 * 1024), 3),
@@ -256,15 +1307,14 @@ async def get_cache_info():
 
 @app.delete("/cache/clear")
 async def clear_cache():
-    """Clear all cache files."""
-    ensure_cache_dir()
-
+    """Clear all cache entries."""
     cleared_files = []
-    for filename in os.listdir(CACHE_DIR):
-        if filename.endswith(".json"):
-            filepath = os.path.join(CACHE_DIR, filename)
-            os.remove(filepath)
-            cleared_files.append(filename)
+    for cache_key in await cache_backend.keys():
+        if await cache_backend.delete(cache_key):
+            cleared_files.append(cache_key)
+    cache_index.clear()
+    memory_cache.clear()
+    rendered_cache.clear()
 
     return {
         "message": "Cache cleared successfully",
@@ -275,30 +1325,13 @@ async def clear_cache():
 
 @app.delete("/cache/clear/expired")
 async def clear_expired_cache():
-    """Clear only expired cache files."""
-    ensure_cache_dir()
-
+    """Clear only expired cache entries, found through the metadata index."""
     cleared_files = []
-    current_time = datetime.now()
-
-    for filename in os.listdir(CACHE_DIR):
-        if filename.endswith(".json"):
-            filepath = os.path.join(CACHE_DIR, filename)
-
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                expires_at_str = data.get("cache_expires_at")
-                if expires_at_str:
-                    expires_at = datetime.fromisoformat(expires_at_str)
-                    if current_time > expires_at:
-                        os.remove(filepath)
-                        cleared_files.append(filename)
-            except:
-                # If there's an error reading the file, remove it
-                os.remove(filepath)
-                cleared_files.append(filename)
+    for cache_key in cache_index.expired(time.time()):
+        await cache_backend.delete(cache_key)
+        cache_index.delete(cache_key)
+        forget(cache_key)
+        cleared_files.append(cache_key)
 
     return {
         "message": "Expired cache cleared successfully",
@@ -0,0 +1,121 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets from a few milliseconds (cache reads, parsing) up to the 60s
+# navigation timeout of the index scrape
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "downdetector_stage_seconds",
+    "Time spent in each stage of the scrape pipeline",
+    ["stage"],
+    buckets=SECONDS_BUCKETS,
+)
+
+REQUEST_SECONDS = Histogram(
+    "downdetector_request_seconds",
+    "API request latency by endpoint and cache result",
+    ["endpoint", "result"],
+    buckets=SECONDS_BUCKETS,
+)
+
+CACHE_LOOKUPS = Counter(
+    "downdetector_cache_lookups_total",
+    "Cache lookups by cache and result (hit, stale, miss, coalesced)",
+    ["cache", "result"],
+)
+
+SCRAPES = Counter(
+    "downdetector_scrapes_total",
+    "Scrapes by kind, domain and outcome (success, error, not_found)",
+    ["kind", "domain", "outcome"],
+)
+
+SCRAPES_IN_FLIGHT = Gauge(
+    "downdetector_scrapes_in_flight",
+    "Scrapes currently running",
+    ["kind"],
+)
+
+SCRAPE_LOCKS = Counter(
+    "downdetector_scrape_locks_total",
+    "Cluster scrape lock outcomes (acquired, busy, shared result from another worker)",
+    ["outcome"],
+)
+
+SCRAPE_JOBS = Counter(
+    "downdetector_scrape_jobs_total",
+    "Jobs run by the scrape worker processes by outcome (success, error, timeout, crashed, rejected)",
+    ["kind", "outcome"],
+)
+
+SCRAPE_QUEUE_JOBS = Gauge(
+    "downdetector_scrape_queue_jobs",
+    "Jobs waiting for a scrape worker",
+)
+
+DOMAIN_SCRAPES = Counter(
+    "downdetector_domain_scrapes_total",
+    "Outbound scrapes per domain as seen by the rate limiter "
+    "(success, error, throttled, rejected by the circuit breaker, busy)",
+    ["domain", "outcome"],
+)
+
+DOMAIN_CONCURRENCY_LIMIT = Gauge(
+    "downdetector_domain_concurrency_limit",
+    "Adaptive limit of concurrent scrapes per domain",
+    ["domain"],
+)
+
+DOMAIN_RATE_LIMIT = Gauge(
+    "downdetector_domain_rate_limit",
+    "Adaptive token bucket rate per domain, in scrapes per second",
+    ["domain"],
+)
+
+DOMAIN_CIRCUIT_STATE = Gauge(
+    "downdetector_domain_circuit_state",
+    "Circuit breaker state per domain (0 closed, 1 half-open, 2 open)",
+    ["domain"],
+)
+
+BROWSER_CONTEXTS_OPEN = Gauge(
+    "downdetector_browser_contexts_open",
+    "Browser contexts currently open in the pool",
+)
+
+
+# Set per job in scrape worker processes, whose metrics are not scraped:
+# their stage timings are sent back and recorded by the API process
+_stage_samples: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("stage_samples", default=None)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Context manager that records its duration under ``stage``."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start_time
+        samples = _stage_samples.get()
+        if samples is None:
+            STAGE_SECONDS.labels(stage).observe(seconds)
+        else:
+            samples.append((stage, seconds))
+
+
+def collect_stages() -> List[Tuple[str, float]]:
+    """Collect the stage timings of the current task instead of recording them."""
+    samples: List[Tuple[str, float]] = []
+    _stage_samples.set(samples)
+    return samples
+
+
+def record_stages(samples: List[Tuple[str, float]]) -> None:
+    for stage, seconds in samples:
+        STAGE_SECONDS.labels(stage).observe(seconds)
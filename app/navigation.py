@@ -0,0 +1,205 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page, Request, Response, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# "lean" blocks what the scrapers never read and waits for the DOM only;
+# "full" loads every resource and waits for the load event
+NAVIGATION_PROFILE = "lean"
+
+# Every Nth navigation under the default profile uses "full" instead, so the
+# time and bytes saved per page are measured against a live baseline
+# (0 disables the baseline)
+NAVIGATION_BASELINE_EVERY = 20
+
+# Resource types the scrapers never read: chart data and company cards
+# are in the HTML, and colors come from first-party stylesheets
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "texttrack", "eventsource", "websocket", "manifest")
+
+# Third-party hosts still allowed under the lean profile (bot challenges)
+ALLOWED_THIRD_PARTY = ("challenges.cloudflare.com",)
+
+READY_TIMEOUT = 10000  # ms to wait for a page's ready selector
+SIZES_TIMEOUT = 2  # seconds to wait for the transfer sizes of finished requests
+
+
+class NavigationProfile:
+    """How a scraper navigates: what to block and when a page counts as ready."""
+
+    def __init__(self, name: str, wait_until: str = "domcontentloaded",
+                 blocked_types: Sequence[str] = (), block_third_party: bool = False):
+        self.name = name
+        self.wait_until = wait_until
+        self.blocked_types = frozenset(blocked_types)
+        self.block_third_party = block_third_party
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.blocked_types) or self.block_third_party
+
+
+PROFILES = {
+    "lean": NavigationProfile("lean", "domcontentloaded", BLOCKED_RESOURCE_TYPES, block_third_party=True),
+    "full": NavigationProfile("full", "load"),
+}
+
+_navigation_stats: Dict[str, Dict[str, Any]] = {}
+_navigations = 0
+
+
+def is_first_party(host: Optional[str], site_host: Optional[str]) -> bool:
+    """Check whether ``host`` belongs to the scraped site or an allowed host."""
+    if not host:
+        return True
+    site = (site_host or "").removeprefix("www.")
+    if host == site_host or host == site or host.endswith("." + site):
+        return True
+    if "downdetector" in host:
+        return True
+    return any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_THIRD_PARTY)
+
+
+class PageRecorder:
+    """Route handler and request listener that count blocked and loaded traffic.
+
+    Bytes are the transferred headers and bodies of finished requests, as
+    reported by ``request.sizes()``; blocked requests are counted by
+    resource type, and separately when blocked as third party.
+    """
+
+    def __init__(self, profile: NavigationProfile, url: str):
+        self.profile = profile
+        self.site_host = urlsplit(url).hostname
+        self.requests = 0
+        self.blocked: Dict[str, int] = {}
+        self.blocked_third_party = 0
+        self.bytes_loaded = 0
+        self._measuring: List[asyncio.Task] = []
+
+    def request(self, request: Request) -> None:
+        self.requests += 1
+
+    async def route(self, route: Route) -> None:
+        request: Request = route.request
+        blocked = request.resource_type in self.profile.blocked_types
+        if (not blocked and self.profile.block_third_party
+                and not is_first_party(urlsplit(request.url).hostname, self.site_host)):
+            blocked = True
+            self.blocked_third_party += 1
+
+        if not blocked:
+            await route.continue_()
+            return
+        self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+        await route.abort()
+
+    def request_finished(self, request: Request) -> None:
+        self._measuring.append(asyncio.ensure_future(self._measure(request)))
+
+    async def _measure(self, request: Request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # The page closed first; the request is left out
+        self.bytes_loaded += sizes["responseHeadersSize"] + max(0, sizes["responseBodySize"])
+
+    async def settle(self) -> None:
+        """Wait for the sizes of the requests that finished so far."""
+        if not self._measuring:
+            return
+        _, pending = await asyncio.wait(self._measuring, timeout=SIZES_TIMEOUT)
+        for task in pending:
+            task.cancel()
+
+
+def select_profile(profile: Optional[str] = None) -> NavigationProfile:
+    """The requested profile, else the default with a periodic "full" baseline."""
+    global _navigations
+    if profile is not None:
+        return PROFILES[profile]
+    _navigations += 1
+    if (NAVIGATION_PROFILE != "full" and NAVIGATION_BASELINE_EVERY
+            and _navigations % NAVIGATION_BASELINE_EVERY == 0):
+        return PROFILES["full"]
+    return PROFILES[NAVIGATION_PROFILE]
+
+
+def record_navigation(recorder: PageRecorder, seconds: float) -> None:
+    stats = _navigation_stats.setdefault(recorder.profile.name, {
+        "pages": 0, "seconds": 0.0, "bytes_loaded": 0, "requests": 0, "blocked": {},
+        "blocked_third_party": 0,
+    })
+    stats["pages"] += 1
+    stats["seconds"] += seconds
+    stats["bytes_loaded"] += recorder.bytes_loaded
+    stats["requests"] += recorder.requests
+    stats["blocked_third_party"] += recorder.blocked_third_party
+    for resource_type, count in recorder.blocked.items():
+        stats["blocked"][resource_type] = stats["blocked"].get(resource_type, 0) + count
+
+
+def navigation_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-profile page counts, mean navigation time and bytes, blocked requests.
+
+    Once the "full" baseline has pages, every other profile also reports
+    the mean time, bytes and requests it saved per page against it.
+    """
+    summary = {
+        name: {
+            "pages": stats["pages"],
+            "average_seconds": round(stats["seconds"] / stats["pages"], 3),
+            "average_bytes_loaded": round(stats["bytes_loaded"] / stats["pages"]),
+            "average_requests": round(stats["requests"] / stats["pages"], 1),
+            "blocked_requests": dict(stats["blocked"]),
+            "blocked_third_party": stats["blocked_third_party"],
+        }
+        for name, stats in _navigation_stats.items()
+        if stats["pages"]
+    }
+    baseline = summary.get("full")
+    if baseline is not None:
+        for name, stats in summary.items():
+            if name == "full":
+                continue
+            stats["saved_per_page"] = {
+                "seconds": round(baseline["average_seconds"] - stats["average_seconds"], 3),
+                "bytes": baseline["average_bytes_loaded"] - stats["average_bytes_loaded"],
+                "requests": round(baseline["average_requests"] - stats["average_requests"], 1),
+            }
+    return summary
+
+
+async def navigate(page: Page, url: str, timeout: float, ready_selector: Optional[str] = None,
+                   profile: Optional[str] = None) -> Optional[Response]:
+    """Open ``url`` with a navigation profile and wait until it is ready.
+
+    The wait for ``ready_selector`` replaces fixed sleeps and is best
+    effort: a page without it (e.g. a bot challenge) is returned as loaded
+    and the caller decides whether it is usable. Returns the main
+    document's response, for its status code.
+    """
+    selected = select_profile(profile)
+    recorder = PageRecorder(selected, url)
+    if selected.intercepts:
+        await page.route("**/*", recorder.route)
+    page.on("request", recorder.request)
+    page.on("requestfinished", recorder.request_finished)
+
+    start_time = time.perf_counter()
+    try:
+        response = await page.goto(url, timeout=timeout, wait_until=selected.wait_until)
+        if ready_selector:
+            try:
+                await page.wait_for_selector(ready_selector, timeout=READY_TIMEOUT)
+            except PlaywrightTimeoutError:
+                pass
+        return response
+    finally:
+        seconds = time.perf_counter() - start_time
+        page.remove_listener("request", recorder.request)
+        page.remove_listener("requestfinished", recorder.request_finished)
+        await recorder.settle()
+        record_navigation(recorder, seconds)
@@ -0,0 +1,137 @@
+import asyncio
+import heapq
+import random
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+PREFETCH_CONCURRENCY = 2  # Refreshes allowed to run at the same time
+PREFETCH_JITTER = 0.5  # Random delay added to each slot, as a fraction of it
+
+# Request counts ranking prefetch targets: bounded and decayed, so keys
+# requested once long ago stop being kept warm
+POPULARITY_MAX_KEYS = 1000  # The least requested keys beyond this are dropped
+POPULARITY_DECAY = 0.5  # Counts are multiplied by this every prefetch cycle
+POPULARITY_MIN_COUNT = 0.5  # Decayed counts below this are dropped
+
+
+class PopularityCounter:
+    """Decaying request counts per key, keeping at most ``max_keys`` keys."""
+
+    def __init__(self, max_keys: int = POPULARITY_MAX_KEYS, decay: float = POPULARITY_DECAY):
+        self.max_keys = max_keys
+        self.decay_factor = decay
+        self._counts: Dict[Hashable, float] = {}
+        self.trimmed = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: Hashable) -> None:
+        self._counts[key] = self._counts.get(key, 0.0) + 1
+        # Trim in batches so adding stays O(1) amortized
+        if len(self._counts) > 2 * self.max_keys:
+            before = len(self._counts)
+            self._counts = dict(self.most_common(self.max_keys))
+            self.trimmed += before - len(self._counts)
+
+    def clear(self) -> None:
+        self._counts.clear()
+
+    def most_common(self, n: int) -> List[Tuple[Hashable, float]]:
+        return heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def decay(self) -> None:
+        self._counts = {
+            key: count * self.decay_factor
+            for key, count in self._counts.items()
+            if count * self.decay_factor >= POPULARITY_MIN_COUNT
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keys": len(self._counts), "max_keys": self.max_keys, "trimmed": self.trimmed}
+
+
+class PrefetchScheduler:
+    """Keep a set of cache keys warm by refreshing them on a schedule.
+
+    Every ``interval`` seconds the scheduler asks ``get_targets`` for the
+    keys to keep warm and spreads their ``refresh`` calls evenly across the
+    interval, with jitter, so expirations do not line up into bursts.
+    ``refresh`` decides itself whether a key actually needs scraping.
+    """
+
+    def __init__(self, get_targets: Callable[[], Awaitable[List[Hashable]]],
+                 refresh: Callable[[Hashable], Awaitable[bool]], interval: float,
+                 concurrency: int = PREFETCH_CONCURRENCY, jitter: float = PREFETCH_JITTER):
+        self.get_targets = get_targets
+        self.refresh = refresh
+        self.interval = interval
+        self.jitter = jitter
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+        self.cycles = 0
+        self.targets = 0
+        self.refreshed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            cycle_start = loop.time()
+            try:
+                targets = await self.get_targets()
+            except Exception as e:
+                print(f"Prefetch could not load targets: {e}")
+                targets = []
+
+            self.cycles += 1
+            self.targets = len(targets)
+
+            pending = []
+            if targets:
+                slot = self.interval / len(targets)
+                for index, target in enumerate(targets):
+                    due = cycle_start + index * slot + random.uniform(0, slot * self.jitter)
+                    await asyncio.sleep(max(0.0, due - loop.time()))
+                    pending.append(asyncio.create_task(self._refresh_one(target)))
+                await asyncio.gather(*pending)
+
+            await asyncio.sleep(max(0.0, cycle_start + self.interval - loop.time()))
+
+    async def _refresh_one(self, target: Hashable) -> None:
+        async with self._semaphore:
+            try:
+                if await self.refresh(target):
+                    self.refreshed += 1
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Prefetch failed for {target}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "cycles": self.cycles,
+            "targets": self.targets,
+            "refreshed": self.refreshed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
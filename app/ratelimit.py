@@ -0,0 +1,311 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AbstractSet, Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from .metrics import DOMAIN_CIRCUIT_STATE, DOMAIN_CONCURRENCY_LIMIT, DOMAIN_RATE_LIMIT, DOMAIN_SCRAPES
+
+# Token bucket per domain: at most this many scrapes per second, and the burst
+RATE_LIMIT_PER_SECOND = 2.0
+RATE_LIMIT_BURST = 4
+
+# AIMD per domain: a failed or throttled scrape halves the token rate and the
+# concurrency limit (a scrape slower than LATENCY_TARGET only the latter);
+# each healthy scrape raises the rate by RATE_INCREASE, and the concurrency
+# limit grows by about 1 per window of healthy scrapes
+RATE_MIN = 0.1  # Scrapes per second
+RATE_INCREASE = 0.1  # Scrapes per second, per healthy scrape
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = 8
+CONCURRENCY_START = 4
+DECREASE_FACTOR = 0.5
+DECREASE_INTERVAL = 1  # Seconds between two decreases, so one burst of failures halves once
+LATENCY_TARGET = 15  # Seconds; a browser render of a status page takes about 5
+
+# Exponential backoff after consecutive failures, with jitter
+BACKOFF_BASE = 1  # Seconds after the first failure, doubled per failure
+BACKOFF_MAX = 60
+
+# Circuit breaker: opens when half of the last scrapes of a domain failed
+BREAKER_WINDOW = 20
+BREAKER_MIN_SAMPLES = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_COOLDOWN = 30  # Seconds open before a single trial scrape (half-open)
+BREAKER_COOLDOWN_MAX = 300  # The cooldown doubles each time a trial fails
+
+MAX_WAIT = 30  # Seconds a scrape may wait for a slot before it is rejected
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+OTHER_DOMAIN = "other"  # Limiter and metric label shared by every domain outside ``known``
+
+
+class DomainUnavailableError(Exception):
+    """A scrape of ``domain`` was not started; retry after ``retry_after`` seconds."""
+
+    def __init__(self, domain: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.domain = domain
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DomainUnavailableError):
+    """The domain failed too often recently and is not being scraped."""
+
+
+class LimiterBusyError(DomainUnavailableError):
+    """No scrape slot for the domain became free within MAX_WAIT."""
+
+
+class ScrapeSlot:
+    """Permission for one scrape; ``outcome`` overrides how it is counted."""
+
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome: Optional[str] = None
+
+
+class DomainLimiter:
+    """Token bucket, AIMD concurrency limit, backoff and circuit breaker of one domain."""
+
+    def __init__(self, domain: str, rate: float, burst: int):
+        self.domain = domain
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+
+        self.tokens = float(burst)
+        self._refilled = time.monotonic()
+        self.limit = float(CONCURRENCY_START)
+        self.in_flight = 0
+        self._slot_freed = asyncio.Condition()
+        self._last_decrease = 0.0
+
+        self.failure_streak = 0
+        self.backoff_until = 0.0
+        self.outcomes: Deque[bool] = deque(maxlen=BREAKER_WINDOW)  # True for failures
+        self.state = CLOSED
+        self.cooldown = BREAKER_COOLDOWN
+        self.opened_until = 0.0
+        self._trial_running = False
+
+        self.counts = {"success": 0, "error": 0, "throttled": 0, "rejected": 0, "busy": 0}
+        self.latency_ewma: Optional[float] = None
+        self.opens = 0
+        self._publish()
+
+    def _publish(self) -> None:
+        DOMAIN_CONCURRENCY_LIMIT.labels(self.domain).set(int(self.limit))
+        DOMAIN_RATE_LIMIT.labels(self.domain).set(self.rate)
+        DOMAIN_CIRCUIT_STATE.labels(self.domain).set(CIRCUIT_STATES[self.state])
+
+    def _admit(self, now: float) -> bool:
+        """Let a scrape through the circuit, return whether it is the half-open trial."""
+        if self.state == OPEN and now >= self.opened_until:
+            self.state = HALF_OPEN
+            self._publish()
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        self._reject(now)
+
+    def _reject(self, now: float) -> None:
+        self.counts["rejected"] += 1
+        DOMAIN_SCRAPES.labels(self.domain, "rejected").inc()
+        retry_after = max(self.opened_until - now, 1.0)
+        raise CircuitOpenError(
+            self.domain, retry_after,
+            f"Scraping {self.domain} is paused after repeated failures, retry in {retry_after:.0f}s",
+        )
+
+    def _take_token(self, now: float) -> float:
+        """Reserve a token, return how long to wait until it is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def _acquire(self) -> None:
+        async with self._slot_freed:
+            await self._slot_freed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            now = time.monotonic()
+            delay = max(self._take_token(now), self.backoff_until - now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            await self._release()
+            raise
+
+    async def _release(self) -> None:
+        async with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    def _decrease(self, now: float, rate: bool) -> None:
+        if rate:
+            # No burst right after a failure, whether or not the rate drops now
+            self.tokens = min(self.tokens, 0.0)
+        if now - self._last_decrease < DECREASE_INTERVAL:
+            return
+        self._last_decrease = now
+        self.limit = max(CONCURRENCY_MIN, self.limit * DECREASE_FACTOR)
+        if rate:
+            self.rate = max(RATE_MIN, self.rate * DECREASE_FACTOR)
+
+    def _record(self, outcome: str, seconds: float, trial: bool) -> None:
+        now = time.monotonic()
+        self.counts[outcome] += 1
+        DOMAIN_SCRAPES.labels(self.domain, outcome).inc()
+        self.latency_ewma = seconds if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * seconds
+        failed = outcome != "success"
+
+        if failed or seconds > LATENCY_TARGET:
+            self._decrease(now, rate=failed)
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+            # About +1 after a full window (the current limit) of healthy scrapes
+            self.limit = min(CONCURRENCY_MAX, self.limit + 1 / self.limit)
+
+        if failed:
+            self.failure_streak += 1
+            backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failure_streak - 1))
+            self.backoff_until = max(self.backoff_until, now + backoff * random.uniform(0.5, 1.0))
+        else:
+            self.failure_streak = 0
+        self.outcomes.append(failed)
+
+        if trial:
+            self._trial_running = False
+            if failed:
+                self.cooldown = min(BREAKER_COOLDOWN_MAX, self.cooldown * 2)
+                self._open(now)
+            else:
+                # Recovered: close and ramp up again from the minimum
+                self.state = CLOSED
+                self.cooldown = BREAKER_COOLDOWN
+                self.outcomes.clear()
+                self.limit = float(CONCURRENCY_MIN)
+        elif (self.state == CLOSED and len(self.outcomes) >= BREAKER_MIN_SAMPLES
+              and sum(self.outcomes) / len(self.outcomes) >= BREAKER_FAILURE_RATIO):
+            self._open(now)
+        self._publish()
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_until = now + self.cooldown
+        self.opens += 1
+        print(f"Circuit for {self.domain} opened for {self.cooldown:.0f}s")
+
+    @asynccontextmanager
+    async def slot(self, classify: Callable[[BaseException], Optional[str]],
+                   max_wait: float) -> AsyncIterator[ScrapeSlot]:
+        trial = self._admit(time.monotonic())
+        try:
+            await asyncio.wait_for(self._acquire(), max_wait)
+        except asyncio.TimeoutError:
+            if trial:
+                self._trial_running = False
+            self.counts["busy"] += 1
+            DOMAIN_SCRAPES.labels(self.domain, "busy").inc()
+            raise LimiterBusyError(
+                self.domain, max_wait, f"No scrape slot for {self.domain} within {max_wait:.0f}s"
+            )
+        if self.state == OPEN and not trial:
+            # The circuit opened while this scrape was waiting
+            await self._release()
+            self._reject(time.monotonic())
+
+        scrape_slot = ScrapeSlot()
+        start_time = time.monotonic()
+        outcome: Optional[str] = None
+        try:
+            yield scrape_slot
+            outcome = scrape_slot.outcome or "success"
+        except BaseException as e:
+            outcome = classify(e) if isinstance(e, Exception) else None
+            raise
+        finally:
+            await self._release()
+            if outcome is not None:
+                self._record(outcome, time.monotonic() - start_time, trial)
+            elif trial:
+                self._trial_running = False  # Not the domain's fault, let the next scrape try
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "rate_per_second": round(self.rate, 3),
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "tokens": round(min(self.burst, self.tokens + (now - self._refilled) * self.rate), 2),
+            "backoff_seconds": round(max(0.0, self.backoff_until - now), 1),
+            "open_seconds": round(max(0.0, self.opened_until - now), 1) if self.state == OPEN else 0,
+            "recent_failure_ratio": round(sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0,
+            "average_seconds": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "circuit_opens": self.opens,
+            **self.counts,
+        }
+
+
+class ScrapeLimiter:
+    """Pace outbound scrapes per Downdetector domain.
+
+    Each domain gets a token bucket (``rate`` scrapes per second, bursts of
+    ``burst``), a concurrency limit adjusted by AIMD from scrape latency
+    and failures, exponential backoff after consecutive failures and a
+    circuit breaker. ``classify`` maps a scrape exception to "throttled",
+    "error", or None when it says nothing about the domain's health (e.g.
+    a local queue being full).
+
+    With ``known`` set, any other domain shares the single OTHER_DOMAIN
+    limiter and metric label, so arbitrary domains cannot grow the
+    limiters or the metric series without bound.
+    """
+
+    def __init__(self, classify: Callable[[BaseException], Optional[str]],
+                 known: Optional[AbstractSet[str]] = None,
+                 rate: float = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST,
+                 max_wait: float = MAX_WAIT):
+        self.classify = classify
+        self.known = known
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._domains: Dict[str, DomainLimiter] = {}
+
+    def label(self, domain: str) -> str:
+        """The limiter and metric label for ``domain``."""
+        if self.known is None or domain in self.known:
+            return domain
+        return OTHER_DOMAIN
+
+    def domain(self, domain: str) -> DomainLimiter:
+        domain = self.label(domain)
+        limiter = self._domains.get(domain)
+        if limiter is None:
+            limiter = self._domains[domain] = DomainLimiter(domain, self.rate, self.burst)
+        return limiter
+
+    def slot(self, domain: str):
+        """Async context manager around one scrape of ``domain``.
+
+        Raises CircuitOpenError while the domain's circuit is open and
+        LimiterBusyError when no slot frees up within ``max_wait``.
+        """
+        return self.domain(domain).slot(self.classify, self.max_wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_rate_per_second": self.rate,
+            "burst": self.burst,
+            "domains": {domain: limiter.stats() for domain, limiter in self._domains.items()},
+        }
@@ -0,0 +1,168 @@
+"""Reprocess captured status pages through the parse and stats pipeline.
+
+Streams the records of an archive written with CAPTURE_DIR (see
+app/archive.py) to a pool of processes, each decompressing and parsing
+its batch as a live scrape would, without network access, and
+summarizing the whole batch with one set of vectorized passes.
+Run from the repository root:
+
+    python -m app.replay ARCHIVE [ARCHIVE ...] [--processes N] [--output results.jsonl]
+
+Each output line holds the record's company, domain and fetched_at with
+the stats and most reported problems (and the time series with
+``--series``); a summary with the throughput and the corrupt records
+skipped is printed at the end.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from .archive import Header, decode_page, iter_archive
+from .downdetector_scrapper import parse_status_page, status_series
+from .stats import compute_batch_statistics
+
+REPLAY_BATCH = 32  # Records sent to a process at a time
+REPLAY_BATCHES_PER_PROCESS = 2  # Batches in flight per process, bounding memory
+
+
+def replay_batch(batch: List[Tuple[Header, bytes]], timezone: Optional[str],
+                 series: bool) -> List[Dict[str, Any]]:
+    """Parse every page of a batch, then compute all their stats at once."""
+    results = []
+    parsed = []
+    for header, body in batch:
+        result: Dict[str, Any] = {
+            "company": header["company"],
+            "domain": header["domain"],
+            "fetched_at": header["fetched_at"],
+        }
+        try:
+            chart_series, problems = parse_status_page(decode_page(body))
+            parsed.append((result, problems, status_series(chart_series, timezone)))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+
+    batch_stats = compute_batch_statistics([page_series for _, _, page_series in parsed])
+    for (result, problems, page_series), stats in zip(parsed, batch_stats):
+        result["points"] = len(page_series)
+        result["stats"] = stats
+        result["most_reported_problems"] = problems
+        if series:
+            result["time_series"] = page_series.points()
+    return results
+
+
+def select_records(records: Iterator[Tuple[Header, bytes]], company: Optional[str] = None,
+                   domain: Optional[str] = None, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Iterator[Tuple[Header, bytes]]:
+    """Filter records on their headers, before any page is decompressed."""
+    for header, body in records:
+        if company is not None and header["company"] != company:
+            continue
+        if domain is not None and header["domain"] != domain:
+            continue
+        if since is not None and header["fetched_at"] < since:
+            continue
+        if until is not None and header["fetched_at"] >= until:
+            continue
+        yield header, body
+
+
+def batches(records: Iterator[Tuple[Header, bytes]], size: int,
+            limit: Optional[int] = None) -> Iterator[List[Tuple[Header, bytes]]]:
+    batch: List[Tuple[Header, bytes]] = []
+    for count, record in enumerate(records):
+        if limit is not None and count >= limit:
+            break
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def replay(records: Iterator[Tuple[Header, bytes]], processes: int, batch_size: int = REPLAY_BATCH,
+           timezone: Optional[str] = None, series: bool = False,
+           limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield one result per record, in archive order.
+
+    With ``processes`` 0 every record is processed in this process.
+    Otherwise at most REPLAY_BATCHES_PER_PROCESS batches per process are
+    in flight, so an archive of any size streams in bounded memory.
+    """
+    if processes <= 0:
+        for batch in batches(records, batch_size, limit):
+            yield from replay_batch(batch, timezone, series)
+        return
+
+    with ProcessPoolExecutor(processes) as executor:
+        pending: Deque[Future] = deque()
+        for batch in batches(records, batch_size, limit):
+            pending.append(executor.submit(replay_batch, batch, timezone, series))
+            if len(pending) >= processes * REPLAY_BATCHES_PER_PROCESS:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("archives", nargs="+", help="Archive directories or segment files")
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (0: parse in this process)")
+    arg_parser.add_argument("--batch", type=int, default=REPLAY_BATCH)
+    arg_parser.add_argument("--output", help="Write one JSON line per record to this file ('-' for stdout)")
+    arg_parser.add_argument("--series", action="store_true", help="Include the time series in the output")
+    arg_parser.add_argument("--timezone", help="Format dates in this timezone, like the API's timezone parameter")
+    arg_parser.add_argument("--company")
+    arg_parser.add_argument("--domain")
+    arg_parser.add_argument("--since", type=float, help="Only pages fetched at or after this epoch time")
+    arg_parser.add_argument("--until", type=float, help="Only pages fetched before this epoch time")
+    arg_parser.add_argument("--limit", type=int, help="Stop after this many records")
+    args = arg_parser.parse_args()
+
+    skipped: List[str] = []
+    records = select_records(iter_archive(args.archives, skipped), args.company, args.domain, args.since, args.until)
+    output = None
+    if args.output == "-":
+        output = sys.stdout.buffer
+    elif args.output:
+        output = open(args.output, "wb")
+    log = sys.stderr if output is sys.stdout.buffer else sys.stdout
+
+    count = errors = empty = 0
+    start_time = time.perf_counter()
+    try:
+        for result in replay(records, args.processes, args.batch, args.timezone, args.series, args.limit):
+            count += 1
+            if "error" in result:
+                errors += 1
+            elif not result["points"]:
+                empty += 1
+            if output is not None:
+                output.write(orjson.dumps(result) + b"\n")
+    finally:
+        if output is not None and output is not sys.stdout.buffer:
+            output.close()
+    seconds = time.perf_counter() - start_time
+
+    print(
+        f"Replayed {count} pages in {seconds:.2f}s ({count / seconds if seconds else 0:.0f} pages/s, "
+        f"{args.processes} processes): {errors} errors, {empty} without chart data, "
+        f"{len(skipped)} corrupt records skipped",
+        file=log,
+    )
+    for reason in skipped:
+        print(f"Skipped {reason}", file=log)
+
+
+if __name__ == "__main__":
+    main()
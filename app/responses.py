@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import time
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, only needed for format=msgpack
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+# Per-request fields, appended to the pre-serialized body on each response
+RESPONSE_FLAGS = ("from_cache", "cache_hit", "stale")
+
+COMPRESS_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class RenderedEntry:
+    """A cache entry serialized once, with validators and compressed variants.
+
+    ``body`` is the payload without RESPONSE_FLAGS, as JSON or MessagePack.
+    Each combination of flags and content encoding is built on first use
+    and kept, so repeated hits only copy bytes. The ETag of a variant
+    covers its flags, so a stale response never validates as a fresh one.
+    """
+
+    def __init__(self, data: Dict[str, Any], expires_at: float, media_type: str = JSON_MEDIA_TYPE):
+        self.cache_timestamp = data["cache_timestamp"]
+        self.expires_at = expires_at
+        self.media_type = media_type
+        payload = {key: value for key, value in data.items() if key not in RESPONSE_FLAGS}
+        if media_type == MSGPACK_MEDIA_TYPE:
+            self._payload = payload
+            self.body = msgpack.packb(payload)
+        else:
+            self.body = orjson.dumps(payload)
+        self.digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.last_modified = datetime.fromisoformat(self.cache_timestamp).timestamp()
+        self._variants: Dict[Tuple[Tuple[bool, ...], Optional[str]], bytes] = {}
+
+    def etag(self, flags: Tuple[bool, ...]) -> str:
+        return f'W/"{self.digest}-{"".join("1" if flag else "0" for flag in flags)}"'
+
+    def variant(self, flags: Tuple[bool, ...], encoding: Optional[str]) -> bytes:
+        key = (flags, encoding)
+        body = self._variants.get(key)
+        if body is None:
+            if self.media_type == MSGPACK_MEDIA_TYPE:
+                body = msgpack.packb({**self._payload, **dict(zip(RESPONSE_FLAGS, flags))})
+            else:
+                suffix = b",".join(
+                    b'"%s":%s' % (name.encode(), b"true" if value else b"false")
+                    for name, value in zip(RESPONSE_FLAGS, flags)
+                )
+                body = self.body[:-1] + (b"," if len(self.body) > 2 else b"") + suffix + b"}"
+            if encoding == "br":
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            elif encoding == "gzip":
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            self._variants[key] = body
+        return body
+
+
+def choose_encoding(request: Request, size: int) -> Optional[str]:
+    """Pick br or gzip from Accept-Encoding, None for identity."""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def not_modified(request: Request, etag: str, last_modified: float, stale: bool) -> bool:
+    """Evaluate If-None-Match (weak comparison) or else If-Modified-Since.
+
+    Last-Modified does not change when an entry turns stale, so
+    If-Modified-Since only answers 304 for fresh responses.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and not stale:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_response(request: Request, entry: RenderedEntry, data: Dict[str, Any]) -> Response:
+    """Serve a cache entry with ETag/Last-Modified, 304s and TTL-aligned Cache-Control."""
+    flags = tuple(bool(data.get(name)) for name in RESPONSE_FLAGS)
+    stale = bool(data.get("stale"))
+    max_age = 0 if stale else max(0, int(entry.expires_at - time.time()))
+    etag = entry.etag(flags)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if not_modified(request, etag, entry.last_modified, stale):
+        return Response(status_code=304, headers=headers)
+
+    encoding = choose_encoding(request, len(entry.body))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(entry.variant(flags, encoding), media_type=entry.media_type, headers=headers)
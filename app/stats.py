@@ -0,0 +1,156 @@
+import warnings
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+SPIKE_FACTOR = 2.0  # Reports above this multiple of the baseline are spikes
+ALERT_FACTOR = 1.5  # Reports above this multiple of the baseline raise alerts
+PERCENTILES = (50, 90, 95, 99)
+
+
+class TimeSeries:
+    """Columnar chart data for one company: dates plus report/baseline arrays."""
+
+    __slots__ = ("dates", "reports", "baseline")
+
+    def __init__(self, dates: Sequence[str], reports: np.ndarray, baseline: np.ndarray):
+        size = min(len(dates), len(reports), len(baseline))
+        self.dates = list(dates[:size])
+        self.reports = np.asarray(reports[:size], dtype=np.float64)
+        self.baseline = np.asarray(baseline[:size], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_points(cls, time_series: List[Dict[str, object]]) -> "TimeSeries":
+        """Build from merged points as returned by ``merge_chart_points``."""
+        size = len(time_series)
+        return cls(
+            [item["date"] for item in time_series],
+            np.fromiter((item["reports_value"] for item in time_series), np.float64, size),
+            np.fromiter((item["baseline_value"] for item in time_series), np.float64, size),
+        )
+
+    def points(self) -> List[Dict[str, object]]:
+        """Merged points, the ``time_series`` of a status payload."""
+        return [
+            {"date": date, "reports_value": report, "baseline_value": base}
+            for date, report, base in zip(self.dates, self.reports.tolist(), self.baseline.tolist())
+        ]
+
+
+def stack_series(series: Sequence[TimeSeries]) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack series into 2-D (companies x points) arrays, padding with NaN."""
+    width = max((len(item) for item in series), default=0)
+    reports = np.full((len(series), width), np.nan)
+    baseline = np.full((len(series), width), np.nan)
+    for row, item in enumerate(series):
+        reports[row, :len(item)] = item.reports
+        baseline[row, :len(item)] = item.baseline
+    return reports, baseline
+
+
+def batch_statistics(reports: np.ndarray, baseline: np.ndarray) -> Dict[str, np.ndarray]:
+    """Compute summary statistics for every row of 2-D report/baseline arrays.
+
+    Rows are companies and columns are points; NaN marks padding and is
+    ignored. Each result holds one value (or one row of values) per company;
+    ``*_index`` entries are column positions.
+    """
+    padding = np.isnan(reports) | np.isnan(baseline)
+    valid = ~padding
+    counts = valid.sum(axis=1)
+
+    reports_zeroed = np.where(valid, reports, 0.0)
+    total = reports_zeroed.sum(axis=1)
+
+    deviation = np.abs(reports - baseline)
+    zscores = (reports - baseline) / np.sqrt(np.maximum(baseline, 1.0))
+
+    # argmax on -inf padded copies keeps the first maximum, like max()
+    max_index = np.where(valid, reports, -np.inf).argmax(axis=1)
+    deviation_index = np.where(valid, deviation, -np.inf).argmax(axis=1)
+    zscore_index = np.where(valid, zscores, -np.inf).argmax(axis=1)
+    rows = np.arange(reports.shape[0])
+
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # Rows that are all padding yield NaN percentiles
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spikes = valid & (reports > SPIKE_FACTOR * baseline) & (baseline > 0)
+        alerts = valid & (reports > ALERT_FACTOR * baseline)
+        if padding.any():
+            percentiles = np.nanpercentile(np.where(valid, reports, np.nan), PERCENTILES, axis=1).T
+        else:
+            percentiles = np.percentile(reports, PERCENTILES, axis=1).T
+
+    last_index = np.maximum(counts - 1, 0)
+
+    return {
+        "count": counts,
+        "total": total,
+        "mean": np.divide(total, counts, out=np.zeros_like(total), where=counts > 0),
+        "max_index": max_index,
+        "max": reports[rows, max_index],
+        "max_deviation_index": deviation_index,
+        "max_deviation": deviation[rows, deviation_index],
+        "max_zscore_index": zscore_index,
+        "max_zscore": zscores[rows, zscore_index],
+        "latest_zscore": zscores[rows, last_index],
+        "spikes": spikes,
+        "alerts_count": alerts.sum(axis=1),
+        "percentiles": percentiles,
+    }
+
+
+def row_statistics(stats: Dict[str, np.ndarray], row: int, dates: Sequence[str]) -> Dict[str, object]:
+    """The summary statistics payload of one row of ``batch_statistics``."""
+    if not stats["count"][row]:
+        return {}
+
+    return {
+        "max_reports": {
+            "value": float(stats["max"][row]),
+            "timestamp": dates[stats["max_index"][row]]
+        },
+        "average_reports": round(float(stats["mean"][row]), 2),
+        "total_reports": round(float(stats["total"][row])),
+        "max_deviation": {
+            "value": float(stats["max_deviation"][row]),
+            "timestamp": dates[stats["max_deviation_index"][row]]
+        },
+        "spikes": [dates[index] for index in np.flatnonzero(stats["spikes"][row])],
+        "alerts_count": int(stats["alerts_count"][row]),
+        "percentiles": {
+            f"p{percentile}": round(float(value), 2)
+            for percentile, value in zip(PERCENTILES, stats["percentiles"][row])
+        },
+        "zscore": {
+            "max": {
+                "value": round(float(stats["max_zscore"][row]), 2),
+                "timestamp": dates[stats["max_zscore_index"][row]]
+            },
+            "latest": round(float(stats["latest_zscore"][row]), 2),
+        },
+    }
+
+
+def compute_statistics(series: TimeSeries) -> Dict[str, object]:
+    """Summary statistics for one company, computed with vectorized passes."""
+    if not len(series):
+        return {}
+
+    stats = batch_statistics(series.reports[np.newaxis, :], series.baseline[np.newaxis, :])
+    return row_statistics(stats, 0, series.dates)
+
+
+def compute_batch_statistics(series: Sequence[TimeSeries]) -> List[Dict[str, Any]]:
+    """Summary statistics for many companies with one set of vectorized passes.
+
+    Same payloads as ``compute_statistics`` per series, in order; empty
+    series get an empty dict.
+    """
+    if not series:
+        return []
+    stats = batch_statistics(*stack_series(series))
+    return [row_statistics(stats, row, item.dates) for row, item in enumerate(series)]
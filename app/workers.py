@@ -0,0 +1,454 @@
+import asyncio
+import itertools
+import multiprocessing
+import threading
+from importlib import import_module
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .archive import page_archive
+from .browser_pool import browser_pool
+from .downdetector_index import scrape_downdetector_links
+from .downdetector_scrapper import (
+    CompanyNotFoundError,
+    UpstreamThrottledError,
+    UpstreamUnavailableError,
+    build_status,
+    close_http_client,
+    fetch_stats,
+    scrape_status,
+)
+from .metrics import BROWSER_CONTEXTS_OPEN, SCRAPE_JOBS, SCRAPE_QUEUE_JOBS, collect_stages, record_stages
+from .navigation import navigation_stats
+
+# Worker pool configuration
+WORKER_PROCESSES = 2  # Scrape worker processes, each with its own browser
+WORKER_JOBS_PER_PROCESS = 4  # Jobs each worker runs at the same time
+WORKER_QUEUE_SIZE = 100  # Jobs waiting for a worker; further jobs are rejected
+WORKER_JOB_TIMEOUT = 90  # Seconds from submission until a job fails
+WORKER_KILL_GRACE = 5  # Seconds a timed-out job has to stop before its worker is restarted
+WORKER_RESTART_DELAY = 1  # Seconds before an exited worker is replaced
+
+
+class QueueFullError(Exception):
+    """The job queue is full; the caller should retry later."""
+
+
+class JobTimeoutError(Exception):
+    """A job did not finish before its deadline."""
+
+
+class WorkerCrashedError(Exception):
+    """The worker process running a job exited."""
+
+
+class WorkerJobError(RuntimeError):
+    """A job raised an exception inside its worker process."""
+
+
+async def status_job(company: str, domain: str, timezone: str) -> Tuple[Any, Dict[str, Any]]:
+    """Fetch, parse and summarize a status page; returns (chart_series, status)."""
+    chart_series, problems = await scrape_status(company, domain)
+    return chart_series, build_status(chart_series, problems, timezone)
+
+
+async def companylist_job(domain: str) -> List[Dict[str, Any]]:
+    return await scrape_downdetector_links(domain)
+
+
+async def stats_job() -> Dict[str, Any]:
+    return {
+        "browser_pool": browser_pool.stats(),
+        "fetch": fetch_stats(),
+        "navigation": navigation_stats(),
+        "capture": page_archive.stats(),
+    }
+
+
+JOBS = {"status": status_job, "companylist": companylist_job, "stats": stats_job}
+
+# Job exceptions raised again with their own type in the API process;
+# others become WorkerJobError
+REMOTE_ERRORS = {
+    error.__name__: error
+    for error in (UpstreamThrottledError, UpstreamUnavailableError, CompanyNotFoundError)
+}
+
+
+async def run_job(conn: Connection, job_id: int, kind: str, args: Tuple[Any, ...]) -> None:
+    stages = collect_stages()
+    try:
+        reply = (job_id, True, await JOBS[kind](*args), stages)
+    except asyncio.CancelledError:
+        reply = (job_id, False, (None, "Job cancelled", None), stages)
+    except HTTPException as e:
+        reply = (job_id, False, (e.status_code, e.detail, None), stages)
+    except Exception as e:
+        reply = (job_id, False, (None, str(e), type(e).__name__), stages)
+    conn.send(reply)
+
+
+def report_contexts(conn: Connection, count: int) -> None:
+    """Send the worker's open browser contexts to the API process's gauge."""
+    try:
+        conn.send(("contexts", count))
+    except (OSError, ValueError):
+        pass
+
+
+async def serve(conn: Connection) -> None:
+    """Run jobs from the API process until it sends "stop" or goes away."""
+    tasks: Dict[int, asyncio.Task] = {}
+    browser_pool.on_contexts_change = lambda count: report_contexts(conn, count)
+    try:
+        while True:
+            try:
+                message = await asyncio.to_thread(conn.recv)
+            except EOFError:
+                break
+            if message[0] == "stop":
+                break
+            if message[0] == "cancel":
+                task = tasks.get(message[1])
+                if task is not None:
+                    task.cancel()
+                continue
+
+            _, job_id, kind, args = message
+            task = asyncio.create_task(run_job(conn, job_id, kind, args))
+            tasks[job_id] = task
+            task.add_done_callback(lambda _, job_id=job_id: tasks.pop(job_id, None))
+    finally:
+        for task in list(tasks.values()):
+            task.cancel()
+        await close_http_client()
+        await browser_pool.stop()
+
+
+def worker_main(conn: Connection, overrides: Dict[str, Dict[str, Any]]) -> None:
+    """Entry point of a worker process.
+
+    ``overrides`` sets module attributes before the first job, e.g.
+    ``{"app.downdetector_scrapper": {"FETCH_MODE": "http"}}``; the worker
+    starts from a fresh interpreter and does not see changes made in the
+    API process.
+    """
+    for module_name, values in overrides.items():
+        module = import_module(module_name)
+        for name, value in values.items():
+            setattr(module, name, value)
+    browser_pool.browsers = 1
+    asyncio.run(serve(conn))
+
+
+_job_ids = itertools.count(1)
+
+
+class ScrapeWorker:
+    """A worker process, the pipe to it and the futures of its running jobs."""
+
+    def __init__(self, index: int, overrides: Dict[str, Dict[str, Any]]):
+        self.index = index
+        self.overrides = overrides
+        self.process: Optional[multiprocessing.Process] = None
+        self.ready = asyncio.Event()
+        self.stopping = False
+
+        self._conn: Optional[Connection] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._cancelling: set = set()
+
+        self.jobs = 0
+        self.restarts = 0
+        self.kills = 0
+        self.open_contexts = 0
+
+    @property
+    def running(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=worker_main, args=(child_conn, self.overrides),
+            name=f"scrape-worker-{self.index}", daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.process, self._conn = process, parent_conn
+        threading.Thread(target=self._read, args=(parent_conn, process), daemon=True).start()
+        self.ready.set()
+
+    def _read(self, conn: Connection, process: multiprocessing.Process) -> None:
+        """Forward messages to the event loop until the worker's pipe closes."""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "contexts":
+                self._loop.call_soon_threadsafe(self._set_open_contexts, message[1])
+            else:
+                self._loop.call_soon_threadsafe(self._resolve, message)
+        process.join(timeout=5)
+        self._loop.call_soon_threadsafe(self._exited, process)
+
+    def _set_open_contexts(self, count: int) -> None:
+        # BROWSER_CONTEXTS_OPEN in this process sums every worker's contexts
+        BROWSER_CONTEXTS_OPEN.inc(count - self.open_contexts)
+        self.open_contexts = count
+
+    def _resolve(self, message: Tuple[int, bool, Any, List[Tuple[str, float]]]) -> None:
+        job_id, ok, payload, stages = message
+        record_stages(stages)
+        self._cancelling.discard(job_id)
+        future = self._pending.pop(job_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            status_code, detail, error_name = payload
+            if status_code:
+                error = HTTPException(status_code=status_code, detail=detail)
+            elif error_name in REMOTE_ERRORS:
+                error = REMOTE_ERRORS[error_name](detail)
+            else:
+                error = WorkerJobError(f"{error_name}: {detail}" if error_name else detail)
+            future.set_exception(error)
+
+    def _exited(self, process: multiprocessing.Process) -> None:
+        if process is not self.process:
+            return
+        self.ready.clear()
+        self._cancelling.clear()
+        self._set_open_contexts(0)
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(
+                    WorkerCrashedError(f"Scrape worker {self.index} exited with code {process.exitcode}")
+                )
+        self._conn.close()
+        if self.stopping:
+            return
+
+        print(f"Scrape worker {self.index} exited with code {process.exitcode}, restarting...")
+        self.restarts += 1
+        self._loop.call_later(WORKER_RESTART_DELAY, self._restart)
+
+    def _restart(self) -> None:
+        if not self.stopping:
+            self.start()
+
+    def kill(self) -> None:
+        """Kill a hung worker; it is restarted like a crashed one."""
+        if self.process is not None and self.process.is_alive():
+            self.kills += 1
+            self.process.kill()
+
+    async def run(self, kind: str, args: Tuple[Any, ...], timeout: float) -> Any:
+        """Run a job in this worker, cancelling it after ``timeout`` seconds."""
+        job_id = next(_job_ids)
+        future = self._loop.create_future()
+        self._pending[job_id] = future
+        try:
+            self._conn.send(("run", job_id, kind, args))
+        except (OSError, ValueError):
+            self._pending.pop(job_id, None)
+            raise WorkerCrashedError(f"Scrape worker {self.index} is not running")
+        self.jobs += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # The worker confirms the cancellation; if it cannot, it is hung
+            self._pending.pop(job_id, None)
+            future.cancel()
+            self._cancelling.add(job_id)
+            try:
+                self._conn.send(("cancel", job_id))
+            except (OSError, ValueError):
+                pass
+            process = self.process
+            self._loop.call_later(
+                WORKER_KILL_GRACE,
+                lambda: self.kill() if job_id in self._cancelling and process is self.process else None,
+            )
+            raise JobTimeoutError(f"{kind} job timed out after {timeout:.0f}s")
+
+    async def stop(self) -> None:
+        self.stopping = True
+        if self.process is None:
+            return
+        try:
+            self._conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        await asyncio.to_thread(self.process.join, WORKER_KILL_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "running_jobs": self.running,
+            "open_contexts": self.open_contexts,
+            "jobs": self.jobs,
+            "restarts": self.restarts,
+            "kills": self.kills,
+        }
+
+
+class ScrapeWorkerPool:
+    """Bounded job queue feeding a pool of scrape worker processes.
+
+    Each worker owns a browser and an HTTP client and runs fetch, parse and
+    stats for up to ``jobs_per_process`` jobs at once, so slow pages and
+    CPU-heavy parsing never run on the API event loop. Jobs fail after
+    ``job_timeout`` seconds (queue time included); submitting to a full
+    queue raises QueueFullError. Exited or hung workers are replaced.
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES, jobs_per_process: int = WORKER_JOBS_PER_PROCESS,
+                 queue_size: int = WORKER_QUEUE_SIZE, job_timeout: float = WORKER_JOB_TIMEOUT,
+                 overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.processes = processes
+        self.jobs_per_process = jobs_per_process
+        self.queue_size = queue_size
+        self.job_timeout = job_timeout
+        self.overrides = overrides or {}
+
+        self._workers: List[ScrapeWorker] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.crashed = 0
+        self.rejected = 0
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    @property
+    def capacity(self) -> int:
+        return self.processes * self.jobs_per_process
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [ScrapeWorker(index, self.overrides) for index in range(self.processes)]
+        for worker in self._workers:
+            worker.start()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch(worker))
+            for worker in self._workers
+            for _ in range(self.jobs_per_process)
+        ]
+
+    async def stop(self) -> None:
+        if not self.started:
+            return
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        while not self._queue.empty():
+            _, _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(WorkerCrashedError("Scrape workers stopped"))
+        SCRAPE_QUEUE_JOBS.set(0)
+        await asyncio.gather(*(worker.stop() for worker in self._workers))
+        self._queue = None
+
+    async def submit(self, kind: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """Queue a job and wait for its result."""
+        if self._queue.full():
+            self.rejected += 1
+            SCRAPE_JOBS.labels(kind, "rejected").inc()
+            raise QueueFullError(f"{self._queue.qsize()} scrape jobs already queued")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = loop.time() + (timeout or self.job_timeout)
+        self._queue.put_nowait((kind, args, deadline, future))
+        SCRAPE_QUEUE_JOBS.set(self._queue.qsize())
+        self.submitted += 1
+        return await future
+
+    async def _dispatch(self, worker: ScrapeWorker) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await worker.ready.wait()
+            kind, args, deadline, future = await self._queue.get()
+            SCRAPE_QUEUE_JOBS.set(self._queue.qsize())
+            if future.done():
+                continue  # The caller gave up while the job was queued
+
+            outcome = "success"
+            try:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise JobTimeoutError(f"{kind} job expired in the queue")
+                result = await worker.run(kind, args, remaining)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if isinstance(e, JobTimeoutError):
+                    outcome = "timeout"
+                    self.timeouts += 1
+                elif isinstance(e, WorkerCrashedError):
+                    outcome = "crashed"
+                    self.crashed += 1
+                else:
+                    outcome = "error"
+                if not future.done():
+                    future.set_exception(e)
+            if outcome == "success":
+                self.completed += 1
+            else:
+                self.failed += 1
+            SCRAPE_JOBS.labels(kind, outcome).inc()
+
+    async def worker_stats(self) -> List[Dict[str, Any]]:
+        """Ask every worker for its browser, fetch and navigation stats."""
+
+        async def ask(worker: ScrapeWorker) -> Dict[str, Any]:
+            if not worker.ready.is_set():
+                return {"error": "restarting"}
+            try:
+                return await worker.run("stats", (), WORKER_KILL_GRACE)
+            except Exception as e:
+                return {"error": str(e)}
+
+        return list(await asyncio.gather(*(ask(worker) for worker in self._workers)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "processes": [worker.stats() for worker in self._workers],
+            "jobs_per_process": self.jobs_per_process,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "job_timeout_seconds": self.job_timeout,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "crashed": self.crashed,
+            "rejected": self.rejected,
+        }
+
+
+scrape_workers = ScrapeWorkerPool()
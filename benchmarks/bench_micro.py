@@ -0,0 +1,181 @@
+"""Micro-benchmarks for the status page parse and stats helpers.
+
+Also times encoding and decoding a company list (``--companylist``, the
+sample ``companylist.json`` by default) in each /companylist format, and
+summary statistics for ``--stats-companies`` companies one at a time
+against one stacked batch. Before timing, localized chart dates are
+checked against ``datetime.astimezone`` in LOCALIZE_CHECK_ZONES. Run from
+the repository root:
+
+    python -m benchmarks.bench_micro [--repeat N] [--companylist companylist.json]
+        [--stats-companies 1000] [--output results.json] [fixture.html ...]
+"""
+import argparse
+import copy
+import json
+import os
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import orjson
+
+from app.anomaly import AnomalyDetector
+from app.columnar import columnar_companylist
+from app.downdetector_index import parse_svg_stats
+from app.downdetector_scrapper import (
+    compute_summary_statistics,
+    extract_chart_lines,
+    format_epochs,
+    get_reported_problems,
+    get_script_content,
+    merge_chart_points,
+    parse_status_page,
+    series_points,
+    status_series,
+    str2obj,
+    to_epoch,
+)
+from app.stats import compute_batch_statistics, compute_statistics
+
+from app.responses import msgpack
+
+from .common import bench, read_fixture, status_fixtures, write_results
+
+TIMEZONE = "America/Maceio"
+
+# Zones whose offsets change on the hour and on the half hour (St_Johns,
+# Lord_Howe), or that are not whole hours from UTC (Kolkata, Chatham)
+LOCALIZE_CHECK_ZONES = (
+    "America/Maceio", "America/New_York", "Europe/London", "America/St_Johns",
+    "Australia/Lord_Howe", "Asia/Kolkata", "Pacific/Chatham",
+)
+
+
+def check_localization():
+    """Compare format_epochs with astimezone over two years of 15-minute points."""
+    start = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+    timestamps = list(range(start, start + 2 * 366 * 24 * 3600, 15 * 60))
+    for name in LOCALIZE_CHECK_ZONES:
+        zone = ZoneInfo(name)
+        expected = [
+            datetime.fromtimestamp(ts, timezone.utc).astimezone(zone).strftime("%Y-%m-%d %H:%M:%S")
+            for ts in timestamps
+        ]
+        for ts, got, want in zip(timestamps, format_epochs(timestamps, zone), expected):
+            if got != want:
+                raise SystemExit(f"{name}: epoch {ts} formatted as {got}, astimezone gives {want}")
+
+
+def cases(html):
+    """Return (name, zero-argument callable) pairs for one fixture."""
+    # The legacy line splitter only handles the two 96-point data series
+    chart_lines = extract_chart_lines(get_script_content(html))[:192]
+    chart_series, _ = parse_status_page(html)
+    reports = series_points(chart_series[0])
+    baseline = series_points(chart_series[1])
+    time_series = merge_chart_points(reports, baseline, TIMEZONE)
+    (dates, report_values), (_, baseline_values) = chart_series[0], chart_series[1]
+    timestamps = to_epoch(dates)
+
+    return [
+        ("str2obj", lambda: str2obj(chart_lines)),
+        ("parse_status_page", lambda: parse_status_page(html)),
+        ("merge_chart_points", lambda: merge_chart_points(reports, baseline, TIMEZONE)),
+        ("get_reported_problems", lambda: get_reported_problems(html)),
+        ("compute_summary_statistics", lambda: compute_summary_statistics(time_series)),
+        # A whole window for a company seen for the first time
+        ("anomaly_update", lambda: AnomalyDetector().update(
+            "bench", "com.br", timestamps, report_values, baseline_values)),
+    ]
+
+
+def stats_batch_cases(html, companies):
+    """Return (name, callable) pairs summarizing ``companies`` copies of a page."""
+    chart_series, _ = parse_status_page(html)
+    series = [status_series(chart_series, TIMEZONE) for _ in range(companies)]
+    time_series = [item.points() for item in series]
+    return [
+        # Dicts rebuilt into arrays per company, as build_status did before
+        ("stats_points_loop", lambda: [compute_summary_statistics(points) for points in time_series]),
+        ("stats_series_loop", lambda: [compute_statistics(item) for item in series]),
+        ("stats_batch", lambda: compute_batch_statistics(series)),
+    ]
+
+
+def companylist_cases(legacy):
+    """Return (name, callable) pairs for a company list with string sparklines."""
+    data = copy.deepcopy(legacy)
+    for company in data["companies"]:
+        parse_svg_stats(company["svg_data"])
+    columnar = columnar_companylist(data)
+    legacy_body = orjson.dumps(legacy)
+    bodies = {"json": orjson.dumps(data), "columnar": orjson.dumps(columnar)}
+
+    def parse_legacy():
+        # What a client did before: decode the payload, then every data_values string
+        companies = orjson.loads(legacy_body)["companies"]
+        return [json.loads(company["svg_data"]["data_values"]) for company in companies]
+
+    cases = [
+        ("encode_json", lambda: orjson.dumps(data)),
+        ("encode_columnar", lambda: orjson.dumps(columnar_companylist(data))),
+        ("decode_legacy", parse_legacy),
+        ("decode_json", lambda: orjson.loads(bodies["json"])),
+        ("decode_columnar", lambda: orjson.loads(bodies["columnar"])),
+    ]
+    if msgpack is not None:
+        bodies["msgpack"] = msgpack.packb(columnar)
+        cases += [
+            ("encode_msgpack", lambda: msgpack.packb(columnar_companylist(data))),
+            ("decode_msgpack", lambda: msgpack.unpackb(bodies["msgpack"])),
+        ]
+    sizes = {"legacy": len(legacy_body), **{name: len(body) for name, body in bodies.items()}}
+    return cases, sizes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("fixtures", nargs="*", default=status_fixtures())
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--companylist", default="companylist.json",
+                            help="Company list with string sparklines, as scraped before parsing")
+    arg_parser.add_argument("--stats-companies", type=int, default=1000,
+                            help="Companies summarized per call in the stats batch cases")
+    arg_parser.add_argument("--output", help="Write JSON results to this file ('-' for stdout)")
+    args = arg_parser.parse_args()
+
+    check_localization()
+
+    results = []
+    print(f"{'fixture':<24}{'function':<30}{'ms':>10}")
+    for path in args.fixtures:
+        html = read_fixture(path)
+        fixture = os.path.basename(path)
+        for name, fn in cases(html):
+            ms = bench(fn, args.repeat)
+            results.append({"fixture": fixture, "function": name, "best_ms": round(ms, 4)})
+            print(f"{fixture:<24}{name:<30}{ms:>10.4f}")
+
+    if args.fixtures and args.stats_companies:
+        fixture = f"{os.path.basename(args.fixtures[0])} x{args.stats_companies}"
+        for name, fn in stats_batch_cases(read_fixture(args.fixtures[0]), args.stats_companies):
+            ms = bench(fn, args.repeat)
+            results.append({"fixture": fixture, "function": name, "best_ms": round(ms, 4)})
+            print(f"{fixture:<24}{name:<30}{ms:>10.4f}")
+
+    if os.path.exists(args.companylist):
+        with open(args.companylist, "r", encoding="utf-8") as f:
+            encodings, sizes = companylist_cases(json.load(f))
+        fixture = os.path.basename(args.companylist)
+        for name, fn in encodings:
+            ms = bench(fn, args.repeat)
+            results.append({"fixture": fixture, "function": name, "best_ms": round(ms, 4)})
+            print(f"{fixture:<24}{name:<30}{ms:>10.4f}")
+        results.append({"fixture": fixture, "payload_bytes": sizes})
+        print("payload bytes: " + ", ".join(f"{name} {size}" for name, size in sizes.items()))
+
+    write_results("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
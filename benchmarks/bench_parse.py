@@ -0,0 +1,63 @@
+"""Compare the single-pass status page parser with the BeautifulSoup path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parse [--repeat N] [--output results.json] [fixture.html ...]
+"""
+import argparse
+import os
+
+from app.downdetector_scrapper import (
+    extract_chart_lines,
+    get_reported_problems,
+    get_script_content,
+    parse_status_page,
+    series_points,
+    str2obj,
+)
+
+from .common import bench, read_fixture, status_fixtures, write_results
+
+
+def legacy_parse(html):
+    chart_lines = extract_chart_lines(get_script_content(html))
+    reports = str2obj(chart_lines[:96])
+    baseline = str2obj(chart_lines[96:192])
+    return reports, baseline, get_reported_problems(html)
+
+
+def single_pass_parse(html):
+    chart_series, problems = parse_status_page(html)
+    return series_points(chart_series[0]), series_points(chart_series[1]), problems
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("fixtures", nargs="*", default=status_fixtures())
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--output", help="Write JSON results to this file ('-' for stdout)")
+    args = arg_parser.parse_args()
+
+    results = []
+
+    print(f"{'fixture':<28}{'legacy ms':>12}{'single-pass ms':>16}{'speedup':>10}")
+    for path in args.fixtures:
+        html = read_fixture(path)
+
+        if legacy_parse(html) != single_pass_parse(html):
+            raise SystemExit(f"{path}: parsers disagree")
+
+        legacy_ms = bench(lambda: legacy_parse(html), args.repeat)
+        single_ms = bench(lambda: single_pass_parse(html), args.repeat)
+        print(f"{os.path.basename(path):<28}{legacy_ms:>12.3f}{single_ms:>16.3f}{legacy_ms / single_ms:>9.1f}x")
+        results.append({
+            "fixture": os.path.basename(path),
+            "legacy_ms": round(legacy_ms, 4),
+            "single_pass_ms": round(single_ms, 4),
+        })
+
+    write_results("parse", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Shared helpers for the benchmark scripts: timing, fixtures and JSON results."""
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def status_fixtures() -> List[str]:
+    return sorted(glob.glob(os.path.join(FIXTURES_DIR, "status_*.html")))
+
+
+def read_fixture(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def bench(fn: Callable[[], Any], repeat: int) -> float:
+    """Best time of ``repeat`` runs for one call of ``fn``, in milliseconds."""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=loops)) / loops
+    return best * 1000
+
+
+def percentiles(samples: Sequence[float], points: Sequence[int] = (50, 90, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of ``samples`` (same unit as the samples)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        f"p{point}": round(ordered[min(len(ordered) - 1, max(0, -(-point * len(ordered) // 100) - 1))], 3)
+        for point in points
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(benchmark: str, results: Any, output: Optional[str]) -> Dict[str, Any]:
+    """Wrap results with run metadata and write them as JSON to ``output``.
+
+    Nothing is written without an output path; "-" writes to stdout.
+    """
+    document = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if output == "-":
+        print(json.dumps(document, indent=2))
+    elif output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    return document
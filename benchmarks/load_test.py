@@ -0,0 +1,191 @@
+"""Load test the FastAPI app against the local replay server.
+
+Status pages are fetched over HTTP from ``benchmarks.mock_server``, so no
+browser or network access is needed. The cold phase requests each company
+once (every request is a cache miss and a scrape); the warm phase repeats
+requests for the same companies (cache hits). ``--backend redis`` stores
+the cache in ``benchmarks.resp_server`` instead of a temporary directory;
+``--workers N`` runs scrapes in N worker processes instead of in-process.
+``--scrape-rate`` caps the app's scrapes per second (the rate limiter
+default is meant for the real site) and ``--upstream-rate-limit`` makes
+the replay server answer 429 above that rate. ``--archive`` replays the
+companies and pages of a capture archive instead of the fixtures. Run
+from the repository root:
+
+    python -m benchmarks.load_test [--companies 50] [--requests 2000]
+        [--concurrency 20] [--latency 0.05] [--backend file|redis]
+        [--workers 0] [--scrape-rate 1000] [--upstream-rate-limit 0]
+        [--archive captures]
+        [--output results.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app import downdetector_index, downdetector_scrapper, main as api
+from app.cache import FileBackend, RedisBackend
+from app.history import HistoryStore
+from app.ratelimit import ScrapeLimiter
+from app.workers import ScrapeWorkerPool
+
+from .common import peak_rss_mb, percentiles, write_results
+from .mock_server import ReplayServer
+from .resp_server import RespServer
+
+
+def configure_app(server_url: str, cache_dir: str, redis_url: Optional[str] = None) -> None:
+    """Point the app at the replay server and an empty cache (directory or RESP server)."""
+    downdetector_scrapper.FETCH_MODE = "http"
+    downdetector_scrapper.DOWNDETECTOR_URL = server_url
+    downdetector_index.DOWNDETECTOR_URL = server_url
+
+    api.CACHE_DIR = cache_dir
+    api.cache_backend = RedisBackend(redis_url) if redis_url else FileBackend(cache_dir)
+    api.janitor.backend = api.cache_backend
+    api.cache_index.clear()
+    api.history_store = HistoryStore(os.path.join(cache_dir, "history.sqlite3"))
+    api.memory_cache.clear()
+    api.rendered_cache.clear()
+    api.status_popularity.clear()
+
+
+def replay_worker_pool(server_url: str, processes: int) -> ScrapeWorkerPool:
+    """Worker pool whose processes fetch from the replay server over HTTP."""
+    overrides = {
+        "app.downdetector_scrapper": {"FETCH_MODE": "http", "DOWNDETECTOR_URL": server_url},
+        "app.downdetector_index": {"DOWNDETECTOR_URL": server_url},
+    }
+    return ScrapeWorkerPool(processes=processes, overrides=overrides)
+
+
+async def run_phase(client: httpx.AsyncClient, companies: List[str], requests: int,
+                    concurrency: int) -> Dict[str, Any]:
+    """Issue ``requests`` /status calls round-robin over ``companies``."""
+    latencies: List[float] = []
+    errors = 0
+    cache_hits = 0
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(companies[index % len(companies)])
+
+    async def worker():
+        nonlocal errors, cache_hits
+        while not queue.empty():
+            company = queue.get_nowait()
+            start_time = time.perf_counter()
+            response = await client.get("/status", params={"company": company})
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            if response.status_code != 200:
+                errors += 1
+            elif response.json().get("cache_hit"):
+                cache_hits += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "cache_hits": cache_hits,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            **percentiles(latencies),
+            "max": round(max(latencies), 3),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def load_test(args) -> Dict[str, Any]:
+    server = ReplayServer(latency=args.latency, rate_limit=args.upstream_rate_limit,
+                          archive=args.archive).start()
+    resp_server = RespServer().start() if args.backend == "redis" else None
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            configure_app(server.url, cache_dir, resp_server.url if resp_server else None)
+            api.scrape_limiter = ScrapeLimiter(api.classify_scrape_error, api.DOWNDETECTOR_DOMAINS,
+                                               rate=args.scrape_rate)
+            if args.workers:
+                api.scrape_workers = replay_worker_pool(server.url, args.workers)
+                await api.scrape_workers.start()
+                await api.scrape_workers.worker_stats()  # Wait until the workers have imported the app
+            if args.archive:
+                companies = sorted(server.status_pages)[:args.companies]
+            else:
+                companies = [f"company-{index}" for index in range(args.companies)]
+            transport = httpx.ASGITransport(app=api.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+                # The app logs every cache hit and miss; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    cold = await run_phase(client, companies, len(companies), args.concurrency)
+                    warm = await run_phase(client, companies, args.requests, args.concurrency)
+            await api.scrape_workers.stop()
+            await downdetector_scrapper.close_http_client()
+            await api.cache_backend.close()
+            api.history_store.close()
+    finally:
+        server.stop()
+        if resp_server:
+            resp_server.stop()
+
+    return {
+        "companies": len(companies),
+        "archive": args.archive,
+        "server_latency_seconds": args.latency,
+        "cache_backend": args.backend,
+        "scrape_workers": args.workers,
+        "upstream_requests": server.requests,
+        "upstream_throttled": server.throttled,
+        "scrape_limiter": api.scrape_limiter.stats(),
+        "cold": cold,
+        "warm": warm,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--companies", type=int, default=50)
+    arg_parser.add_argument("--requests", type=int, default=2000, help="Requests in the warm phase")
+    arg_parser.add_argument("--concurrency", type=int, default=20)
+    arg_parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds the replay server adds to every page")
+    arg_parser.add_argument("--backend", choices=("file", "redis"), default="file",
+                            help="Cache backend; 'redis' uses the local RESP stand-in")
+    arg_parser.add_argument("--workers", type=int, default=0,
+                            help="Scrape worker processes; 0 scrapes in the API process")
+    arg_parser.add_argument("--scrape-rate", type=float, default=1000.0,
+                            help="Scrapes per second allowed by the app's rate limiter")
+    arg_parser.add_argument("--upstream-rate-limit", type=float, default=0.0,
+                            help="Status requests per second the replay server answers before 429")
+    arg_parser.add_argument("--archive", help="Replay the latest page per company from this capture archive")
+    arg_parser.add_argument("--output", help="Write JSON results to this file ('-' for stdout)")
+    args = arg_parser.parse_args()
+
+    results = asyncio.run(load_test(args))
+
+    print(f"{'phase':<8}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for phase in ("cold", "warm"):
+        stats = results[phase]
+        latency = stats["latency_ms"]
+        print(f"{phase:<8}{stats['requests']:>10}{stats['throughput_rps']:>10.1f}{latency['p50']:>10.2f}"
+              f"{latency['p95']:>10.2f}{latency['p99']:>10.2f}{stats['errors']:>8}")
+    print(f"upstream requests: {results['upstream_requests']} ({results['upstream_throttled']} throttled), "
+          f"peak RSS: {results['peak_rss_mb']} MiB")
+
+    write_results("load", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
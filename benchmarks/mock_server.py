@@ -0,0 +1,149 @@
+"""Local stand-in for Downdetector that replays recorded HTML fixtures.
+
+``/status/<company>/`` serves ``fixtures/status_<company>.html`` (or the
+first status fixture for unknown companies) and ``/`` serves
+``fixtures/index.html``. With ``--archive`` it also serves the latest
+captured page of every company in a capture archive (see app/archive.py).
+With ``--rate-limit`` it answers 429 to status
+requests beyond that many per second, like a throttling upstream. Run it
+standalone from the repository root:
+
+    python -m benchmarks.mock_server [--port 8900] [--latency 0.05] [--rate-limit 5] [--archive captures]
+
+and point the scrapers at it by setting ``DOWNDETECTOR_URL`` in
+``app.downdetector_scrapper`` and ``app.downdetector_index``.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional
+
+from app.archive import decode_page, iter_archive
+
+from .common import FIXTURES_DIR, read_fixture, status_fixtures
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: "ReplayServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/status/"):
+            if not self.server.admit():
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = self.server.status_page(path[len("/status/"):].strip("/"))
+        elif path in ("", "/"):
+            body = self.server.index_page
+        else:
+            body = None
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if body is None:
+            self.send_error(404)
+            return
+
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """HTTP server holding the fixtures (and archived pages) in memory, with optional added latency and rate limit."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, rate_limit: float = 0.0,
+                 archive: Optional[str] = None):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.throttled = 0
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+        self.status_pages: Dict[str, bytes] = {}
+        for path in status_fixtures():
+            company = os.path.basename(path)[len("status_"):-len(".html")]
+            self.status_pages[company] = read_fixture(path).encode("utf-8")
+        self.default_status = next(iter(self.status_pages.values()), None)
+
+        if archive:
+            # Archives are oldest first: keep each company's last record, decompress once
+            latest = {header["company"]: body for header, body in iter_archive([archive])}
+            for company, body in latest.items():
+                self.status_pages[company] = decode_page(body).encode("utf-8")
+
+        index_path = os.path.join(FIXTURES_DIR, "index.html")
+        self.index_page = read_fixture(index_path).encode("utf-8") if os.path.exists(index_path) else None
+
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self) -> bool:
+        """Count a status request against the rate limit (requests in the last second)."""
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.throttled += 1
+                return False
+            self._recent.append(now)
+            return True
+
+    def status_page(self, company: str) -> Optional[bytes]:
+        return self.status_pages.get(company, self.default_status)
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--port", type=int, default=8900)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    arg_parser.add_argument("--rate-limit", type=float, default=0.0,
+                            help="Status requests per second before answering 429 (0: no limit)")
+    arg_parser.add_argument("--archive", help="Also serve the latest page per company from this capture archive")
+    args = arg_parser.parse_args()
+
+    server = ReplayServer(args.port, args.latency, args.rate_limit, args.archive)
+    print(f"Replaying {len(server.status_pages)} status pages on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
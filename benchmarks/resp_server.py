@@ -0,0 +1,255 @@
+"""Local stand-in for a Redis server, for the "redis" cache backend.
+
+Speaks RESP2 and keeps keys in memory with millisecond expiries. It
+implements the commands ``app.cache.RedisBackend`` sends (GET, SET with
+NX/PX, DEL, SCAN, the lock release script, PUBLISH and SUBSCRIBE) plus the
+connection handshake. Run it standalone from the repository root:
+
+    python -m benchmarks.resp_server [--port 6390]
+
+and start the API with ``CACHE_BACKEND=redis
+CACHE_REDIS_URL=redis://127.0.0.1:6390/0``.
+"""
+import argparse
+import fnmatch
+import threading
+import time
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.cache import RELEASE_LOCK_SCRIPT
+
+
+class RespHandler(StreamRequestHandler):
+    server: "RespServer"
+
+    def setup(self):
+        super().setup()
+        self.channels: Set[bytes] = set()
+        # Replies and published messages are written from different threads
+        self.write_lock = threading.Lock()
+
+    def send(self, reply) -> None:
+        with self.write_lock:
+            self.wfile.write(encode(reply))
+
+    def subscription(self, command: str, channels: List[bytes]) -> None:
+        """SUBSCRIBE/UNSUBSCRIBE: one confirmation per channel."""
+        if command == "UNSUBSCRIBE" and not channels:
+            channels = sorted(self.channels) or [None]
+        for channel in channels:
+            if command == "SUBSCRIBE":
+                self.channels.add(channel)
+                self.server.subscribe(channel, self)
+            elif channel is not None:
+                self.channels.discard(channel)
+                self.server.unsubscribe(channel, self)
+            self.send([command.lower().encode(), channel, len(self.channels)])
+
+    def finish(self):
+        for channel in self.channels:
+            self.server.unsubscribe(channel, self)
+        super().finish()
+
+    def read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # Inline command, e.g. typed into telnet
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            command = args[0].upper().decode()
+            if command in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                self.subscription(command, args[1:])
+                continue
+            self.send(self.server.execute(command, args[1:]))
+            if args[0].upper() == b"QUIT":
+                return
+
+
+class Error(str):
+    pass
+
+
+def encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Error):
+        return b"-ERR %s\r\n" % reply.encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+
+
+class RespServer(ThreadingTCPServer):
+    """In-memory key/value server with TTLs, one thread per connection."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), RespHandler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+        self.channels: Dict[bytes, Set[RespHandler]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, command: str, args: List[bytes]):
+        with self._lock:
+            self.commands += 1
+            handler = getattr(self, "cmd_" + command.lower(), None)
+            if handler is None:
+                return Error(f"unknown command '{command}'")
+            try:
+                return handler(*args)
+            except (TypeError, ValueError):
+                return Error(f"wrong arguments for '{command}'")
+
+    def subscribe(self, channel: bytes, handler: RespHandler) -> None:
+        with self._lock:
+            self.channels.setdefault(channel, set()).add(handler)
+
+    def unsubscribe(self, channel: bytes, handler: RespHandler) -> None:
+        with self._lock:
+            self.channels.get(channel, set()).discard(handler)
+
+    def cmd_publish(self, channel, message):
+        receivers = 0
+        for handler in list(self.channels.get(channel, ())):
+            try:
+                handler.send([b"message", channel, message])
+                receivers += 1
+            except OSError:
+                pass  # Disconnected; its handler unsubscribes on exit
+        return receivers
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_client(self, *args):
+        return "OK"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_quit(self):
+        return "OK"
+
+    def cmd_get(self, key):
+        return self._get(key)
+
+    def cmd_set(self, key, value, *options):
+        expires_at = None
+        condition = None
+        options = [option.upper() for option in options]
+        for position, option in enumerate(options):
+            if option in (b"NX", b"XX"):
+                condition = option
+            elif option == b"PX":
+                expires_at = time.time() + int(options[position + 1]) / 1000
+            elif option == b"EX":
+                expires_at = time.time() + int(options[position + 1])
+        exists = self._get(key) is not None
+        if (condition == b"NX" and exists) or (condition == b"XX" and not exists):
+            return None
+        self.data[key] = (value, expires_at)
+        return "OK"
+
+    def cmd_del(self, *keys):
+        deleted = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self.data[key]
+                deleted += 1
+        return deleted
+
+    def cmd_pttl(self, key):
+        if self._get(key) is None:
+            return -2
+        expires_at = self.data[key][1]
+        return -1 if expires_at is None else int((expires_at - time.time()) * 1000)
+
+    def cmd_scan(self, cursor, *options):
+        pattern = "*"
+        names = [option.upper() for option in options]
+        if b"MATCH" in names:
+            pattern = options[names.index(b"MATCH") + 1].decode()
+        keys = [key for key in list(self.data) if self._get(key) is not None]
+        return [b"0", [key for key in keys if fnmatch.fnmatchcase(key.decode(), pattern)]]
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._get(key) is not None)
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        return "OK"
+
+    def cmd_eval(self, script, numkeys, *args):
+        # Lua is not available; only the backend's lock release script runs
+        if script.decode().strip() != RELEASE_LOCK_SCRIPT.strip():
+            return Error("only the lock release script is supported")
+        key, token = args[0], args[int(numkeys)]
+        if self._get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def start(self) -> "RespServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--port", type=int, default=6390)
+    args = arg_parser.parse_args()
+
+    server = RespServer(args.port)
+    print(f"Serving RESP on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from app.broadcast import Broadcaster
+from app.cache import RedisBackend
+from benchmarks.resp_server import RespServer
+
+
+def events(subscriber) -> list:
+    frames = []
+    while not subscriber.queue.empty():
+        frame = subscriber.queue.get_nowait()
+        frames.append(json.loads(frame.split("data: ", 1)[1]))
+    return frames
+
+
+def test_without_a_relay_only_local_subscribers_get_events():
+    async def run():
+        broadcaster = Broadcaster()
+        assert not broadcaster.has_subscribers
+        async with broadcaster.subscribe("com.br") as local:
+            assert broadcaster.publish("status", {"n": 1}, "com.br") == 1
+            assert broadcaster.publish("status", {"n": 2}, "com") == 0
+            return events(local)
+
+    assert asyncio.run(run()) == [{"n": 1}]
+
+
+def test_relay_delivers_events_to_the_other_workers_once():
+    server = RespServer().start()
+
+    async def run():
+        backends = [RedisBackend(server.url), RedisBackend(server.url)]
+        scraper, other = Broadcaster(), Broadcaster()
+        scraper.start_relay(backends[0])
+        other.start_relay(backends[1])
+        # Publishers diff and publish even without local subscribers
+        assert scraper.has_subscribers
+        try:
+            async with scraper.subscribe() as local, other.subscribe("com.br") as remote:
+                await asyncio.sleep(0.2)  # Let both listeners subscribe
+                scraper.publish("status", {"company": "pix"}, "com.br")
+                scraper.publish("status", {"company": "tim"}, "com")
+                for _ in range(50):
+                    if other.relayed_in == 2:
+                        break
+                    await asyncio.sleep(0.02)
+                return events(local), events(remote), scraper.stats()["relay"]
+        finally:
+            for broadcaster in (scraper, other):
+                await broadcaster.stop_relay()
+            for backend in backends:
+                await backend.close()
+
+    try:
+        local, remote, relay = asyncio.run(run())
+    finally:
+        server.stop()
+    assert local == [{"company": "pix"}, {"company": "tim"}]
+    assert remote == [{"company": "pix"}]
+    assert relay == {"backend": "redis", "sent": 2, "received": 0, "dropped": 0}
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache
+from app import main as api
+from app.cache import FileBackend
+
+TARGET = ("pix", "com.br", "America/Maceio")
+KEY = api.status_cache_key(*TARGET)
+
+
+def entry(age: float, version: str) -> dict:
+    """A status payload stored ``age`` seconds ago."""
+    stored = datetime.now(timezone.utc) - timedelta(seconds=age)
+    return {
+        "company": "pix",
+        "version": version,
+        "cache_timestamp": stored.isoformat(),
+        "cache_expires_at": (stored + timedelta(seconds=api.CACHE_DURATION)).isoformat(),
+    }
+
+
+async def store_in_backend(data: dict) -> None:
+    """Store an entry the way another worker would, bypassing this worker's memory."""
+    body = api.RenderedEntry(data, api.cache_expiry(data)).body
+    await api.cache_backend.set(KEY, body, 3600)
+
+
+@pytest.fixture
+def scrapes(monkeypatch, tmp_path):
+    """Fresh cache tiers, with fetch_status recording calls instead of scraping."""
+    calls = []
+
+    async def fetch_status(company, domain, tz, cache_key):
+        calls.append(cache_key)
+        return await api.save_to_cache(cache_key, {"company": company, "version": "scraped"})
+
+    monkeypatch.setattr(api, "cache_backend", FileBackend(str(tmp_path)))
+    monkeypatch.setattr(api, "fetch_status", fetch_status)
+    api.memory_cache.clear()
+    api.rendered_cache.clear()
+    yield calls
+    api.memory_cache.clear()
+    api.rendered_cache.clear()
+
+
+def test_stale_memory_entry_defers_to_a_fresher_backend_entry(scrapes):
+    async def run():
+        api.memory_cache.set(KEY, entry(api.CACHE_DURATION + 60, "stale"), time.time() + 3600)
+        await store_in_backend(entry(5, "fresh"))
+        data = await api.get_status_with_cache(*TARGET)
+        await asyncio.sleep(0)
+        return data
+
+    data = asyncio.run(run())
+    assert data["version"] == "fresh"
+    assert data["stale"] is False
+    assert scrapes == []
+
+
+def test_stale_hit_refreshes_when_nothing_fresher_is_stored(scrapes):
+    async def run():
+        api.memory_cache.set(KEY, entry(api.CACHE_DURATION + 60, "stale"), time.time() + 3600)
+        data = await api.get_status_with_cache(*TARGET)
+        await asyncio.gather(*api.background_tasks)
+        return data
+
+    data = asyncio.run(run())
+    assert data["version"] == "stale"
+    assert data["stale"] is True
+    assert scrapes == [KEY]
+
+
+def test_cluster_locked_shares_an_entry_stored_after_the_one_seen(scrapes):
+    seen = entry(api.CACHE_DURATION + 60, "stale")
+
+    async def run():
+        await store_in_backend(entry(5, "fresh"))
+        return await api.cluster_locked(KEY, lambda: api.fetch_status(*TARGET, KEY), seen)()
+
+    assert asyncio.run(run())["version"] == "fresh"
+    assert scrapes == []
+
+
+def test_prefetch_skips_a_key_another_worker_refreshed(scrapes):
+    async def run():
+        due = entry(api.CACHE_DURATION - api.PREFETCH_INTERVAL / 2, "due")
+        api.memory_cache.set(KEY, due, time.time() + 3600)
+        await store_in_backend(entry(5, "fresh"))
+        return await api.prefetch_status(TARGET)
+
+    assert asyncio.run(run()) is False
+    assert scrapes == []
+
+
+def test_one_worker_takes_over_a_stale_lock(monkeypatch, tmp_path):
+    backend = FileBackend(str(tmp_path))
+    stale_token = backend._acquire("key", ttl=60)
+    past = time.time() - 120
+    os.utime(backend.path("key", ".lock"), (past, past))
+
+    # Widen the window between checking a lock's age and replacing it
+    def slow_time():
+        time.sleep(0.01)
+        return time.time()
+
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=slow_time))
+    barrier = threading.Barrier(8)
+
+    def contend():
+        barrier.wait()
+        return backend._acquire("key", ttl=60)
+
+    with ThreadPoolExecutor(8) as pool:
+        tokens = [token for token in pool.map(lambda _: contend(), range(8)) if token]
+    assert len(tokens) == 1
+
+    # The stale holder finishing late must not release its successor's lock
+    backend._release("key", stale_token)
+    assert backend._acquire("key", ttl=60) is None
+    backend._release("key", tokens[0])
+    assert backend._acquire("key", ttl=60) is not None
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import navigation
+from app.navigation import PROFILES, PageRecorder, navigate, navigation_stats, select_profile
+
+SITE = "https://downdetector.com.br/status/pix/"
+
+
+class FakeRequest:
+    def __init__(self, url: str, resource_type: str, body: int = 1000, headers: int = 100):
+        self.url = url
+        self.resource_type = resource_type
+        self._sizes = {"responseBodySize": body, "responseHeadersSize": headers}
+
+    async def sizes(self):
+        return self._sizes
+
+
+class FakeRoute:
+    def __init__(self, request: FakeRequest):
+        self.request = request
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+
+class FakePage:
+    """Replays a list of requests through the listeners and route handler navigate installs."""
+
+    def __init__(self, requests):
+        self.requests = requests
+        self.listeners = {}
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    def on(self, event, listener):
+        self.listeners.setdefault(event, []).append(listener)
+
+    def remove_listener(self, event, listener):
+        self.listeners[event].remove(listener)
+
+    def emit(self, event, request):
+        for listener in list(self.listeners.get(event, [])):
+            listener(request)
+
+    async def goto(self, url, timeout, wait_until):
+        for request in self.requests:
+            self.emit("request", request)
+            if self.handler is not None:
+                route = FakeRoute(request)
+                await self.handler(route)
+                if route.outcome == "aborted":
+                    continue
+            self.emit("requestfinished", request)
+        return "response"
+
+    async def wait_for_selector(self, selector, timeout):
+        pass
+
+
+def page_requests():
+    return [
+        FakeRequest(SITE, "document", body=50000),
+        FakeRequest("https://downdetector.com.br/app.css", "stylesheet", body=8000),
+        FakeRequest("https://downdetector.com.br/logo.png", "image", body=20000),
+        FakeRequest("https://cdn.downdetector.com/font.woff2", "font", body=30000),
+        FakeRequest("https://ads.example.com/tag.js", "script", body=40000),
+        FakeRequest("https://challenges.cloudflare.com/turnstile.js", "script", body=5000),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(navigation, "_navigation_stats", {})
+    monkeypatch.setattr(navigation, "_navigations", 0)
+
+
+def test_lean_route_blocks_by_resource_type_and_third_party():
+    recorder = PageRecorder(PROFILES["lean"], SITE)
+
+    async def run():
+        routes = [FakeRoute(request) for request in page_requests()]
+        for route in routes:
+            await recorder.route(route)
+        return [route.outcome for route in routes]
+
+    outcomes = asyncio.run(run())
+    assert outcomes == ["continued", "continued", "aborted", "aborted", "aborted", "continued"]
+    assert recorder.blocked == {"image": 1, "font": 1, "script": 1}
+    assert recorder.blocked_third_party == 1
+
+
+def test_bytes_come_from_transfer_sizes():
+    class ClosedPageRequest(FakeRequest):
+        async def sizes(self):
+            raise RuntimeError("Target page, context or browser has been closed")
+
+    recorder = PageRecorder(PROFILES["full"], SITE)
+
+    async def run():
+        recorder.request_finished(FakeRequest(SITE, "document", body=5000, headers=300))
+        # Served from the memory cache: no body transferred
+        recorder.request_finished(FakeRequest(SITE, "stylesheet", body=-1, headers=200))
+        recorder.request_finished(ClosedPageRequest(SITE, "script"))
+        await recorder.settle()
+
+    asyncio.run(run())
+    assert recorder.bytes_loaded == 5500
+
+
+def test_default_profile_samples_a_full_baseline(monkeypatch):
+    monkeypatch.setattr(navigation, "NAVIGATION_BASELINE_EVERY", 3)
+    names = [select_profile().name for _ in range(6)]
+    assert names == ["lean", "lean", "full", "lean", "lean", "full"]
+    assert select_profile("lean").name == "lean"
+
+    monkeypatch.setattr(navigation, "NAVIGATION_BASELINE_EVERY", 0)
+    assert {select_profile().name for _ in range(6)} == {"lean"}
+
+
+def test_navigate_reports_savings_against_the_baseline(monkeypatch):
+    monkeypatch.setattr(navigation, "NAVIGATION_BASELINE_EVERY", 2)
+
+    async def run():
+        for _ in range(4):
+            assert await navigate(FakePage(page_requests()), SITE, timeout=1000) == "response"
+
+    asyncio.run(run())
+    stats = navigation_stats()
+    assert stats["lean"]["pages"] == stats["full"]["pages"] == 2
+    assert stats["full"]["average_bytes_loaded"] == 153600
+    assert stats["lean"]["average_bytes_loaded"] == 63300
+    assert stats["lean"]["average_requests"] == stats["full"]["average_requests"] == 6
+    assert stats["lean"]["blocked_requests"] == {"image": 2, "font": 2, "script": 2}
+    assert stats["lean"]["blocked_third_party"] == 2
+    assert stats["lean"]["saved_per_page"]["bytes"] == 90300
+    assert "saved_per_page" not in stats["full"]
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    """A status page with an image, a font and a third-party script."""
+
+    def do_GET(self):
+        if self.path == "/status/pix/":
+            port = self.server.server_address[1]
+            body = (
+                f'<html><head><style>@font-face {{ font-family: f; src: url(/font.woff2); }}'
+                f' body {{ font-family: f; }}</style>'
+                f'<script src="http://localhost:{port}/tag.js"></script></head>'
+                f'<body><img src="/logo.png"><div class="ready">ok</div></body></html>'
+            ).encode()
+            content_type = "text/html"
+        else:
+            body = b"x" * 20000
+            content_type = "application/octet-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_lean_profile_in_chromium_loads_less_than_full():
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import async_playwright
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AssetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/status/pix/"
+
+    async def run():
+        async with async_playwright() as playwright:
+            try:
+                browser = await playwright.chromium.launch()
+            except PlaywrightError as e:
+                pytest.skip(f"Chromium is not available: {e}")
+            try:
+                for profile in ("lean", "full"):
+                    page = await browser.new_page()
+                    await navigate(page, url, timeout=10000, ready_selector="div.ready", profile=profile)
+                    await page.close()
+            finally:
+                await browser.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+    stats = navigation_stats()
+    assert stats["lean"]["blocked_requests"].get("image") == 1
+    assert stats["lean"]["blocked_third_party"] == 1
+    assert stats["lean"]["saved_per_page"]["bytes"] > 20000
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+
+from app import ratelimit
+from app.ratelimit import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    OTHER_DOMAIN,
+    CircuitOpenError,
+    DomainLimiter,
+    ScrapeLimiter,
+)
+
+
+# Token rate high enough that repeated halving never makes a test wait
+FAST = 1e6
+
+
+class Throttled(Exception):
+    pass
+
+
+class Unavailable(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+def classify(error: BaseException) -> Optional[str]:
+    if isinstance(error, Throttled):
+        return "throttled"
+    if isinstance(error, Unavailable):
+        return "error"
+    return None
+
+
+async def scrape(limiter: DomainLimiter, error: Optional[Exception] = None) -> None:
+    """One scrape through the limiter, failing with ``error`` if given."""
+    try:
+        async with limiter.slot(classify, max_wait=5):
+            if error is not None:
+                raise error
+    except (Throttled, Unavailable, NotFound):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    """Keep backoff and decrease spacing out of the tests' wall time."""
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0)
+    monkeypatch.setattr(ratelimit, "DECREASE_INTERVAL", 0)
+
+
+def test_success_keeps_limits_and_clears_the_failure_streak():
+    limiter = DomainLimiter("com.br", rate=100, burst=100)
+
+    async def run():
+        await scrape(limiter, Unavailable())
+        await scrape(limiter)
+
+    asyncio.run(run())
+    assert limiter.counts["error"] == 1
+    assert limiter.counts["success"] == 1
+    assert limiter.failure_streak == 0
+    assert limiter.state == CLOSED
+
+
+def test_upstream_failure_halves_rate_and_limit_and_backs_off(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 10)
+    limiter = DomainLimiter("com.br", rate=100, burst=100)
+    asyncio.run(scrape(limiter, Throttled()))
+
+    assert limiter.counts["throttled"] == 1
+    assert limiter.rate == 100 * ratelimit.DECREASE_FACTOR
+    assert limiter.limit == ratelimit.CONCURRENCY_START * ratelimit.DECREASE_FACTOR
+    assert limiter.failure_streak == 1
+    assert 5 <= limiter.backoff_until - time.monotonic() <= 10
+
+
+def test_healthy_scrapes_ramp_the_rate_back_up():
+    limiter = DomainLimiter("com.br", rate=100, burst=100)
+
+    async def run():
+        await scrape(limiter, Unavailable())
+        for _ in range(5):
+            await scrape(limiter)
+
+    asyncio.run(run())
+    assert limiter.rate == pytest.approx(50 + 5 * ratelimit.RATE_INCREASE)
+    assert limiter.limit > ratelimit.CONCURRENCY_START * ratelimit.DECREASE_FACTOR
+
+
+def test_uncounted_errors_leave_the_domain_untouched(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 10)
+    limiter = DomainLimiter("com.br", rate=100, burst=100)
+
+    async def run():
+        for _ in range(ratelimit.BREAKER_WINDOW):
+            await scrape(limiter, NotFound())
+
+    asyncio.run(run())
+    assert sum(limiter.counts.values()) == 0
+    assert limiter.rate == 100
+    assert limiter.limit == ratelimit.CONCURRENCY_START
+    assert limiter.backoff_until == 0
+    assert not limiter.outcomes
+    assert limiter.state == CLOSED
+
+
+def test_breaker_opens_after_enough_failures_and_rejects():
+    limiter = DomainLimiter("com.br", rate=FAST, burst=100)
+
+    async def run():
+        for _ in range(ratelimit.BREAKER_MIN_SAMPLES - 1):
+            await scrape(limiter, Unavailable())
+        assert limiter.state == CLOSED
+        await scrape(limiter, Unavailable())
+        assert limiter.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await scrape(limiter)
+
+    asyncio.run(run())
+    assert limiter.opens == 1
+    assert limiter.counts["rejected"] == 1
+
+
+def test_breaker_stays_closed_below_the_failure_ratio():
+    limiter = DomainLimiter("com.br", rate=FAST, burst=100)
+
+    async def run():
+        for _ in range(ratelimit.BREAKER_WINDOW):
+            await scrape(limiter)
+            await scrape(limiter)
+            await scrape(limiter, Unavailable())
+
+    asyncio.run(run())
+    assert limiter.state == CLOSED
+    assert limiter.opens == 0
+
+
+async def open_circuit(limiter: DomainLimiter) -> None:
+    for _ in range(ratelimit.BREAKER_MIN_SAMPLES):
+        await scrape(limiter, Unavailable())
+    assert limiter.state == OPEN
+    limiter.opened_until = time.monotonic()  # Cooldown over
+
+
+def test_successful_trial_closes_the_circuit():
+    limiter = DomainLimiter("com.br", rate=FAST, burst=100)
+
+    async def run():
+        await open_circuit(limiter)
+        await scrape(limiter)
+
+    asyncio.run(run())
+    assert limiter.state == CLOSED
+    assert limiter.cooldown == ratelimit.BREAKER_COOLDOWN
+    assert limiter.limit == ratelimit.CONCURRENCY_MIN
+    assert not limiter.outcomes
+
+
+def test_failed_trial_reopens_with_a_longer_cooldown():
+    limiter = DomainLimiter("com.br", rate=FAST, burst=100)
+
+    async def run():
+        await open_circuit(limiter)
+        await scrape(limiter, Throttled())
+
+    asyncio.run(run())
+    assert limiter.state == OPEN
+    assert limiter.cooldown == 2 * ratelimit.BREAKER_COOLDOWN
+    assert limiter.opens == 2
+
+
+def test_uncounted_trial_lets_the_next_scrape_try():
+    limiter = DomainLimiter("com.br", rate=FAST, burst=100)
+
+    async def run():
+        await open_circuit(limiter)
+        await scrape(limiter, NotFound())
+        assert limiter.state == HALF_OPEN
+        await scrape(limiter)
+
+    asyncio.run(run())
+    assert limiter.state == CLOSED
+
+
+def test_unknown_domains_share_one_limiter():
+    limiter = ScrapeLimiter(classify, known=frozenset({"com", "com.br"}))
+    assert limiter.domain("com.br").domain == "com.br"
+    assert limiter.domain("example") is limiter.domain("other.example")
+    assert limiter.label("example") == OTHER_DOMAIN
+    assert set(limiter.stats()["domains"]) == {"com.br", OTHER_DOMAIN}
+
+
+def test_only_upstream_health_counts_for_the_api_limiter():
+    from app.downdetector_scrapper import (
+        CompanyNotFoundError,
+        UpstreamThrottledError,
+        UpstreamUnavailableError,
+    )
+    from app.main import classify_scrape_error
+    from app.workers import JobTimeoutError, QueueFullError, WorkerCrashedError, WorkerJobError
+
+    assert classify_scrape_error(UpstreamThrottledError("429")) == "throttled"
+    assert classify_scrape_error(UpstreamUnavailableError("timeout")) == "error"
+    assert classify_scrape_error(JobTimeoutError("90s")) == "error"
+    for error in (CompanyNotFoundError("typo"), QueueFullError("full"), WorkerCrashedError("exit"),
+                  WorkerJobError("IndexError: list index out of range")):
+        assert classify_scrape_error(error) is None
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+
+from fastapi import Request
+
+from app.responses import RenderedEntry, cached_response
+
+HIT = {"from_cache": True, "cache_hit": True, "stale": False}
+STALE = {"from_cache": True, "cache_hit": True, "stale": True}
+
+
+def request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/status", "headers": raw})
+
+
+def entry() -> RenderedEntry:
+    data = {"company": "pix", "cache_timestamp": datetime.now(timezone.utc).isoformat()}
+    return RenderedEntry(data, time.time() + 60)
+
+
+def test_stale_and_fresh_responses_have_different_etags():
+    rendered = entry()
+    fresh = cached_response(request(), rendered, HIT)
+    stale = cached_response(request(), rendered, STALE)
+    assert fresh.headers["etag"] != stale.headers["etag"]
+    assert b'"stale":true' in stale.body
+
+
+def test_etag_revalidates_only_the_same_variant():
+    rendered = entry()
+    etag = cached_response(request(), rendered, HIT).headers["etag"]
+    assert cached_response(request(if_none_match=etag), rendered, HIT).status_code == 304
+
+    stale = cached_response(request(if_none_match=etag), rendered, STALE)
+    assert stale.status_code == 200
+    assert b'"stale":true' in stale.body
+
+
+def test_if_modified_since_is_not_answered_for_stale_responses():
+    rendered = entry()
+    since = formatdate(rendered.last_modified + 1, usegmt=True)
+    assert cached_response(request(if_modified_since=since), rendered, HIT).status_code == 304
+    assert cached_response(request(if_modified_since=since), rendered, STALE).status_code == 200